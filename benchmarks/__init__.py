@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for the bot, run as modules from the repository root.
+"""
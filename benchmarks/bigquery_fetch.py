@@ -0,0 +1,72 @@
+"""
+Benchmark row materialization of a BigQuery result: REST rows vs Arrow.
+
+Runs the per-day, per-user usage query once, then downloads its result
+(served from the finished job's destination table) three ways and times each:
+
+- rest_rows: iterate `RowIterator` row by row into dicts (the old path);
+- rest_arrow: `to_arrow()` over the REST pages;
+- storage_arrow: `to_arrow()` through the BigQuery Storage Read API.
+
+The Arrow timings include converting the columns to the Python tuples the
+usage store writes to SQLite.
+
+Usage:
+    python -m benchmarks.bigquery_fetch --project my-project --days 90 --repeat 3
+"""
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+from google.cloud import bigquery
+
+from core.bigquery.usage_store import build_usage_query, usage_today
+from core.utils.client_pool import get_bigquery_client
+
+
+def rest_rows(row_iterator) -> int:
+    rows = [dict(row.items()) for row in row_iterator]
+    return len(rows)
+
+
+def arrow_tuples(table) -> int:
+    days = [day.isoformat() for day in table.column("day").to_pylist()]
+    rows = list(zip(days, table.column("user_email").to_pylist(), table.column("job_count").to_pylist(),
+                    table.column("total_bytes_processed").fill_null(0).to_pylist()))
+    return len(rows)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--project", required=True, help="BigQuery project ID")
+    parser.add_argument("--days", type=int, default=90, help="Days of usage to fetch")
+    parser.add_argument("--repeat", type=int, default=3, help="Downloads per method")
+    args = parser.parse_args(argv)
+
+    client = get_bigquery_client(args.project)
+    end_day = usage_today()
+    query, params = build_usage_query(args.project, end_day - timedelta(days=args.days), end_day)
+
+    query_job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    query_job.result()
+    print(f"query: {query_job.total_bytes_processed or 0:,} bytes processed, "
+          f"{query_job.result().total_rows:,} rows")
+
+    methods = {
+        "rest_rows": lambda: rest_rows(query_job.result()),
+        "rest_arrow": lambda: arrow_tuples(query_job.result().to_arrow(create_bqstorage_client=False)),
+        "storage_arrow": lambda: arrow_tuples(query_job.result().to_arrow(create_bqstorage_client=True)),
+    }
+    for name, method in methods.items():
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            rows = method()
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        print(f"{name:>14}: {median:8.3f}s median of {args.repeat}, {rows / median:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark and guard the import time of the bot.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters, then
+reports the median cumulative import time and the slowest top-level imports.
+With --check it exits non-zero when the import takes longer than --max-ms or
+pulls in a library that should only load on first use (the Google client
+libraries, the GenAI SDK and pandas), so it can run as a regression check in CI.
+
+Usage:
+    python -m benchmarks.import_time --module main --repeat 5 --check
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+# Libraries that must not be imported until a tool or the chat needs them
+DEFERRED_MODULES = [
+    "google.genai",
+    "google.auth",
+    "google.cloud.bigquery",
+    "google.cloud.monitoring_v3",
+    "google.cloud.logging_v2",
+    "google.cloud.billing_v1",
+    "googleapiclient.discovery",
+    "pandas",
+    "pyarrow",
+]
+DEFAULT_MAX_MS = 400
+
+_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| *(\S+)$")
+
+
+def import_profile(module: str) -> list[tuple[str, int]]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module (str): Module to import
+
+    Returns:
+        list[tuple[str, int]]: Imported module and its cumulative microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr.splitlines()[-1]}")
+    profile = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            cumulative, name = match.groups()
+            profile.append((name, int(cumulative)))
+    return profile
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to run")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS, help="Import time budget for --check")
+    parser.add_argument("--check", action="store_true", help="Fail on a slow import or an eagerly imported library")
+    args = parser.parse_args(argv)
+
+    profiles = [import_profile(args.module) for _ in range(args.repeat)]
+    totals = [next(cumulative for name, cumulative in reversed(profile) if name == args.module) / 1000
+              for profile in profiles]
+    median_ms = statistics.median(totals)
+    print(f"import {args.module}: median {median_ms:.1f} ms, min {min(totals):.1f} ms over {args.repeat} runs")
+
+    last = profiles[-1]
+    imported = {name for name, _ in last}
+    print(f"\n{'cumulative ms':>14}  module")
+    for name, cumulative in sorted(last, key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:14.1f}  {name}")
+
+    eager = [name for name in DEFERRED_MODULES if name in imported]
+    if eager:
+        print(f"\nImported eagerly: {', '.join(eager)}")
+
+    if args.check and (median_ms > args.max_ms or eager):
+        print(f"\nFAILED: budget {args.max_ms:.0f} ms" + (", eager imports found" if eager else ""))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Benchmark the fixed prompt sent with every model request.
+
+Sends the same question with four configurations and reports input tokens
+(from the response usage metadata) and time to first token:
+
+- sdk_declarations: the original long instruction with all tools passed as
+  functions, so the SDK derives their declarations from the full docstrings
+  on every request (the baseline);
+- compact_all: compact declarations and instruction for every topic;
+- compact_topic: only the tools and guidance of the question's topics;
+- cached_topic: compact_topic stored with Gemini context caching (falls back
+  to inline when the model does not accept a cache of that size).
+
+With --offline, no request is made, no API key is needed and the sizes are
+estimated locally.
+
+Usage:
+    python -m benchmarks.prompt_size --prompt "Which VMs are the busiest?" --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from google import genai
+from google.genai import types
+
+from benchmarks.legacy_instruction import build_legacy_instruction
+from core.bot import MODEL_NAME, get_monitoring_tools
+from core.output_shaping import estimate_tokens
+from core.prompt import ALL_TOPICS, build_chat_config, build_instruction, detect_topics, tools_for_topics
+from core.utils.env_utils import load_environment_variables
+
+# Used offline for the project settings quoted in the instructions when they are not set
+PLACEHOLDER_ENVIRONMENT = {"GCP_PROJECT_NUMBER": "123456789012", "GCP_PROJECT_ID": "my-project",
+                           "GCP_REGION": "us-central1", "GCP_ZONE": "us-central1-a"}
+
+
+def variants(client, tools, prompt: str) -> dict[str, types.GenerateContentConfig]:
+    topics = detect_topics(prompt) or ALL_TOPICS
+    afc = types.AutomaticFunctionCallingConfig(disable=True)
+    return {
+        "sdk_declarations": types.GenerateContentConfig(
+            system_instruction=build_legacy_instruction(), tools=tools, automatic_function_calling=afc
+        ),
+        "compact_all": build_chat_config(tools),
+        "compact_topic": build_chat_config(tools, topics=topics),
+        "cached_topic": build_chat_config(tools, client, MODEL_NAME, topics),
+    }
+
+
+def time_to_first_token(client, prompt: str, config: types.GenerateContentConfig) -> tuple[float, int, int]:
+    started = time.perf_counter()
+    first = None
+    usage = None
+    for chunk in client.models.generate_content_stream(model=MODEL_NAME, contents=prompt, config=config):
+        if first is None:
+            first = time.perf_counter() - started
+        usage = chunk.usage_metadata or usage
+    if usage is None:
+        return first or 0.0, 0, 0
+    return first or 0.0, usage.prompt_token_count or 0, usage.cached_content_token_count or 0
+
+
+def offline(tools, prompt: str) -> None:
+    topics = detect_topics(prompt) or ALL_TOPICS
+    sdk_declarations = [json.loads(types.FunctionDeclaration.from_callable_with_api_option(callable=tool)
+                                   .model_dump_json(exclude_none=True)) for tool in tools]
+    size = estimate_tokens(build_legacy_instruction()) + estimate_tokens(sdk_declarations)
+    print(f"{'baseline (sdk_declarations)':40} {len(tools):3} tools  ~{size:6,} tokens")
+    for name, topic_set in (("all topics", ALL_TOPICS), (f"topics {sorted(topics)}", topics)):
+        declarations = build_chat_config(tools, topics=topic_set).tools[0].function_declarations
+        size = estimate_tokens(build_instruction(topic_set)) + estimate_tokens(
+            [json.loads(declaration.model_dump_json(exclude_none=True)) for declaration in declarations])
+        print(f"{name:40} {len(tools_for_topics(tools, topic_set)):3} tools  ~{size:6,} tokens")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prompt", default="Which VMs used the most CPU in the last hour?", help="Question to send")
+    parser.add_argument("--repeat", type=int, default=5, help="Requests per configuration")
+    parser.add_argument("--offline", action="store_true", help="Only estimate prompt sizes locally")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        load_dotenv()
+        # The instructions quote the project settings, which an offline estimate does not need
+        for name, placeholder in PLACEHOLDER_ENVIRONMENT.items():
+            os.environ.setdefault(name, placeholder)
+        offline(get_monitoring_tools(), args.prompt)
+        return
+
+    load_environment_variables()
+    tools = get_monitoring_tools()
+    client = genai.Client(api_key=os.environ["GENAI_API_KEY"])
+    print(f"{'config':18} {'input tokens':>12} {'cached':>8} {'ttft p50 ms':>12} {'ttft min ms':>12}")
+    for name, config in variants(client, tools, args.prompt).items():
+        runs = [time_to_first_token(client, args.prompt, config) for _ in range(args.repeat)]
+        ttfts = [run[0] * 1000 for run in runs]
+        print(f"{name:18} {runs[-1][1]:12,} {runs[-1][2]:8,} {statistics.median(ttfts):12.0f} {min(ttfts):12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Offline replay harness: scripted sessions against fake GCP and Gemini backends.
+
+Run with `python -m benchmarks.replay`; see `__main__` for the options. The
+Google client libraries and the GenAI SDK are still imported (their request
+types are used as-is), but no credentials or network access are needed.
+"""
@@ -0,0 +1,174 @@
+"""
+Replay scripted sessions against fake GCP and Gemini backends and report their cost.
+
+Each scenario runs in a fresh process through the interactive loop of main.py,
+with generated data of the chosen size and simulated API and model latency.
+Per scenario it reports turn latency percentiles, API calls and bytes, model
+requests and input tokens, and peak memory. It exits non-zero when a tool call
+sends an error back to the model, and with --baseline it compares against an
+earlier --out file and also exits non-zero on a regression, for CI.
+
+Usage:
+    python -m benchmarks.replay --size ci --out replay.json
+    python -m benchmarks.replay --size large --scenario cloud_run --verbose
+    python -m benchmarks.replay --baseline replay.json --tolerance 0.25
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from .fake_gcp import PRESETS
+from .harness import run_scenario
+from .scenarios import SCENARIOS
+
+# Measurements compared against the baseline: lower is better for all of them
+CHECKED_METRICS = {
+    "turn p90 ms": lambda result: result["turn_ms"]["p90"],
+    "API calls": lambda result: result["api_calls"],
+    "API bytes": lambda result: result["api_bytes"],
+    "model requests": lambda result: result["model"]["requests"],
+    "model input tokens": lambda result: result["model"]["input_tokens"],
+}
+# Latency differences below this many milliseconds are noise, not regressions
+MIN_LATENCY_REGRESSION_MS = 50
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run, repeatable; all by default")
+    parser.add_argument("--size", choices=list(PRESETS), default="ci", help="Size preset of the generated project")
+    parser.add_argument("--vms", type=int, help="Number of VMs")
+    parser.add_argument("--jobs", type=int, help="Number of Cloud Run jobs")
+    parser.add_argument("--log-lines", type=int, help="Log lines per execution")
+    parser.add_argument("--users", type=int, help="BigQuery users")
+    parser.add_argument("--usage-days", type=int, help="Days of BigQuery job statistics")
+    parser.add_argument("--api-latency-ms", type=float, default=20.0, help="Latency of every GCP API call")
+    parser.add_argument("--api-ms-per-mb", type=float, default=10.0, help="Transfer time per MB of API response")
+    parser.add_argument("--model-latency-ms", type=float, default=400.0, help="Latency of every model request")
+    parser.add_argument("--model-ms-per-1k-tokens", type=float, default=20.0,
+                        help="Extra model latency per thousand uncached input tokens")
+    parser.add_argument("--min-cache-tokens", type=int, default=4096,
+                        help="Smallest prompt the fake context cache accepts")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Replay through the asyncio loop")
+    parser.add_argument("--stream", action="store_true", help="Stream answers")
+    parser.add_argument("--no-router", dest="use_router", action="store_false",
+                        help="Send every prompt to the model")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the peak Python heap (slower)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run scenarios in this process, sharing caches and memory between them")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results written earlier with --out")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative increase over the baseline counted as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Also print per-turn, per-tool and per-API tables")
+    parser.add_argument("--transcript", dest="keep_transcript", action="store_true",
+                        help="Print what the bot answered")
+    return parser.parse_args(argv)
+
+
+def run(names: list[str], options: dict[str, Any], in_process: bool) -> list[dict[str, Any]]:
+    if in_process:
+        return [run_scenario(name, options) for name in names]
+    results = []
+    for name in names:
+        # A fresh interpreter per scenario: cold caches, and peak RSS of that scenario alone
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results.append(executor.submit(run_scenario, name, options).result())
+    return results
+
+
+def print_results(results: list[dict[str, Any]], verbose: bool) -> None:
+    print(f"{'scenario':14} {'turns':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'API calls':>9} "
+          f"{'API MB':>8} {'model req':>9} {'in ktok':>8} {'RSS MB':>7}")
+    for result in results:
+        turn_ms = result["turn_ms"]
+        print(f"{result['scenario']:14} {result['turns']:5} {turn_ms['p50']:8.0f} {turn_ms['p90']:8.0f} "
+              f"{turn_ms['p99']:8.0f} {result['api_calls']:9,} {result['api_bytes'] / 1024 ** 2:8.2f} "
+              f"{result['model']['requests']:9} {result['model']['input_tokens'] / 1000:8.1f} "
+              f"{result['peak_rss_mb']:7.0f}")
+
+    for result in results:
+        if verbose:
+            print(f"\n{result['scenario']} ({result['mode']}): {result['description']}")
+            print(f"  routed turns {result['routed_turn_ms']}, model turns {result['model_turn_ms']}")
+            if result["peak_heap_mb"] is not None:
+                print(f"  peak Python heap {result['peak_heap_mb']} MB")
+            print(f"\n  {'ms':>8} {'model req':>9}  prompt")
+            for turn in result["turn_details"]:
+                print(f"  {turn['ms']:8.0f} {turn['model_requests']:9}  {turn['prompt']}")
+            print(f"\n  {'calls':>6} {'p50 ms':>8} {'max ms':>8}  tool")
+            for tool, timing in result["tool_ms"].items():
+                print(f"  {timing['calls']:6} {timing['p50']:8.0f} {timing['max']:8.0f}  {tool}")
+            print(f"\n  {'calls':>6} {'KB':>10}  API method")
+            for method, counts in result["api"].items():
+                print(f"  {counts['calls']:6} {counts['bytes'] / 1024:10.1f}  {method}")
+        if result.get("transcript"):
+            print(f"\n--- {result['scenario']} transcript ---\n{result['transcript']}")
+
+
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float) -> list[str]:
+    """
+    List the measurements that got worse than the baseline by more than the tolerance
+
+    Args:
+        results (list[dict[str, Any]]): Current results
+        baseline (list[dict[str, Any]]): Results of an earlier run
+        tolerance (float): Allowed relative increase
+
+    Returns:
+        list[str]: One line per regression
+    """
+    previous = {result["scenario"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            continue
+        if before["size"] != result["size"]:
+            regressions.append(f"{result['scenario']}: baseline was generated with other sizes, not comparable")
+            continue
+        for metric, measure in CHECKED_METRICS.items():
+            old, new = measure(before), measure(result)
+            if new > old * (1 + tolerance) and not (metric.endswith("ms") and new - old < MIN_LATENCY_REGRESSION_MS):
+                regressions.append(f"{result['scenario']}: {metric} {old:,.0f} -> {new:,.0f}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    names = args.scenario or list(SCENARIOS)
+    results = run(names, vars(args), args.in_process)
+    print_results(results, args.verbose)
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump([{**result, "transcript": None} for result in results], file, indent=2)
+
+    failed = False
+    # A scenario whose tools fail is measuring error paths, its numbers mean nothing
+    errors = [f"{result['scenario']}: {error}" for result in results for error in result["tool_errors"]]
+    if errors:
+        print("\nFAILED: tool calls returned errors")
+        for line in errors:
+            print(f"  {line}")
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print("\nFAILED: regressions over the baseline")
+            for line in regressions:
+                print(f"  {line}")
+            failed = True
+        else:
+            print(f"\nNo regression over the baseline (tolerance {args.tolerance:.0%})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
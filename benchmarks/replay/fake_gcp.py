@@ -0,0 +1,861 @@
+"""
+In-memory stand-ins for the GCP APIs the tools call.
+
+`FakeGcp` generates a deterministic project (VMs, Cloud Run jobs and their
+executions and logs, service accounts, BigQuery datasets, job statistics and
+a billing export) of a configurable size, and hands out clients with the same
+call shapes as the discovery services and Cloud client libraries the tools
+use. Every call goes through an `ApiMeter`, which counts it, measures its
+response and sleeps for its simulated latency.
+
+Responses follow the field masks and resource shapes of the real APIs closely
+enough for the tools' parsing code; they are not validated against them.
+"""
+import asyncio
+import json
+import math
+import re
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator, Optional
+
+from .meter import ApiMeter, payload_size
+
+# Sizes of the generated project; "large" matches the sizes the bot is expected to handle
+PRESETS = {
+    "ci": {"vms": 500, "jobs": 20, "executions_per_day": 4, "execution_days": 14, "log_lines": 50_000,
+           "service_accounts": 20, "datasets": 12, "users": 50, "usage_days": 30,
+           "billing_services": 12, "skus_per_service": 8, "billing_days": 90},
+    "large": {"vms": 5000, "jobs": 60, "executions_per_day": 6, "execution_days": 30, "log_lines": 1_000_000,
+              "service_accounts": 80, "datasets": 40, "users": 500, "usage_days": 90,
+              "billing_services": 25, "skus_per_service": 24, "billing_days": 180},
+}
+
+ZONES = ["us-central1-a", "us-central1-b", "us-central1-c", "us-central1-f", "us-east1-b", "us-east1-c",
+         "us-east1-d", "europe-west1-b", "europe-west1-c", "asia-east1-a"]
+VM_ROLES = ["web", "api", "worker", "db", "cache", "batch"]
+MACHINE_TYPES = ["e2-standard-2", "e2-standard-4", "n2-standard-8", "n2-highmem-16", "c2-standard-30"]
+JOB_VERBS = ["etl", "ingest", "export", "report", "backup", "sync", "cleanup", "score", "train", "reconcile"]
+JOB_NOUNS = ["orders", "users", "events", "invoices", "clicks", "inventory", "payments", "sessions"]
+DATASET_NAMES = ["analytics", "raw_events", "marts", "staging", "finance", "marketing", "ml_features",
+                 "sandbox", "billing_export", "audit_logs", "product", "support"]
+FIRST_NAMES = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "ivan", "judy", "mallory",
+               "niaj", "olivia", "peggy", "rupert", "sybil", "trent", "victor", "walter", "yuki"]
+LAST_NAMES = ["smith", "jones", "garcia", "chen", "patel", "kim", "nguyen", "muller", "rossi", "silva"]
+SERVICES = ["Compute Engine", "Cloud Storage", "BigQuery", "Cloud Run", "Cloud SQL", "Networking",
+            "Cloud Logging", "Cloud Monitoring", "Kubernetes Engine", "Cloud Pub/Sub", "Artifact Registry",
+            "Cloud Functions", "Vertex AI", "Secret Manager", "Cloud DNS", "Dataflow", "Cloud Memorystore",
+            "Cloud Spanner", "Cloud Build", "Filestore", "Cloud Armor", "Cloud NAT", "Dataproc",
+            "Cloud Scheduler", "Cloud Tasks"]
+SKU_KINDS = ["Core running", "RAM running", "Storage", "Network egress", "API requests", "Snapshot storage",
+             "Licensing fee", "Backup storage"]
+SKU_REGIONS = ["Americas", "EMEA", "APAC"]
+SEVERITY_ORDER = ["DEFAULT", "DEBUG", "INFO", "NOTICE", "WARNING", "ERROR", "CRITICAL", "ALERT", "EMERGENCY"]
+
+# One log line in this many is a warning or an error
+WARNING_EVERY = 97
+ERROR_EVERY = 5003
+LOG_PAGE_SIZE = 1000
+BIGQUERY_PAGE_ROWS = 10_000
+
+
+def fraction(*parts: Any) -> float:
+    """
+    Deterministic pseudo-random number in [0, 1) derived from some values
+    """
+    return zlib.crc32(":".join(map(str, parts)).encode()) / 2 ** 32
+
+
+def _seconds(value: Any) -> float:
+    # Timestamps and durations come as datetimes and timedeltas from proto-plus, or as raw protobufs
+    if hasattr(value, "total_seconds"):
+        return value.total_seconds()
+    if hasattr(value, "timestamp"):
+        return value.timestamp()
+    return float(value.seconds)
+
+
+def _format_time(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class BackendSize:
+    """
+    Sizes of a generated project, from a preset with optional overrides
+    """
+
+    def __init__(self, preset: str = "ci", **overrides: int):
+        """
+        Args:
+            preset (str): Name of a preset in PRESETS
+            **overrides (int): Sizes to change, e.g. vms=5000 or log_lines=1_000_000
+        """
+        sizes = dict(PRESETS[preset])
+        unknown = set(overrides) - set(sizes)
+        if unknown:
+            raise ValueError(f"Unknown sizes: {', '.join(sorted(unknown))}")
+        sizes.update({name: value for name, value in overrides.items() if value is not None})
+        self.preset = preset
+        self.__dict__.update(sizes)
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class _Call:
+    """
+    Discovery API request returning one response
+    """
+
+    def __init__(self, meter: ApiMeter, method: str, fetch: Callable[[], dict]):
+        self.meter = meter
+        self.method = method
+        self.fetch = fetch
+
+    def execute(self) -> dict:
+        return self.meter.call(self.method, self.fetch())
+
+
+class _PagedCall:
+    """
+    Discovery API request over a list, followed with the `*_next` methods
+    """
+
+    def __init__(self, meter: ApiMeter, method: str, page: Callable[[int, int], tuple[dict, bool]],
+                 offset: int = 0, page_size: int = 500):
+        self.meter = meter
+        self.method = method
+        self.page = page
+        self.offset = offset
+        self.page_size = page_size
+
+    def execute(self) -> dict:
+        response, more = self.page(self.offset, self.page_size)
+        if more:
+            response["nextPageToken"] = str(self.offset + self.page_size)
+        return self.meter.call(self.method, response)
+
+    def next(self) -> "_PagedCall":
+        return _PagedCall(self.meter, self.method, self.page, self.offset + self.page_size, self.page_size)
+
+
+def _list_next(request: _PagedCall, response: dict) -> Optional[_PagedCall]:
+    return request.next() if response.get("nextPageToken") else None
+
+
+def _page(items: list, key: str) -> Callable[[int, int], tuple[dict, bool]]:
+    def page(offset: int, size: int) -> tuple[dict, bool]:
+        return {key: items[offset:offset + size]}, offset + size < len(items)
+    return page
+
+
+class FakeInstances:
+    """
+    `compute.instances()` of the Compute Engine discovery service
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    def aggregatedList(self, project: str, maxResults: int = 500, fields: str = "",
+                       returnPartialSuccess: bool = False) -> _PagedCall:
+        def page(offset: int, size: int) -> tuple[dict, bool]:
+            items: dict[str, dict[str, list]] = {}
+            for instance in self.gcp.instances[offset:offset + size]:
+                scope = "zones/" + instance["zone"].rsplit("/", 1)[-1]
+                items.setdefault(scope, {"instances": []})["instances"].append(instance)
+            return {"items": items}, offset + size < len(self.gcp.instances)
+        return _PagedCall(self.gcp.meter, "compute.instances.aggregatedList", page, page_size=maxResults)
+
+    def list(self, project: str, zone: str, maxResults: int = 500, fields: str = "") -> _PagedCall:
+        instances = [instance for instance in self.gcp.instances if instance["zone"].endswith(f"/zones/{zone}")]
+        return _PagedCall(self.gcp.meter, "compute.instances.list", _page(instances, "items"), page_size=maxResults)
+
+    def get(self, project: str, zone: str, instance: str) -> _Call:
+        return _Call(self.gcp.meter, "compute.instances.get", lambda: self.gcp.instance_resource(zone, instance))
+
+    aggregatedList_next = staticmethod(_list_next)
+    list_next = staticmethod(_list_next)
+
+
+class FakeExecutions:
+    """
+    `run.projects().locations().jobs().executions()` of the Cloud Run v2 discovery service
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    def list(self, parent: str, pageSize: int = 100, fields: str = "") -> _PagedCall:
+        job_name = parent.rsplit("/", 1)[-1]
+        executions = self.gcp.executions if job_name == "-" else self.gcp.job_executions.get(job_name, [])
+        return _PagedCall(self.gcp.meter, "run.jobs.executions.list", _page(executions, "executions"),
+                          page_size=pageSize)
+
+    def get(self, name: str) -> _Call:
+        def fetch() -> dict:
+            execution = self.gcp.executions_by_name.get(name)
+            if execution is None:
+                raise LookupError(f"Execution {name} not found")
+            return execution
+        return _Call(self.gcp.meter, "run.jobs.executions.get", fetch)
+
+    list_next = staticmethod(_list_next)
+
+
+class FakeJobs:
+    """
+    `run.projects().locations().jobs()` of the Cloud Run v2 discovery service
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    def list(self, parent: str, pageSize: int = 100, fields: str = "") -> _PagedCall:
+        return _PagedCall(self.gcp.meter, "run.jobs.list", _page(self.gcp.jobs, "jobs"), page_size=pageSize)
+
+    def executions(self) -> FakeExecutions:
+        return FakeExecutions(self.gcp)
+
+    list_next = staticmethod(_list_next)
+
+
+class FakeServiceAccounts:
+    """
+    `iam.projects().serviceAccounts()` of the IAM discovery service
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    def list(self, name: str) -> _Call:
+        return _Call(self.gcp.meter, "iam.serviceAccounts.list", lambda: {"accounts": self.gcp.service_accounts})
+
+
+class FakeDiscoveryService:
+    """
+    Discovery service exposing `instances()` or `projects()` like the real ones
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    def instances(self) -> FakeInstances:
+        return FakeInstances(self.gcp)
+
+    def projects(self) -> "FakeDiscoveryService":
+        return self
+
+    def locations(self) -> "FakeDiscoveryService":
+        return self
+
+    def jobs(self) -> FakeJobs:
+        return FakeJobs(self.gcp)
+
+    def serviceAccounts(self) -> FakeServiceAccounts:
+        return FakeServiceAccounts(self.gcp)
+
+
+class _Value:
+    __slots__ = ("double_value",)
+
+    def __init__(self, double_value: float):
+        self.double_value = double_value
+
+
+class _Point:
+    __slots__ = ("interval", "value")
+
+    def __init__(self, interval: SimpleNamespace, value: float):
+        self.interval = interval
+        self.value = _Value(value)
+
+
+class _AsyncPager:
+    def __init__(self, items: list):
+        self._items = items
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self._items:
+            yield item
+
+
+class FakeMonitoringClient:
+    """
+    `monitoring_v3.MetricServiceClient` serving CPU utilization of the generated VMs
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    def list_time_series(self, request: dict):
+        series, size = self.gcp.cpu_time_series(request)
+        return self.gcp.meter.call("monitoring.timeSeries.list", series, size=size)
+
+
+class FakeMonitoringAsyncClient:
+    """
+    `monitoring_v3.MetricServiceAsyncClient` serving CPU utilization of the generated VMs
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    async def list_time_series(self, request: dict):
+        series, size = self.gcp.cpu_time_series(request)
+        self.gcp.meter.record("monitoring.timeSeries.list", size)
+        await asyncio.sleep(self.gcp.meter.delay(size))
+        return _AsyncPager(series)
+
+
+class _LogEntry:
+    __slots__ = ("payload", "timestamp", "severity")
+
+    def __init__(self, payload: Any, timestamp: datetime, severity: str):
+        self.payload = payload
+        self.timestamp = timestamp
+        self.severity = severity
+
+
+class FakeLoggingClient:
+    """
+    `logging_v2.Client` serving the logs of the generated Cloud Run executions
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    def list_entries(self, filter_: str = "", order_by: str = "", page_size: Optional[int] = None,
+                     max_results: Optional[int] = None) -> Iterator[_LogEntry]:
+        return self.gcp.log_entries(filter_, order_by.endswith("desc"), page_size or LOG_PAGE_SIZE, max_results)
+
+
+class FakeBillingClient:
+    """
+    `billing_v1.CloudBillingClient`
+    """
+
+    def __init__(self, gcp: "FakeGcp"):
+        self.gcp = gcp
+
+    def get_project_billing_info(self, name: str) -> SimpleNamespace:
+        info = {"name": f"{name}/billingInfo", "project_id": name.rsplit("/", 1)[-1],
+                "billing_account_name": "billingAccounts/012345-6789AB-CDEF01", "billing_enabled": True}
+        return SimpleNamespace(**self.gcp.meter.call("cloudbilling.projects.getBillingInfo", info))
+
+
+class FakeRowIterator:
+    """
+    `bigquery.table.RowIterator` over a generated result
+    """
+
+    def __init__(self, gcp: "FakeGcp", columns: list[str], rows: list[dict[str, Any]]):
+        self.gcp = gcp
+        self.columns = columns
+        self.rows = rows
+        self.total_rows = len(rows)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for offset in range(0, len(self.rows), BIGQUERY_PAGE_ROWS):
+            page = self.rows[offset:offset + BIGQUERY_PAGE_ROWS]
+            self.gcp.meter.call("bigquery.tabledata.list", None, size=payload_size(page))
+            yield from (dict(row) for row in page)
+
+    def to_arrow(self, create_bqstorage_client: bool = True):
+        import pyarrow
+
+        table = pyarrow.table({column: [row[column] for row in self.rows] for column in self.columns})
+        if create_bqstorage_client:
+            self.gcp.meter.call("bigquerystorage.readRows", None, size=table.nbytes)
+        else:
+            for offset in range(0, len(self.rows), BIGQUERY_PAGE_ROWS):
+                self.gcp.meter.call("bigquery.tabledata.list", None,
+                                    size=payload_size(self.rows[offset:offset + BIGQUERY_PAGE_ROWS]))
+        return table
+
+
+class FakeQueryJob:
+    """
+    `bigquery.QueryJob` of a generated result
+    """
+
+    def __init__(self, gcp: "FakeGcp", columns: list[str], rows: list[dict[str, Any]], bytes_processed: int,
+                 dry_run: bool):
+        self.gcp = gcp
+        self.columns = columns
+        self.rows = rows
+        self.total_bytes_processed = bytes_processed
+        self.total_bytes_billed = 0 if dry_run else max(bytes_processed, 10 * 1024 ** 2)
+        self.cache_hit = False
+
+    def result(self) -> FakeRowIterator:
+        self.gcp.meter.call("bigquery.jobs.getQueryResults", {"totalRows": len(self.rows)})
+        return FakeRowIterator(self.gcp, self.columns, self.rows)
+
+
+class FakeBigQueryClient:
+    """
+    `bigquery.Client` answering the bot's queries from the generated job statistics and billing export
+    """
+
+    def __init__(self, gcp: "FakeGcp", project: str):
+        self.gcp = gcp
+        self.project = project
+
+    def list_datasets(self) -> list[SimpleNamespace]:
+        names = self.gcp.meter.call("bigquery.datasets.list", self.gcp.datasets)
+        return [SimpleNamespace(reference=SimpleNamespace(dataset_id=name)) for name in names]
+
+    def query(self, query: str, job_config=None) -> FakeQueryJob:
+        params = {param.name: param.value for param in getattr(job_config, "query_parameters", None) or []}
+        dry_run = bool(getattr(job_config, "dry_run", False))
+        columns, rows, bytes_processed = self.gcp.query_result(query, params)
+        method = "bigquery.jobs.insert.dryRun" if dry_run else "bigquery.jobs.insert"
+        self.gcp.meter.call(method, {"totalBytesProcessed": bytes_processed})
+        return FakeQueryJob(self.gcp, columns, [] if dry_run else rows, bytes_processed, dry_run)
+
+
+class FakeGcp:
+    """
+    Generated project behind every fake client
+    """
+
+    def __init__(self, size: BackendSize, meter: ApiMeter, project_id: str, project_number: str, region: str):
+        """
+        Args:
+            size (BackendSize): Sizes of the project
+            meter (ApiMeter): Meter every call goes through
+            project_id (str): GCP project ID
+            project_number (str): GCP project number
+            region (str): Cloud Run region
+        """
+        self.size = size
+        self.meter = meter
+        self.project_id = project_id
+        self.project_number = project_number
+        self.region = region
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self._results: dict[tuple, tuple[list[str], list[dict[str, Any]], int]] = {}
+
+        self.instances = [self._instance(index) for index in range(size.vms)]
+        self.instances_by_name = {instance["name"]: instance for instance in self.instances}
+        self.jobs = []
+        self.job_executions: dict[str, list[dict[str, Any]]] = {}
+        for index in range(size.jobs):
+            name = self.job_name(index)
+            executions = self._job_executions(index, name)
+            self.job_executions[name] = executions
+            self.jobs.append({"name": f"{self._jobs_parent()}/jobs/{name}",
+                              "latestCreatedExecution": {
+                                  "name": executions[0]["name"].rsplit("/", 1)[-1],
+                                  "createTime": executions[0]["createTime"],
+                                  "completionTime": executions[0].get("completionTime"),
+                              }})
+        # Like the API, "-" lists executions job by job, newest first within a job but not overall
+        self.executions = [execution for executions in self.job_executions.values() for execution in executions]
+        self.executions_by_name = {execution["name"]: execution for execution in self.executions}
+        self.executions_by_id = {execution["name"].rsplit("/", 1)[-1]: execution for execution in self.executions}
+        self.service_accounts = self._service_accounts()
+        self.datasets = [DATASET_NAMES[index % len(DATASET_NAMES)] + (f"_{index // len(DATASET_NAMES)}"
+                                                                      if index >= len(DATASET_NAMES) else "")
+                         for index in range(size.datasets)]
+        self.users = [self._user(index) for index in range(size.users)]
+
+    # Compute Engine
+
+    def _instance(self, index: int) -> dict[str, Any]:
+        zone = ZONES[index % len(ZONES)]
+        name = f"{VM_ROLES[index % len(VM_ROLES)]}-{index:05d}"
+        base = f"https://www.googleapis.com/compute/v1/projects/{self.project_id}/zones/{zone}"
+        return {
+            "name": name,
+            "zone": base,
+            "status": "TERMINATED" if fraction("status", index) < 0.05 else "RUNNING",
+            "machineType": f"{base}/machineTypes/{MACHINE_TYPES[index % len(MACHINE_TYPES)]}",
+            "selfLink": f"{base}/instances/{name}",
+        }
+
+    def self_link(self, index: int) -> str:
+        """
+        Get the self link of the generated VM at some index
+        """
+        return self.instances[index]["selfLink"]
+
+    def instance_resource(self, zone: str, name: str) -> dict[str, Any]:
+        """
+        Get the full resource of a VM, as `instances().get` returns it
+        """
+        instance = self.instances_by_name.get(name)
+        if instance is None or not instance["zone"].endswith(f"/zones/{zone}"):
+            raise LookupError(f"Instance {name} not found in {zone}")
+        index = int(name.rsplit("-", 1)[-1])
+        region = zone.rsplit("-", 1)[0]
+        project_url = f"https://www.googleapis.com/compute/v1/projects/{self.project_id}"
+        return {
+            **instance,
+            "kind": "compute#instance",
+            "id": str(4_000_000_000_000_000 + index),
+            "creationTimestamp": _format_time(self.now - timedelta(days=30 + index % 300)),
+            "cpuPlatform": "Intel Cascade Lake",
+            "canIpForward": False,
+            "deletionProtection": False,
+            "labels": {"role": VM_ROLES[index % len(VM_ROLES)], "env": "prod" if index % 3 else "staging",
+                       "team": JOB_NOUNS[index % len(JOB_NOUNS)]},
+            "tags": {"items": ["http-server", "https-server"], "fingerprint": "42WmSpB8rSM="},
+            "disks": [{
+                "kind": "compute#attachedDisk", "type": "PERSISTENT", "mode": "READ_WRITE", "boot": True,
+                "autoDelete": True, "deviceName": name, "index": 0, "interface": "SCSI", "diskSizeGb": "100",
+                "source": f"{project_url}/zones/{zone}/disks/{name}",
+                "licenses": ["https://www.googleapis.com/compute/v1/projects/debian-cloud/global/licenses/debian-12"],
+                "guestOsFeatures": [{"type": feature} for feature in
+                                    ("UEFI_COMPATIBLE", "VIRTIO_SCSI_MULTIQUEUE", "GVNIC", "SEV_CAPABLE")],
+            }],
+            "networkInterfaces": [{
+                "kind": "compute#networkInterface", "name": "nic0", "stackType": "IPV4_ONLY",
+                "network": f"{project_url}/global/networks/default",
+                "subnetwork": f"{project_url}/regions/{region}/subnetworks/default",
+                "networkIP": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}",
+                "accessConfigs": [{"kind": "compute#accessConfig", "type": "ONE_TO_ONE_NAT", "name": "External NAT",
+                                   "natIP": f"34.{index % 200}.{index // 200 % 256}.{index % 97}",
+                                   "networkTier": "PREMIUM"}],
+            }],
+            "metadata": {"kind": "compute#metadata", "fingerprint": "ppO0oKyRaRQ=", "items": [
+                {"key": "startup-script",
+                 "value": "#!/bin/bash\n" + "apt-get update && apt-get install -y nginx\n" * 20},
+                {"key": "enable-oslogin", "value": "TRUE"},
+            ]},
+            "serviceAccounts": [{
+                "email": f"{self.project_number}-compute@developer.gserviceaccount.com",
+                "scopes": ["https://www.googleapis.com/auth/devstorage.read_only",
+                           "https://www.googleapis.com/auth/logging.write",
+                           "https://www.googleapis.com/auth/monitoring.write",
+                           "https://www.googleapis.com/auth/service.management.readonly",
+                           "https://www.googleapis.com/auth/trace.append"],
+            }],
+            "scheduling": {"onHostMaintenance": "MIGRATE", "automaticRestart": True, "preemptible": False,
+                           "provisioningModel": "STANDARD"},
+            "shieldedInstanceConfig": {"enableSecureBoot": False, "enableVtpm": True,
+                                       "enableIntegrityMonitoring": True},
+            "fingerprint": "6o9nBOPP5hA=",
+            "startRestricted": False,
+        }
+
+    def cpu_value(self, index: int, minute: int) -> float:
+        """
+        CPU utilization (0-1) of the VM at some index, some minutes before now
+        """
+        base = 0.9 if index % 50 == 7 else 0.7 * fraction("cpu", index)
+        wave = 0.15 * math.sin(minute / 30 + index)
+        noise = 0.1 * (fraction("noise", index, minute) - 0.5)
+        return min(1.0, max(0.0, base + wave + noise))
+
+    def cpu_time_series(self, request: dict) -> tuple[list, int]:
+        """
+        Answer a fleet CPU `list_time_series` request
+
+        Returns:
+            tuple[list, int]: Time series newest point first, and their approximate size in bytes
+        """
+        metric_filter = request.get("filter", "")
+        zone = re.search(r'resource\.labels\.zone="([^"]+)"', metric_filter)
+        names = re.search(r"one_of\(([^)]*)\)", metric_filter)
+        wanted = set(re.findall(r'"([^"]+)"', names.group(1))) if names else None
+
+        interval, aggregation = request["interval"], request["aggregation"]
+        window = _seconds(interval.end_time) - _seconds(interval.start_time)
+        step = max(60, int(_seconds(aggregation.alignment_period)))
+        end = datetime.fromtimestamp(_seconds(interval.end_time) // step * step, timezone.utc)
+        count = max(1, int(window // step))
+        # Points at the same time share one interval, as they would share one timestamp
+        intervals = [SimpleNamespace(end_time=end - timedelta(seconds=offset * step)) for offset in range(count)]
+
+        series = []
+        for index, instance in enumerate(self.instances):
+            if instance["status"] != "RUNNING":
+                continue
+            if wanted is not None and instance["name"] not in wanted:
+                continue
+            instance_zone = instance["zone"].rsplit("/", 1)[-1]
+            if zone and instance_zone != zone.group(1):
+                continue
+            series.append(SimpleNamespace(
+                metric=SimpleNamespace(labels={"instance_name": instance["name"]}),
+                resource=SimpleNamespace(labels={"zone": instance_zone, "instance_id": str(index)}),
+                points=[_Point(interval, self.cpu_value(index, offset * step // 60))
+                        for offset, interval in enumerate(intervals)],
+            ))
+        return series, len(series) * (300 + 60 * count)
+
+    # Cloud Run
+
+    def _jobs_parent(self) -> str:
+        return f"projects/{self.project_number}/locations/{self.region}"
+
+    def job_name(self, index: int) -> str:
+        """
+        Get the name of the generated Cloud Run job at some index
+        """
+        verb = JOB_VERBS[index % len(JOB_VERBS)]
+        noun = JOB_NOUNS[index // len(JOB_VERBS) % len(JOB_NOUNS)]
+        cycle = index // (len(JOB_VERBS) * len(JOB_NOUNS))
+        return f"{verb}-{noun}" + (f"-{cycle + 1}" if cycle else "")
+
+    def _job_executions(self, job_index: int, job_name: str) -> list[dict[str, Any]]:
+        # Every fifth job is flaky, so failure questions have something to find
+        failure_rate = 0.3 if job_index % 5 == 0 else 0.03
+        per_day = self.size.executions_per_day
+        executions = []
+        for number in range(self.size.execution_days * per_day):
+            # The latest execution started an hour and a half ago, so most have finished
+            created = self.now - timedelta(minutes=90 + job_index + number * 24 * 60 // per_day)
+            started = created + timedelta(seconds=5 + 20 * fraction("queue", job_name, number))
+            failed = fraction("fail", job_name, number) < failure_rate
+            suffix = zlib.crc32(f"{job_name}{number}".encode()) & 0xfffff
+            execution = {
+                "name": f"{self._jobs_parent()}/jobs/{job_name}/executions/{job_name}-{suffix:05x}",
+                "uid": f"{zlib.crc32(f'uid{job_name}{number}'.encode()):08x}-0000-4000-8000-{number:012d}",
+                "job": job_name,
+                "createTime": _format_time(created),
+                "startTime": _format_time(started),
+                "failedCount": 1 if failed else 0,
+                "succeededCount": 0 if failed else 1,
+                "conditions": [{"type": "Completed",
+                                "state": "CONDITION_FAILED" if failed else "CONDITION_SUCCEEDED"}],
+            }
+            running = number == 0 and job_index % 7 == 3
+            if not running:
+                duration = timedelta(minutes=30 + 60 * fraction("duration", job_name, number))
+                execution["completionTime"] = _format_time(min(self.now, started + duration))
+            executions.append(execution)
+        return executions
+
+    # Cloud Logging
+
+    def _log_entry(self, execution: dict[str, Any], index: int, start: datetime, step: float) -> _LogEntry:
+        timestamp = start + timedelta(seconds=index * step)
+        if index % ERROR_EVERY == ERROR_EVERY - 4:
+            message = (f"Failed to process record id={index}: ValueError: invalid amount '{index % 1000}.x'\n"
+                       "Traceback (most recent call last):\n"
+                       '  File "/app/pipeline/transform.py", line 212, in transform\n'
+                       "    amount = Decimal(record['amount'])\n"
+                       "decimal.InvalidOperation: [<class 'decimal.ConversionSyntax'>]")
+            return _LogEntry(message, timestamp, "ERROR")
+        if index % WARNING_EVERY == WARNING_EVERY // 2:
+            message = (f"Retrying GET https://api.example.com/v1/{execution['job']}?page={index // 100} "
+                       f"after {100 * (1 + index % 5)} ms (attempt {1 + index % 5}/5)")
+            return _LogEntry(message, timestamp, "WARNING")
+        if index % 13 == 0:
+            return _LogEntry({"message": f"Heartbeat ok, memory {200 + index % 300} MB", "offset": index},
+                             timestamp, "DEBUG")
+        kind = index % 4
+        if kind == 0:
+            message = f"Processed batch {index} ({100 + index % 900} rows) in {5 + index % 250} ms"
+        elif kind == 1:
+            message = f"Downloaded gs://replay-bucket/input/part-{index:07d}.json ({1 + index % 4096} KB)"
+        elif kind == 2:
+            message = f"Upserted {index % 500} rows into warehouse.{execution['job'].split('-')[-1]}"
+        else:
+            message = f"Checkpoint saved at offset {index * 128}"
+        return _LogEntry(message, timestamp, "INFO")
+
+    def _log_indexes(self, min_severity: str) -> Any:
+        lines = self.size.log_lines
+        rank = SEVERITY_ORDER.index(min_severity) if min_severity else 0
+        if rank > SEVERITY_ORDER.index("WARNING"):
+            return range(ERROR_EVERY - 4, lines, ERROR_EVERY)
+        if rank > SEVERITY_ORDER.index("INFO"):
+            return sorted(set(range(ERROR_EVERY - 4, lines, ERROR_EVERY))
+                          | set(range(WARNING_EVERY // 2, lines, WARNING_EVERY)))
+        return range(lines)
+
+    def log_entries(self, log_filter: str, descending: bool, page_size: int,
+                    max_results: Optional[int]) -> Iterator[_LogEntry]:
+        """
+        Stream the log entries of an execution matching a Logging filter, one metered page at a time
+        """
+        execution_id = re.search(r'execution_name"="([^"]+)"', log_filter)
+        execution = self.executions_by_id.get(execution_id.group(1)) if execution_id else None
+        severity = re.search(r"severity >= (\w+)", log_filter)
+        contains = re.search(r'textPayload:("(?:[^"\\]|\\.)*")', log_filter)
+        text = json.loads(contains.group(1)) if contains else ""
+
+        if execution is None:
+            self.meter.call("logging.entries.list", {"entries": []})
+            return
+        start = datetime.fromisoformat(execution["startTime"].replace("Z", "+00:00"))
+        end_time = execution.get("completionTime")
+        end = datetime.fromisoformat(end_time.replace("Z", "+00:00")) if end_time else self.now
+        step = (end - start).total_seconds() / max(1, self.size.log_lines)
+        since = re.search(r'timestamp >= "([^"]+)"', log_filter)
+        # Index of the first entry at or after the filter's start
+        first = 0
+        if since:
+            offset = (datetime.fromisoformat(since.group(1).replace("Z", "+00:00")) - start).total_seconds()
+            first = max(0, math.ceil(offset / step)) if step else 0
+
+        indexes = self._log_indexes(severity.group(1) if severity else "")
+        if descending:
+            indexes = reversed(indexes)
+
+        page, page_bytes, returned = [], 0, 0
+        for index in indexes:
+            if index < first:
+                continue
+            entry = self._log_entry(execution, index, start, step)
+            message = entry.payload if isinstance(entry.payload, str) else entry.payload["message"]
+            if text and text not in message:
+                continue
+            page.append(entry)
+            page_bytes += len(message) + 120
+            returned += 1
+            if len(page) >= page_size or returned == max_results:
+                self.meter.call("logging.entries.list", None, size=page_bytes)
+                yield from page
+                page, page_bytes = [], 0
+                if returned == max_results:
+                    return
+        self.meter.call("logging.entries.list", None, size=page_bytes)
+        yield from page
+
+    # IAM
+
+    def _service_accounts(self) -> list[dict[str, str]]:
+        accounts = [
+            {"email": f"{self.project_number}-compute@developer.gserviceaccount.com"},
+            {"email": f"{self.project_number}@cloudbuild.gserviceaccount.com"},
+        ]
+        for index in range(self.size.service_accounts):
+            accounts.append({"email": f"{self.job_name(index)}-sa@{self.project_id}.iam.gserviceaccount.com",
+                             "displayName": f"Runner for {self.job_name(index)}"})
+        return [{**account, "name": f"projects/{self.project_id}/serviceAccounts/{account['email']}",
+                 "projectId": self.project_id, "uniqueId": str(100_000_000_000_000_000_000 + index)}
+                for index, account in enumerate(accounts)]
+
+    # BigQuery
+
+    def _user(self, index: int) -> str:
+        if index % 10 == 9:
+            return f"{self.job_name(index // 10)}-sa@{self.project_id}.iam.gserviceaccount.com"
+        first = FIRST_NAMES[index % len(FIRST_NAMES)]
+        last = LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]
+        cycle = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+        return f"{first}.{last}{cycle or ''}@example.com"
+
+    def _billing_rows(self, start_day: date, end_day: date) -> tuple[list[dict[str, Any]], int]:
+        first_day = max(start_day, (self.now - timedelta(days=self.size.billing_days)).date())
+        last_day = min(end_day - timedelta(days=1), self.now.date())
+        skus = [f"{kind} in {region}" for region in SKU_REGIONS for kind in SKU_KINDS][:self.size.skus_per_service]
+        rows = []
+        day = first_day
+        while day <= last_day:
+            for service_index, service in enumerate(SERVICES[:self.size.billing_services]):
+                scale = 400 / (1 + service_index)
+                for sku in skus:
+                    weight = fraction("sku", service, sku)
+                    if weight < 0.2:
+                        continue
+                    rows.append({"usage_date": day, "service": service, "sku": f"{service} {sku}",
+                                 "currency": "USD",
+                                 "cost": round(scale * weight * (0.8 + 0.4 * fraction("day", service, sku, day)), 4)})
+            day += timedelta(days=1)
+        return rows, len(rows) * 2048
+
+    def _usage_rows(self, start_time: datetime, end_time: datetime) -> tuple[list[dict[str, Any]], int]:
+        first_day = max(start_time.date(), (self.now - timedelta(days=self.size.usage_days)).date())
+        rows, scanned = [], 0
+        day = first_day
+        while day < end_time.date():
+            for user in self.users:
+                if fraction("active", user, day) < 0.4:
+                    continue
+                job_count = 1 + int(49 * fraction("jobs", user, day))
+                rows.append({"day": day, "user_email": user, "job_count": job_count,
+                             "total_bytes_processed": int(50 * 1024 ** 3 * fraction("bytes", user, day))})
+                scanned += job_count * 1024
+            day += timedelta(days=1)
+        return rows, scanned
+
+    def _load_rows(self, start_time: datetime, end_time: datetime, dataset: str) -> tuple[list[dict[str, Any]], int]:
+        if dataset not in self.datasets or self.datasets.index(dataset) % 2:
+            return [], 0
+        rows = []
+        start_time = max(start_time, self.now - timedelta(days=self.size.usage_days))
+        hour = start_time.replace(minute=0, second=0, microsecond=0)
+        if hour < start_time:
+            hour += timedelta(hours=1)
+        while hour < end_time:
+            if fraction("load", dataset, hour) < 0.3:
+                rows.append({"creation_time": hour.replace(tzinfo=None),
+                             "bytes_loaded": int(5 * 1024 ** 3 * fraction("loaded", dataset, hour))})
+            hour += timedelta(hours=1)
+        return rows, len(rows) * 1024
+
+    def query_result(self, query: str, params: dict[str, Any]) -> tuple[list[str], list[dict[str, Any]], int]:
+        """
+        Answer one of the bot's BigQuery queries from the generated data
+
+        Args:
+            query (str): Standard SQL query
+            params (dict[str, Any]): Query parameter values by name
+
+        Returns:
+            tuple[list[str], list[dict[str, Any]], int]: Result columns, rows and bytes processed
+        """
+        key = (query, tuple(sorted((name, str(value)) for name, value in params.items())))
+        if key not in self._results:
+            if "gcp_billing_export" in query:
+                columns = ["usage_date", "service", "sku", "currency", "cost"]
+                rows, scanned = self._billing_rows(params["start_time"].date(), params["end_time"].date())
+            elif "job_type = 'LOAD'" in query:
+                columns = ["creation_time", "bytes_loaded"]
+                rows, scanned = self._load_rows(params["start_time"], params["end_time"], params["dataset_name"])
+            elif "INFORMATION_SCHEMA" in query and "user_email" in query:
+                columns = ["day", "user_email", "job_count", "total_bytes_processed"]
+                rows, scanned = self._usage_rows(params["start_time"], params["end_time"])
+            else:
+                columns, rows, scanned = [], [], 0
+            self._results[key] = (columns, rows, scanned)
+        return self._results[key]
+
+    # Clients, in the shape of the client_pool getters
+
+    def compute_service(self) -> FakeDiscoveryService:
+        return FakeDiscoveryService(self)
+
+    def bigquery_client(self, project_id: str) -> FakeBigQueryClient:
+        return FakeBigQueryClient(self, project_id)
+
+    def monitoring_client(self) -> FakeMonitoringClient:
+        return FakeMonitoringClient(self)
+
+    def monitoring_async_client(self) -> FakeMonitoringAsyncClient:
+        return FakeMonitoringAsyncClient(self)
+
+    def logging_client(self, project: str) -> FakeLoggingClient:
+        return FakeLoggingClient(self)
+
+    def billing_client(self) -> FakeBillingClient:
+        return FakeBillingClient(self)
+
+    def getters(self) -> dict[str, Callable]:
+        """
+        Get replacements for the client_pool getters
+
+        Returns:
+            dict[str, Callable]: Getter name to a function returning the matching fake
+        """
+        return {
+            "get_credentials": lambda: None,
+            "get_compute_service": self.compute_service,
+            "get_run_service": self.compute_service,
+            "get_iam_service": self.compute_service,
+            "get_bigquery_client": self.bigquery_client,
+            "get_monitoring_client": self.monitoring_client,
+            "get_monitoring_async_client": self.monitoring_async_client,
+            "get_logging_client": self.logging_client,
+            "get_billing_client": self.billing_client,
+        }
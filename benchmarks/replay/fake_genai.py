@@ -0,0 +1,277 @@
+"""
+Scripted stand-in for the GenAI client.
+
+`FakeGenaiClient` plays the model's side of a chat from a script: for each
+user prompt, the rounds of function calls the model would make, then a short
+text answer built from the function responses. Each request costs a fixed
+latency plus a per-token cost on the estimated input (instruction, tool
+declarations and history), so prompt size and history growth show up in the
+measured latency, and context caches are honoured once created.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from google.genai import types
+
+from core.history import content_tokens
+from core.output_shaping import estimate_tokens
+
+from .meter import ApiMeter
+
+# Function calls the model makes per round of a prompt, in order
+Script = dict[str, list[list[tuple[str, dict[str, Any]]]]]
+
+ANSWER_PREVIEW_CHARS = 300
+STREAM_CHUNKS = 3
+
+
+class FakeCaches:
+    """
+    `client.caches`, accepting contexts of at least `min_tokens` like the real service
+    """
+
+    def __init__(self, client: "FakeGenaiClient", min_tokens: int):
+        self.client = client
+        self.min_tokens = min_tokens
+        self.tokens: dict[str, int] = {}
+        self._names = itertools.count(1)
+
+    def create(self, model: str, config: types.CreateCachedContentConfig) -> SimpleNamespace:
+        tokens = self.client.config_tokens(config)
+        self.client.meter.call("gemini.cachedContents.create", None, size=tokens * 4)
+        if tokens < self.min_tokens:
+            raise ValueError(f"Cached content is too small: {tokens} tokens, minimum is {self.min_tokens}")
+        name = f"cachedContents/replay-{next(self._names)}"
+        self.tokens[name] = tokens
+        return SimpleNamespace(name=name, model=model)
+
+
+class AsyncFakeCaches:
+    """
+    `client.aio.caches`, backed by the same caches as `client.caches`
+    """
+
+    def __init__(self, caches: FakeCaches):
+        self.caches = caches
+
+    async def create(self, model: str, config: types.CreateCachedContentConfig) -> SimpleNamespace:
+        return self.caches.create(model, config)
+
+
+def _response_error(response: dict[str, Any]) -> Optional[str]:
+    # Raised errors come as {"error": ...}, tools reporting a failure return a result with an "error" key
+    if "error" in response:
+        return str(response["error"])
+    result = response.get("result")
+    if isinstance(result, dict) and "error" in result:
+        return str(result["error"])
+    # List tools report a failure as a row with an "error" field, possibly tabulated
+    if isinstance(result, dict) and "error" in result.get("columns", ()):
+        column = result["columns"].index("error")
+        errors = [row[column] for row in result.get("rows", []) if row[column]]
+        return str(errors[0]) if errors else None
+    if isinstance(result, list):
+        errors = [row["error"] for row in result if isinstance(row, dict) and row.get("error")]
+        return str(errors[0]) if errors else None
+    return None
+
+
+class FakeChat:
+    """
+    Chat session replaying the script, with the call shapes of `client.chats.create()`
+    """
+
+    def __init__(self, client: "FakeGenaiClient", model: str, config: Optional[types.GenerateContentConfig],
+                 history: list[types.Content]):
+        self.client = client
+        self.model = model
+        self.config = config
+        self._history = list(history)
+        self._rounds: list[list[tuple[str, dict[str, Any]]]] = []
+
+    def get_history(self, curated: bool = False) -> list[types.Content]:
+        return list(self._history)
+
+    def _prepare(self, message: Any, config: Optional[types.GenerateContentConfig]) -> tuple[types.Content, float]:
+        """
+        Build the model's reply to a message, record it and get its simulated latency
+        """
+        if isinstance(message, str):
+            user = types.Content(role="user", parts=[types.Part(text=message)])
+            self._rounds = list(self.client.script.get(message, []))
+        else:
+            parts = message if isinstance(message, list) else [message]
+            user = types.Content(role="user", parts=[
+                part if isinstance(part, types.Part) else types.Part(text=str(part)) for part in parts
+            ])
+            for part in user.parts:
+                if part.function_response is not None:
+                    self.client.check_function_response(part.function_response)
+
+        config = config or self.config
+        delay = self.client.record_request(config, self._history + [user])
+        tool_config = config.tool_config if config else None
+        # Calls scripted for this turn are held back while function calling is off
+        calls_allowed = not (tool_config and tool_config.function_calling_config
+                             and tool_config.function_calling_config.mode == types.FunctionCallingConfigMode.NONE)
+        if self._rounds and calls_allowed:
+            calls = self._rounds.pop(0)
+            model = types.Content(role="model", parts=[
+                types.Part(function_call=types.FunctionCall(id=self.client.call_id(), name=name, args=args))
+                for name, args in calls
+            ])
+            self.client.count("function_calls", len(calls))
+        else:
+            model = types.Content(role="model", parts=[types.Part(text=self.client.answer(user))])
+        self._history += [user, model]
+        return model, delay
+
+    def send_message(self, message: Any, config: Optional[types.GenerateContentConfig] = None):
+        model, delay = self._prepare(message, config)
+        time.sleep(delay)
+        return _response(model.parts)
+
+    def send_message_stream(self, message: Any, config: Optional[types.GenerateContentConfig] = None):
+        model, delay = self._prepare(message, config)
+        for index, parts in enumerate(_chunks(model)):
+            # Most of the latency is before the first token
+            time.sleep(delay if index == 0 else self.client.chunk_seconds)
+            yield _response(parts)
+
+
+class AsyncFakeChat(FakeChat):
+    """
+    Chat session replaying the script, with the call shapes of `client.aio.chats.create()`
+    """
+
+    async def send_message(self, message: Any, config: Optional[types.GenerateContentConfig] = None):
+        model, delay = self._prepare(message, config)
+        await asyncio.sleep(delay)
+        return _response(model.parts)
+
+    async def send_message_stream(self, message: Any, config: Optional[types.GenerateContentConfig] = None):
+        model, delay = self._prepare(message, config)
+
+        async def stream():
+            for index, parts in enumerate(_chunks(model)):
+                await asyncio.sleep(delay if index == 0 else self.client.chunk_seconds)
+                yield _response(parts)
+        return stream()
+
+
+def _response(parts: list[types.Part]) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(candidates=[
+        types.Candidate(content=types.Content(role="model", parts=parts), finish_reason="STOP")
+    ])
+
+
+def _chunks(model: types.Content) -> list[list[types.Part]]:
+    # Function calls arrive in one chunk, text in a few
+    text = model.parts[0].text
+    if not text:
+        return [model.parts]
+    size = max(1, len(text) // STREAM_CHUNKS + 1)
+    return [[types.Part(text=text[offset:offset + size])] for offset in range(0, len(text), size)]
+
+
+class _Chats:
+    def __init__(self, client: "FakeGenaiClient", chat_class: type):
+        self.client = client
+        self.chat_class = chat_class
+
+    def create(self, model: str, config: Optional[types.GenerateContentConfig] = None,
+               history: Optional[list[types.Content]] = None) -> FakeChat:
+        self.client.count("chats_created")
+        return self.chat_class(self.client, model, config, history or [])
+
+
+class FakeGenaiClient:
+    """
+    `genai.Client` whose chats follow a script
+    """
+
+    def __init__(self, meter: ApiMeter, script: Script, latency_ms: float = 400.0, ms_per_1k_tokens: float = 20.0,
+                 chunk_ms: float = 30.0, min_cache_tokens: int = 4096):
+        """
+        Args:
+            meter (ApiMeter): Meter model requests are recorded in
+            script (Script): Function call rounds per user prompt
+            latency_ms (float): Time to first token of every request
+            ms_per_1k_tokens (float): Extra time per thousand uncached input tokens
+            chunk_ms (float): Time between streamed chunks
+            min_cache_tokens (int): Smallest context the fake context cache accepts
+        """
+        self.meter = meter
+        self.script = script
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.chunk_seconds = chunk_ms / 1000
+        self.chats = _Chats(self, FakeChat)
+        self.caches = FakeCaches(self, min_cache_tokens)
+        self.aio = SimpleNamespace(chats=_Chats(self, AsyncFakeChat), caches=AsyncFakeCaches(self.caches))
+        self.stats = {"requests": 0, "input_tokens": 0, "cached_tokens": 0, "function_calls": 0, "chats_created": 0,
+                      "tool_errors": 0}
+        self.tool_errors: list[str] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += amount
+
+    def check_function_response(self, function_response: types.FunctionResponse) -> None:
+        """
+        Count a function response sent back to the model if it reports an error
+        """
+        error = _response_error(function_response.response or {})
+        if error is not None:
+            with self._lock:
+                self.stats["tool_errors"] += 1
+                self.tool_errors.append(f"{function_response.name}: {error}")
+
+    def call_id(self) -> str:
+        return f"call-{next(self._ids)}"
+
+    def config_tokens(self, config) -> int:
+        """
+        Estimate the tokens of the instruction and tool declarations of a config
+        """
+        if config is None:
+            return 0
+        tokens = estimate_tokens(config.system_instruction) if config.system_instruction else 0
+        for tool in config.tools or []:
+            if isinstance(tool, types.Tool):
+                tokens += estimate_tokens(json.loads(tool.model_dump_json(exclude_none=True)))
+            else:
+                # Plain functions, whose declarations the SDK derives from their docstrings
+                tokens += estimate_tokens(getattr(tool, "__doc__", "") or "")
+        return tokens
+
+    def record_request(self, config, contents: list[types.Content]) -> float:
+        """
+        Record one model request and get its simulated latency in seconds
+        """
+        cached = self.caches.tokens.get(config.cached_content, 0) if config is not None and config.cached_content else 0
+        tokens = (0 if cached else self.config_tokens(config)) + sum(content_tokens(content) for content in contents)
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["input_tokens"] += tokens
+            self.stats["cached_tokens"] += cached
+        self.meter.record("gemini.generateContent", tokens * 4)
+        return (self.latency_ms + self.ms_per_1k_tokens * tokens / 1000) / 1000
+
+    def answer(self, user: types.Content) -> str:
+        """
+        Build the final answer of a turn from the function responses it received
+        """
+        responses = [part.function_response for part in user.parts or [] if part.function_response]
+        if not responses:
+            return "I can answer questions about the VMs, Cloud Run jobs, BigQuery usage and costs of this project."
+        summary = ", ".join(f"`{response.name}`" for response in responses)
+        preview = json.dumps(responses[0].response, default=str)[:ANSWER_PREVIEW_CHARS]
+        return f"Based on {summary}:\n\n{preview}"
@@ -0,0 +1,251 @@
+"""
+Replay a scripted session through the chat loop against the fake backends.
+
+`fake_backends` swaps every client_pool getter and `genai.Client` for the
+fakes, in each `core` module that imported them, and wraps the bot's tools to
+time them. `run_scenario` then types a scenario's prompts into `main.run_loop`
+(or `run_async_loop`) with a scripted `input()`, and reports:
+
+- latency of each turn, from the prompt being entered to the next prompt;
+- latency of each tool call;
+- calls and bytes per API method, model requests and input tokens;
+- tool calls whose response to the model reports an error;
+- peak resident memory, and peak Python heap with tracemalloc.
+"""
+import builtins
+import contextlib
+import functools
+import importlib
+import io
+import math
+import os
+import pkgutil
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Iterator, Optional
+
+from .fake_gcp import BackendSize, FakeGcp
+from .meter import ApiMeter
+from .scenarios import SCENARIOS, Turn, script_of
+
+ENVIRONMENT = {
+    "GCP_PROJECT_NUMBER": "123456789012",
+    "GCP_PROJECT_ID": "replay-project",
+    "GCP_REGION": "us-central1",
+    "GCP_ZONE": "us-central1-a",
+    "GENAI_API_KEY": "replay",
+}
+EXIT_PROMPT = "q"
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """
+    Get the nearest-rank p50, p90, p99 and maximum of some values
+
+    Args:
+        values (list[float]): Measurements
+
+    Returns:
+        dict[str, float]: Percentiles, all 0 without measurements
+    """
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def rank(percent: float) -> float:
+        return round(ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)], 1)
+
+    return {"p50": rank(50), "p90": rank(90), "p99": rank(99), "max": round(ordered[-1], 1)}
+
+
+def _import_core() -> None:
+    # Patching replaces names bound at import time, so every module has to be loaded first
+    import core
+    for module in pkgutil.walk_packages(core.__path__, "core."):
+        try:
+            importlib.import_module(module.name)
+        except ImportError:
+            # e.g. the HTTP server without its optional dependencies
+            pass
+
+
+def _timed(tool: Callable, timings: dict[str, list[float]]) -> Callable:
+    @functools.wraps(tool)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return tool(*args, **kwargs)
+        finally:
+            timings.setdefault(tool.__name__, []).append((time.perf_counter() - started) * 1000)
+    return wrapper
+
+
+@contextlib.contextmanager
+def fake_backends(gcp: FakeGcp, genai_client, tool_timings: dict[str, list[float]]) -> Iterator[None]:
+    """
+    Serve every GCP client and the GenAI client from fakes, and time the bot's tools
+
+    Args:
+        gcp (FakeGcp): Generated project serving the GCP clients
+        genai_client (FakeGenaiClient): Scripted model
+        tool_timings (dict[str, list[float]]): Filled with the milliseconds of each tool call
+    """
+    from google import genai
+
+    _import_core()
+    from core import bot
+    from core.utils import client_pool
+
+    get_tools = bot.get_monitoring_tools
+    replacements = {name: (getattr(client_pool, name), fake) for name, fake in gcp.getters().items()}
+    replacements["get_monitoring_tools"] = (get_tools, lambda: [_timed(tool, tool_timings) for tool in get_tools()])
+
+    patched = []
+    for module in [module for name, module in sys.modules.items() if name == "core" or name.startswith("core.")]:
+        for name, (original, fake) in replacements.items():
+            if getattr(module, name, None) is original:
+                setattr(module, name, fake)
+                patched.append((module, name, original))
+    original_client = genai.Client
+    genai.Client = lambda *args, **kwargs: genai_client
+    try:
+        yield
+    finally:
+        genai.Client = original_client
+        for module, name, original in patched:
+            setattr(module, name, original)
+
+
+class ScriptedInput:
+    """
+    Replacement for `input()` typing a scenario's prompts, then the exit command
+
+    The time between a prompt being returned and the next call is the latency
+    of that turn, as the user sees it.
+    """
+
+    def __init__(self, prompts: list[str], genai_client):
+        self.prompts = list(prompts)
+        self.genai_client = genai_client
+        self.turns: list[dict[str, Any]] = []
+        self._started: Optional[float] = None
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt_text: str = "") -> str:
+        with self._lock:
+            now = time.perf_counter()
+            requests = self.genai_client.stats["requests"]
+            if self._started is not None:
+                self.turns[-1].update(ms=round((now - self._started) * 1000, 1),
+                                      model_requests=requests - self._requests)
+            if not self.prompts:
+                return EXIT_PROMPT
+            prompt = self.prompts.pop(0)
+            self.turns.append({"prompt": prompt})
+            self._started, self._requests = now, requests
+            return prompt
+
+
+def run_session(turns: list[Turn], genai_client, use_async: bool = False, stream: bool = False,
+                use_router: bool = True) -> tuple[list[dict[str, Any]], str]:
+    """
+    Type a session's prompts into the interactive chat loop of main.py
+
+    Args:
+        turns (list[Turn]): Scenario turns
+        genai_client (FakeGenaiClient): Scripted model, used to count model requests per turn
+        use_async (bool): Run the asyncio loop instead of the blocking one
+        stream (bool): Stream answers
+        use_router (bool): Answer fixed-form prompts without the model
+
+    Returns:
+        tuple[list[dict[str, Any]], str]: Prompt, milliseconds and model requests of each turn, and the transcript
+    """
+    import asyncio
+
+    import main
+
+    scripted = ScriptedInput([prompt for prompt, _ in turns], genai_client)
+    transcript = io.StringIO()
+    original_input = builtins.input
+    builtins.input = scripted
+    try:
+        with contextlib.redirect_stdout(transcript):
+            if use_async:
+                asyncio.run(main.run_async_loop(stream=stream, use_router=use_router))
+            else:
+                main.run_loop(stream=stream, use_router=use_router)
+    finally:
+        builtins.input = original_input
+    return scripted.turns, transcript.getvalue()
+
+
+def run_scenario(name: str, options: dict[str, Any]) -> dict[str, Any]:
+    """
+    Replay one scenario against freshly generated fakes and measure it
+
+    Meant to run in its own process, so caches start cold and peak memory is the scenario's own.
+
+    Args:
+        name (str): Scenario name in SCENARIOS
+        options (dict[str, Any]): Harness options (sizes, latencies, loop mode), as parsed by the CLI
+
+    Returns:
+        dict[str, Any]: Scenario measurements
+    """
+    os.environ.update(ENVIRONMENT)
+    os.environ["GCP_OPS_BOT_CACHE_DIR"] = tempfile.mkdtemp(prefix="gcp-ops-bot-replay-")
+
+    from .fake_genai import FakeGenaiClient
+
+    description, build_turns = SCENARIOS[name]
+    size = BackendSize(options["size"], **{key: options.get(key) for key in ("vms", "jobs", "log_lines",
+                                                                             "users", "usage_days")})
+    meter = ApiMeter(options["api_latency_ms"], options["api_ms_per_mb"])
+    gcp = FakeGcp(size, meter, ENVIRONMENT["GCP_PROJECT_ID"], ENVIRONMENT["GCP_PROJECT_NUMBER"],
+                  ENVIRONMENT["GCP_REGION"])
+    turns = build_turns(gcp)
+    genai_client = FakeGenaiClient(meter, script_of(turns), options["model_latency_ms"],
+                                   options["model_ms_per_1k_tokens"], min_cache_tokens=options["min_cache_tokens"])
+
+    tool_timings: dict[str, list[float]] = {}
+    if options["tracemalloc"]:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with fake_backends(gcp, genai_client, tool_timings):
+        turn_details, transcript = run_session(turns, genai_client, options["use_async"], options["stream"],
+                                               options["use_router"])
+    wall_seconds = time.perf_counter() - started
+    peak_heap = tracemalloc.get_traced_memory()[1] if options["tracemalloc"] else None
+    tracemalloc.stop()
+
+    api = meter.snapshot()
+    gcp_api = {method: counts for method, counts in api.items() if not method.startswith("gemini.")}
+    return {
+        "scenario": name,
+        "description": description,
+        "mode": ("async" if options["use_async"] else "sync") + (", stream" if options["stream"] else "")
+                + ("" if options["use_router"] else ", no router"),
+        "size": size.as_dict(),
+        "turns": len(turn_details),
+        "wall_seconds": round(wall_seconds, 2),
+        "turn_ms": percentiles([turn["ms"] for turn in turn_details]),
+        "model_turn_ms": percentiles([turn["ms"] for turn in turn_details if turn["model_requests"]]),
+        "routed_turn_ms": percentiles([turn["ms"] for turn in turn_details if not turn["model_requests"]]),
+        "turn_details": turn_details,
+        "tool_ms": {tool: {"calls": len(timings), **percentiles(timings)}
+                    for tool, timings in sorted(tool_timings.items())},
+        "api": api,
+        "api_calls": sum(counts["calls"] for counts in gcp_api.values()),
+        "api_bytes": sum(counts["bytes"] for counts in gcp_api.values()),
+        "model": dict(genai_client.stats),
+        "tool_errors": list(genai_client.tool_errors),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_heap_mb": None if peak_heap is None else round(peak_heap / 1024 ** 2, 1),
+        "transcript": transcript if options.get("keep_transcript") else None,
+    }
@@ -0,0 +1,83 @@
+"""
+Call, byte and latency accounting shared by the fake backends.
+"""
+import json
+import threading
+import time
+from typing import Any, Optional
+
+
+def payload_size(payload: Any) -> int:
+    """
+    Approximate wire size of a response payload in bytes
+
+    Args:
+        payload (Any): JSON-like response
+
+    Returns:
+        int: Length of its JSON encoding
+    """
+    return len(json.dumps(payload, default=str, separators=(",", ":")))
+
+
+class ApiMeter:
+    """
+    Counts calls and bytes per API method and adds simulated network latency
+
+    Each call sleeps `latency_ms` plus `ms_per_mb` for every megabyte of
+    response, so payload size shows up in the measured latency the way it
+    does against the real APIs.
+    """
+
+    def __init__(self, latency_ms: float = 20.0, ms_per_mb: float = 10.0):
+        """
+        Args:
+            latency_ms (float): Round trip time added to every call
+            ms_per_mb (float): Transfer time added per megabyte of response
+        """
+        self.latency_ms = latency_ms
+        self.ms_per_mb = ms_per_mb
+        self.calls: dict[str, int] = {}
+        self.bytes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def delay(self, size: int) -> float:
+        """
+        Get the simulated seconds a response of some size takes
+        """
+        return (self.latency_ms + self.ms_per_mb * size / 1024 ** 2) / 1000
+
+    def record(self, method: str, size: int) -> None:
+        """
+        Count one call and its response bytes without sleeping
+        """
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            self.bytes[method] = self.bytes.get(method, 0) + size
+
+    def call(self, method: str, payload: Any, size: Optional[int] = None) -> Any:
+        """
+        Record a call, sleep for its simulated latency and pass its payload through
+
+        Args:
+            method (str): API method, e.g. "compute.instances.aggregatedList"
+            payload (Any): Response returned to the caller
+            size (Optional[int]): Response bytes, measured from the payload if not given
+
+        Returns:
+            Any: The payload
+        """
+        size = payload_size(payload) if size is None else size
+        self.record(method, size)
+        time.sleep(self.delay(size))
+        return payload
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """
+        Get the calls and bytes recorded so far
+
+        Returns:
+            dict[str, dict[str, int]]: Method to its calls and bytes
+        """
+        with self._lock:
+            return {method: {"calls": self.calls[method], "bytes": self.bytes[method]} for method in sorted(self.calls)}
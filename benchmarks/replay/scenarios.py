@@ -0,0 +1,123 @@
+"""
+Scripted chat sessions replayed by the harness.
+
+A scenario is a list of turns: the prompt typed at the `User :>` prompt and
+the rounds of function calls the model makes for it. Prompts the router
+answers directly have no rounds. Arguments refer to the generated project, so
+every call hits resources that exist.
+"""
+from typing import Any, Callable
+
+from .fake_gcp import FakeGcp
+
+# (prompt, rounds of (tool name, arguments) calls the model makes for it)
+Turn = tuple[str, list[list[tuple[str, dict[str, Any]]]]]
+
+
+def compute_session(gcp: FakeGcp) -> list[Turn]:
+    pid = gcp.project_id
+    vm = gcp.instances[min(42, len(gcp.instances) - 1)]
+    role, number = vm["name"].rsplit("-", 1)
+    zone = vm["zone"].rsplit("/", 1)[-1]
+    return [
+        ("list vms", []),
+        (f"list vms in {zone}", []),
+        ("Which VMs are the busiest right now?",
+         [[("monitor_fleet_cpu", {"project_id": pid, "window_minutes": 60, "top_n": 20})]]),
+        (f"Describe the {role} {int(number)} machine",
+         [[("resolve_resource", {"kind": "vm", "query": f"{role} {number}"})],
+          [("describe_vm", {"self_link": vm["selfLink"]})]]),
+        ("How has its CPU looked over the last 6 hours?",
+         [[("analyze_vm_cpu", {"self_link": vm["selfLink"], "window_minutes": 360}),
+           ("get_vm_cpu_history", {"self_link": vm["selfLink"], "window_minutes": 360})]]),
+        (f"Is anything in {zone} running unusually hot today?",
+         [[("monitor_fleet_cpu", {"project_id": pid, "window_minutes": 1440, "zone_name": zone,
+                                  "anomalies_only": True})]]),
+    ]
+
+
+def bigquery_session(gcp: FakeGcp) -> list[Turn]:
+    pid = gcp.project_id
+    dataset = gcp.datasets[0]
+    return [
+        ("list datasets", []),
+        (f"bigquery usage by user last {gcp.size.usage_days} days", []),
+        (f"Who processed the most bytes per day over the last {gcp.size.usage_days} days?",
+         [[("get_bigquery_usage_by_day_user", {"project_id": pid, "last_n_days": gcp.size.usage_days})]]),
+        (f"How much data was loaded into the {dataset.replace('_', ' ')} dataset this week?",
+         [[("resolve_resource", {"kind": "dataset", "query": dataset.replace("_", " ")})],
+          [("get_bytes_loaded_to_dataset", {"project_id": pid, "dataset_name": dataset, "last_n_days": 7})]]),
+        ("Which service accounts ran queries in the last 30 days?",
+         [[("get_bigquery_usage_by_user", {"project_id": pid, "last_n_days": 30})]]),
+    ]
+
+
+def cloud_run_session(gcp: FakeGcp) -> list[Turn]:
+    number = gcp.project_number
+    job = gcp.job_name(0)
+    executions = gcp.job_executions[job]
+    failed = next((execution for execution in executions if execution["failedCount"]), executions[0])
+    execution_id = failed["name"].rsplit("/", 1)[-1]
+    logs = {"project_number": number, "job_name": job, "execution_id": execution_id}
+    return [
+        ("list jobs", []),
+        ("which jobs failed in the last 7 days", []),
+        (f"Show the recent runs of the {job.replace('-', ' ')} job",
+         [[("resolve_resource", {"kind": "job", "query": job.replace("-", " ")})],
+          [("get_job_executions", {"project_number": number, "job_name": job, "limit": 20})]]),
+        (f"Why did execution {execution_id} fail?",
+         [[("get_cloud_run_job_execution_logs", logs)]]),
+        ("Show me the raw error lines",
+         [[("get_cloud_run_job_execution_logs", {**logs, "min_severity": "ERROR", "compact": False})]]),
+        ("Did it log any retries?",
+         [[("get_cloud_run_job_execution_logs", {**logs, "contains": "Retrying", "max_entries": 50})]]),
+    ]
+
+
+def cost_session(gcp: FakeGcp) -> list[Turn]:
+    pid = gcp.project_id
+    return [
+        ("what is the current month cost", []),
+        ("cost by service last 90 days", []),
+        ("daily cost trends last 30 days", []),
+        ("Break down Compute Engine spend by SKU over the last 90 days",
+         [[("get_cost_breakdown", {"project_id": pid, "group_by": "sku", "days": 90,
+                                   "filter_text": "Compute Engine"})]]),
+        ("What are our biggest storage and network costs?",
+         [[("get_resource_costs", {"project_id": pid, "resource_type": "Storage"}),
+           ("get_resource_costs", {"project_id": pid, "resource_type": "Networking"})]]),
+        ("How did spend change day by day per service this month?",
+         [[("get_cost_breakdown", {"project_id": pid, "group_by": "day,service", "days": 30, "top_n": 100})]]),
+    ]
+
+
+def long_session(gcp: FakeGcp, cycles: int = 3) -> list[Turn]:
+    """
+    Every model-driven turn of the other sessions, asked several times in one chat
+    """
+    turns = [turn for session in (compute_session, bigquery_session, cloud_run_session, cost_session)
+             for turn in session(gcp) if turn[1]]
+    return turns * cycles
+
+
+SCENARIOS: dict[str, tuple[str, Callable[[FakeGcp], list[Turn]]]] = {
+    "compute": ("Fleet listing, busiest VMs and one VM's CPU history", compute_session),
+    "bigquery": ("Datasets, per-user and per-day usage and load jobs", bigquery_session),
+    "cloud_run": ("Job health, executions and logs of a failed execution", cloud_run_session),
+    "cost": ("Month to date, per-service, per-SKU and daily costs", cost_session),
+    "long_session": ("All model-driven turns three times in one chat, to exercise history compaction",
+                     long_session),
+}
+
+
+def script_of(turns: list[Turn]) -> dict[str, list[list[tuple[str, dict[str, Any]]]]]:
+    """
+    Get the function call rounds of each prompt, for the fake model
+
+    Args:
+        turns (list[Turn]): Scenario turns
+
+    Returns:
+        dict[str, list[list[tuple[str, dict[str, Any]]]]]: Prompt to its rounds
+    """
+    return {prompt: rounds for prompt, rounds in turns}
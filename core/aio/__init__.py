@@ -0,0 +1,8 @@
+from .bot import (
+    AsyncParallelToolChat,
+    create_async_bot
+)
+from .tools import (
+    get_async_tools,
+    to_async
+)
@@ -0,0 +1,256 @@
+"""
+Asyncio-based Gemini bot.
+
+Uses the google-genai async client and awaits all function calls of a model
+response concurrently, each with its own timeout. A turn can be cancelled at
+any point; the chat is then rolled back to the last completed turn so the
+session stays usable.
+"""
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Optional
+
+from google import genai
+from google.genai import types
+
+from ..bot import MODEL_NAME, get_monitoring_tools
+from ..history import HistoryManager
+from ..prompt import TopicScope, build_chat_config
+from ..tool_dispatch import (
+    MAX_TOOL_ROUNDS,
+    TOOL_CALL_TIMEOUT_SECONDS,
+    answer_only_config,
+    coerce_args,
+    function_response_parts,
+    response_text,
+    to_jsonable
+)
+from .tools import get_async_tools
+
+
+async def call_tool_async(func: Callable, args: Optional[dict[str, Any]],
+                          timeout: float = TOOL_CALL_TIMEOUT_SECONDS) -> dict[str, Any]:
+    """
+    Await a tool and wrap its outcome the way automatic function calling does
+
+    Args:
+        func (Callable): Async tool function
+        args (Optional[dict[str, Any]]): Arguments from the model's function call
+        timeout (float): Seconds the call may take
+
+    Returns:
+        dict[str, Any]: {"result": ...} on success or {"error": ...} on failure
+    """
+    try:
+        result = await asyncio.wait_for(func(**coerce_args(func, args or {})), timeout)
+        return {"result": to_jsonable(result)}
+    except asyncio.TimeoutError:
+        return {"error": f"Tool call timed out after {timeout:g} seconds"}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def _unknown_tool(name: str) -> dict[str, Any]:
+    return {"error": f"Unknown tool: {name}"}
+
+
+def _tool_call(function_call: types.FunctionCall, tools: dict[str, Callable]):
+    if function_call.name not in tools:
+        return _unknown_tool(function_call.name)
+    return call_tool_async(tools[function_call.name], function_call.args)
+
+
+async def run_function_calls_async(function_calls: list[types.FunctionCall],
+                                   tools: dict[str, Callable]) -> list[types.Part]:
+    """
+    Run function calls concurrently and build their response parts in call order
+
+    Args:
+        function_calls (list[types.FunctionCall]): Calls returned by the model
+        tools (dict[str, Callable]): Async tool functions by name
+
+    Returns:
+        list[types.Part]: One function response part per call, in the same order
+    """
+    responses = await asyncio.gather(*(_tool_call(function_call, tools) for function_call in function_calls))
+    return function_response_parts(function_calls, responses)
+
+
+async def iter_function_calls_async(function_calls: list[types.FunctionCall],
+                                    tools: dict[str, Callable]) -> AsyncIterator[tuple[int, dict[str, Any], float]]:
+    """
+    Run function calls concurrently, yielding each outcome as soon as it completes
+
+    Args:
+        function_calls (list[types.FunctionCall]): Calls returned by the model
+        tools (dict[str, Callable]): Async tool functions by name
+
+    Yields:
+        tuple[int, dict[str, Any], float]: Call index, response payload and seconds taken
+    """
+    async def timed(index: int, function_call: types.FunctionCall):
+        started = time.perf_counter()
+        response = await _tool_call(function_call, tools)
+        return index, response, time.perf_counter() - started
+
+    tasks = [asyncio.ensure_future(timed(index, call)) for index, call in enumerate(function_calls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class AsyncParallelToolChat:
+    """
+    Async chat session that awaits each turn's function calls concurrently
+    """
+
+    def __init__(self, client, model: str, config: types.GenerateContentConfig, tools: list[Callable],
+                 scope: Optional[TopicScope] = None):
+        """
+        Args:
+            client (genai.Client): GenAI client
+            model (str): Model name
+            config (types.GenerateContentConfig): Chat config with automatic function calling disabled
+            tools (list[Callable]): Async tool functions the model may call
+            scope (Optional[TopicScope]): Picks a smaller per-turn config from the prompt's topics
+        """
+        self.client = client
+        self.model = model
+        self.config = config
+        self.tools = {tool.__name__: tool for tool in tools}
+        self.scope = scope
+        self.history = HistoryManager()
+        self.chat = client.aio.chats.create(model=model, config=config, history=[])
+
+    def _rollback(self, history: list[types.Content]) -> None:
+        self.chat = self.client.aio.chats.create(model=self.model, config=self.config, history=history)
+
+    async def _turn_config(self, message) -> Optional[types.GenerateContentConfig]:
+        if self.scope is None:
+            return None
+        return await self.scope.config_for_async(message)
+
+    def _compact_history(self) -> None:
+        # Done after a turn, so the next turn starts from a history within the threshold
+        compacted = self.history.compact(self.chat.get_history())
+        if compacted is not None:
+            self._rollback(compacted)
+
+    def add_exchange(self, prompt: str, answer: str) -> None:
+        """
+        Record a prompt answered without the model, so follow-up questions can refer to it
+
+        Args:
+            prompt (str): User prompt
+            answer (str): Answer given to the user
+        """
+        self._rollback(list(self.chat.get_history()) + [
+            types.Content(role="user", parts=[types.Part(text=prompt)]),
+            types.Content(role="model", parts=[types.Part(text=answer)]),
+        ])
+
+    async def send_message(self, message) -> types.GenerateContentResponse:
+        """
+        Send a user message and resolve all function calls until the model answers
+
+        The results of the last allowed tool round are sent with function
+        calling turned off, so the turn always ends with an answer. If the turn
+        fails or is cancelled the chat history is restored to what it was
+        before the message was sent.
+
+        Args:
+            message: User prompt or content parts
+
+        Returns:
+            types.GenerateContentResponse: Final model response for the turn
+        """
+        history = list(self.chat.get_history())
+        try:
+            config = await self._turn_config(message)
+            response = await self.chat.send_message(message, config=config)
+            for round_number in range(1, MAX_TOOL_ROUNDS + 1):
+                if not response.function_calls:
+                    break
+                parts = await run_function_calls_async(response.function_calls, self.tools)
+                response = await self.chat.send_message(
+                    parts, config=answer_only_config(self.config) if round_number == MAX_TOOL_ROUNDS else config
+                )
+        except BaseException:
+            self._rollback(history)
+            raise
+        self._compact_history()
+        return response
+
+    async def send_message_stream(self, message) -> AsyncIterator[dict[str, Any]]:
+        """
+        Send a user message and stream the turn as events
+
+        Events are dicts with a "type" of "text" (a chunk of the answer),
+        "tool_start" or "tool_end". The results of the last allowed tool round
+        are sent with function calling turned off. If the consumer stops
+        iterating or the turn fails or is cancelled before it finishes, the
+        chat history is restored to what it was before the message was sent.
+
+        Args:
+            message: User prompt or content parts
+
+        Yields:
+            dict[str, Any]: Turn events in the order they happen
+        """
+        history = list(self.chat.get_history())
+        completed = False
+        try:
+            config = await self._turn_config(message)
+            for round_number in range(MAX_TOOL_ROUNDS + 1):
+                last_round = round_number == MAX_TOOL_ROUNDS
+                function_calls = []
+                stream = await self.chat.send_message_stream(
+                    message, config=answer_only_config(self.config) if last_round else config
+                )
+                async for chunk in stream:
+                    function_calls.extend(chunk.function_calls or [])
+                    text = response_text(chunk)
+                    if text:
+                        yield {"type": "text", "text": text}
+                if not function_calls or last_round:
+                    break
+
+                for function_call in function_calls:
+                    yield {"type": "tool_start", "name": function_call.name,
+                           "args": to_jsonable(dict(function_call.args or {}))}
+                responses = [None] * len(function_calls)
+                async for index, response, seconds in iter_function_calls_async(function_calls, self.tools):
+                    responses[index] = response
+                    yield {"type": "tool_end", "name": function_calls[index].name,
+                           "seconds": round(seconds, 3), "error": response.get("error")}
+                message = function_response_parts(function_calls, responses)
+            completed = True
+            self._compact_history()
+        finally:
+            if not completed:
+                self._rollback(history)
+
+
+def create_async_bot(client: Optional[genai.Client] = None) -> AsyncParallelToolChat:
+    """
+    Create an asyncio Gemini-powered bot for monitoring GCP environments
+
+    Args:
+        client (Optional[genai.Client]): GenAI client to share between sessions, created if omitted
+
+    Returns:
+        AsyncParallelToolChat: Async chat instance that can respond to user queries about GCP resources
+    """
+    monitoring_tools = get_monitoring_tools()
+
+    if client is None:
+        client = genai.Client(api_key=os.environ["GENAI_API_KEY"])
+
+    return AsyncParallelToolChat(
+        client, MODEL_NAME, build_chat_config(monitoring_tools), get_async_tools(monitoring_tools),
+        scope=TopicScope(client, MODEL_NAME, monitoring_tools)
+    )
@@ -0,0 +1,81 @@
+"""
+Async variants of the monitoring tools.
+
+Tools backed by an asyncio-native client library (Cloud Monitoring) await it
+directly; every other tool runs its synchronous implementation in a worker
+thread so it never blocks the event loop. Each async tool keeps the name,
+signature and docstring of its synchronous counterpart, and native ones get
+the same result cache and output shaping as the synchronous tools.
+"""
+import asyncio
+import functools
+from typing import Callable
+
+from ..cache import cached_tool
+from ..compute.compute_utils import parse_self_link
+from ..compute.fleet_monitor import fetch_fleet_cpu_async
+from ..compute.metric_store import stored_fleet
+from ..output_shaping import shaped_tool
+
+
+def to_async(func: Callable) -> Callable:
+    """
+    Turn a blocking tool into a coroutine function that runs it in a worker thread
+
+    Args:
+        func (Callable): Blocking tool function
+
+    Returns:
+        Callable: Coroutine function with the same name, signature and docstring
+    """
+    if asyncio.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return wrapper
+
+
+async def monitor_vm(self_link: str) -> dict[str, dict[str, list]]:
+    """
+    Get CPU utilization for last 5 minutes for requested VM
+
+    Args:
+        self_link (str): VM self link
+
+    Returns:
+        dict[str, dict[str, list]]: Mapping of instance name to an object with end_time and value arrays
+    """
+    project_id, _, instance_name = parse_self_link(self_link)
+
+    stored = stored_fleet(project_id, window_minutes=5)
+    fleet = stored[0] if stored is not None else await fetch_fleet_cpu_async(project_id, window_minutes=5)
+    if instance_name not in fleet:
+        return {}
+    series = fleet[instance_name]
+    return {instance_name: {"end_time": series["end_time"], "value": series["value"]}}
+
+
+# Tools with a native async implementation, cached and shaped like get_monitoring_tools()
+_NATIVE_ASYNC_TOOLS = {
+    "monitor_vm": shaped_tool(cached_tool(monitor_vm)),
+}
+
+
+def get_async_tools(tools: list[Callable]) -> list[Callable]:
+    """
+    Get async counterparts for a list of (cached) synchronous tools
+
+    Args:
+        tools (list[Callable]): Synchronous tool functions
+
+    Returns:
+        list[Callable]: Coroutine functions with the same names, in the same order
+    """
+    async_tools = []
+    for tool in tools:
+        native = _NATIVE_ASYNC_TOOLS.get(tool.__name__)
+        async_tools.append(native if native is not None else to_async(tool))
+    return async_tools
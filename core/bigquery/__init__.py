@@ -4,3 +4,8 @@ from .bigquery_utils import (
     get_bigquery_usage_by_day_user,
     get_bytes_loaded_to_dataset
 )
+from .query_planning import (
+    QueryBudgetExceeded,
+    bytes_billed_stats,
+    recent_billed_calls
+)
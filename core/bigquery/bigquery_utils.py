@@ -1,7 +1,13 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Any
 
-from google.cloud import bigquery
+from ..cache.query_cache import bucket_now
+from ..utils.client_pool import get_bigquery_client
+from .query_planning import billed_tool, run_planned_query, scalar_param, split_window
+from .usage_store import usage_by_day_user, usage_by_user
+
+# INFORMATION_SCHEMA results are reused for this long before re-scanning
+JOBS_CACHE_BUCKET_SECONDS = 900
 
 
 def list_datasets(project_id: str) -> list[str]:
@@ -14,12 +20,13 @@ def list_datasets(project_id: str) -> list[str]:
     Returns:
         list[str]: List of dataset names
     """
-    client = bigquery.Client(project=project_id)
+    client = get_bigquery_client(project_id)
 
     datasets = [dataset.reference.dataset_id for dataset in list(client.list_datasets())]
     return datasets
 
 
+@billed_tool
 def get_bigquery_usage_by_user(project_id: str, last_n_days: int) -> list[dict[str, Any]]:
     """
     Get bibytes processed by user email for last n days
@@ -32,30 +39,7 @@ def get_bigquery_usage_by_user(project_id: str, last_n_days: int) -> list[dict[s
     Returns:
         list[dict[str, Any]]: List of objects where each object represents a user
     """
-    client = bigquery.Client(project=project_id)
-
-    end_time = datetime.now()
-    start_time = end_time - timedelta(days=last_n_days)
-
-    query = f"""
-        SELECT
-            user_email,
-            COUNT(*) AS job_count,
-            SUM(total_bytes_processed) AS total_bytes_processed
-        FROM
-            `{project_id}.region-us.INFORMATION_SCHEMA.JOBS_BY_PROJECT`
-        WHERE
-            DATETIME(creation_time, 'America/Toronto') BETWEEN DATETIME('{start_time.isoformat()}') AND DATETIME('{end_time.isoformat()}')
-            AND state = 'DONE'
-            AND job_type = 'QUERY'
-        GROUP BY
-            user_email
-        ORDER BY
-            total_bytes_processed DESC
-    """
-
-    query_job = client.query(query)
-    results = query_job.result()
+    results = usage_by_user(project_id, last_n_days)
 
     usage_stats = []
     for row in results:
@@ -69,6 +53,7 @@ def get_bigquery_usage_by_user(project_id: str, last_n_days: int) -> list[dict[s
     return usage_stats
 
 
+@billed_tool
 def get_bigquery_usage_by_day_user(project_id: str, last_n_days: int) -> list[dict[str, Any]]:
     """
     Get bigquery bytes processed by day by user for last n days
@@ -80,36 +65,12 @@ def get_bigquery_usage_by_day_user(project_id: str, last_n_days: int) -> list[di
     Returns:
         list[dict[str, Any]]: List of objects where each object represents a user
     """
-    client = bigquery.Client(project=project_id)
-
-    end_time = datetime.now()
-    start_time = end_time - timedelta(days=last_n_days)
-
-    query = f"""
-        SELECT
-            DATETIME(creation_time, 'America/Toronto') AS creation_time,
-            user_email,
-            COUNT(*) AS job_count,
-            SUM(total_bytes_processed) AS total_bytes_processed
-        FROM
-            `{project_id}.region-us.INFORMATION_SCHEMA.JOBS_BY_PROJECT`
-        WHERE
-            DATETIME(creation_time, 'America/Toronto') BETWEEN DATETIME('{start_time.isoformat()}') AND DATETIME('{end_time.isoformat()}')
-            AND state = 'DONE'
-            AND job_type = 'QUERY'
-        GROUP BY
-            DATETIME(creation_time, 'America/Toronto'), user_email
-        ORDER BY
-            creation_time ASC
-    """
-
-    query_job = client.query(query)
-    results = query_job.result()
+    results = usage_by_day_user(project_id, last_n_days)
 
     usage_stats = []
     for row in results:
         usage_stats.append({
-            "date": row["creation_time"],
+            "date": row["date"],
             "user_email": row["user_email"],
             "job_count": row["job_count"],
             "total_bytes_processed": row["total_bytes_processed"]
@@ -118,6 +79,7 @@ def get_bigquery_usage_by_day_user(project_id: str, last_n_days: int) -> list[di
     return usage_stats
 
 
+@billed_tool
 def get_bytes_loaded_to_dataset(project_id: str, dataset_name: str, last_n_days: int) -> list[dict[str, Any]]:
     """
     Get number of bytes loaded into a dataset through load job for last n days, does not include data loaded using CREATE TABLE AS SELECT (CTAS) or INSERT INTO statements.
@@ -130,11 +92,12 @@ def get_bytes_loaded_to_dataset(project_id: str, dataset_name: str, last_n_days:
     Returns:
         list[dict[str, Any]]: List of objects each object representing bytes loaded by a user on a date
     """
-    client = bigquery.Client(project=project_id)
+    client = get_bigquery_client(project_id)
 
-    end_time = datetime.now()
+    end_time = bucket_now(JOBS_CACHE_BUCKET_SECONDS).astimezone()
     start_time = end_time - timedelta(days=last_n_days)
 
+    # Compare the raw partitioning column so BigQuery can prune partitions
     query = f"""
         SELECT
             DATETIME(creation_time, 'America/Toronto') AS creation_time,
@@ -142,16 +105,22 @@ def get_bytes_loaded_to_dataset(project_id: str, dataset_name: str, last_n_days:
         FROM
             `{project_id}.region-us.INFORMATION_SCHEMA.JOBS_BY_PROJECT`
         WHERE
-            DATETIME(creation_time, 'America/Toronto') BETWEEN DATETIME('{start_time.isoformat()}') AND DATETIME('{end_time.isoformat()}')
+            creation_time >= @start_time
+            AND creation_time < @end_time
             AND state = 'DONE'
             AND job_type = 'LOAD'
-            AND destination_table.dataset_id = '{dataset_name}'
+            AND destination_table.dataset_id = @dataset_name
         GROUP BY DATETIME(creation_time, 'America/Toronto')
         ORDER BY creation_time ASC
     """
-
-    query_job = client.query(query)
-    results = query_job.result()
+    params = [
+        scalar_param("start_time", start_time),
+        scalar_param("end_time", end_time),
+        scalar_param("dataset_name", dataset_name),
+    ]
+
+    # Rows are grouped by job time, so a window above the budget can be fetched as narrower windows
+    results = run_planned_query(client, query, params, JOBS_CACHE_BUCKET_SECONDS, split=split_window())
 
     data_loaded = []
     for row in results:
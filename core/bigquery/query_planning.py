@@ -0,0 +1,369 @@
+"""
+Query planning and byte guardrails for BigQuery tools.
+
+Every tool query goes through `run_query`, which:
+
+- binds values as query parameters instead of interpolating them into the SQL,
+  so the query text is stable and BigQuery's own result cache can serve it;
+- dry-runs the query first and, when the estimated scan exceeds the byte
+  budget (`BQ_MAX_BYTES_PER_QUERY`), splits its time window into narrower
+  windows that each fit, refusing it only when a window cannot be narrowed
+  further; every job also sets `maximum_bytes_billed` so BigQuery enforces
+  the budget server-side;
+- records bytes processed and billed in a per-tool ledger and per tool call;
+- downloads large results as Arrow through the BigQuery Storage Read API
+  instead of paging through them row by row.
+
+Tools opt into attribution with the `billed_tool` decorator; queries made while
+a tool runs are charged to it and to that call, and the most recent calls are
+kept with their own byte counts.
+
+Splitting is opt-in with `split_window`, and only exact for queries whose rows
+are grouped by a key inside the window (a day, a job timestamp), so that the
+rows of disjoint windows simply add up.
+"""
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence
+
+from ..cache.query_cache import DEFAULT_BUCKET_SECONDS, run_cached_query
+
+MAX_BYTES_PER_QUERY = int(os.environ.get("BQ_MAX_BYTES_PER_QUERY", str(50 * 1024 ** 3)))
+# Results with at least this many rows are downloaded as Arrow through the Storage Read API
+ARROW_MIN_ROWS = int(os.environ.get("BQ_ARROW_MIN_ROWS", "5000"))
+# Number of recent tool calls kept with their own byte counts
+RECENT_CALLS = int(os.environ.get("BQ_RECENT_CALLS", "100"))
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery
+
+_current_tool = contextvars.ContextVar("bigquery_tool", default="unattributed")
+_current_call: contextvars.ContextVar[Optional[dict[str, Any]]] = contextvars.ContextVar(
+    "bigquery_call", default=None)
+_ledger: dict[str, dict[str, int]] = {}
+_recent_calls: deque = deque(maxlen=RECENT_CALLS)
+_ledger_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a query's dry-run estimate is above the byte budget
+    """
+
+
+def _new_counters() -> dict[str, int]:
+    return {
+        "queries": 0, "split_queries": 0, "refused": 0, "bigquery_cache_hits": 0,
+        "bytes_estimated": 0, "bytes_processed": 0, "bytes_billed": 0,
+    }
+
+
+def _record(tool_name: str, **increments: int) -> None:
+    call = _current_call.get()
+    with _ledger_lock:
+        entry = _ledger.setdefault(tool_name, {"calls": 0, "max_bytes_billed_per_call": 0, **_new_counters()})
+        for name, value in increments.items():
+            entry[name] += value
+            if call is not None and name in call:
+                call[name] += value
+
+
+def billed_tool(func: Callable) -> Callable:
+    """
+    Charge the BigQuery bytes of queries run by a tool to that tool
+
+    Args:
+        func (Callable): Tool function
+
+    Returns:
+        Callable: Tool function with the same name, signature and docstring
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _record(func.__name__, calls=1)
+        call = {"tool": func.__name__, "started_at": time.time(), **_new_counters()}
+        tool_token = _current_tool.set(func.__name__)
+        call_token = _current_call.set(call)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_call.reset(call_token)
+            _current_tool.reset(tool_token)
+            call["seconds"] = round(time.time() - call["started_at"], 3)
+            with _ledger_lock:
+                entry = _ledger[func.__name__]
+                entry["max_bytes_billed_per_call"] = max(entry["max_bytes_billed_per_call"], call["bytes_billed"])
+                _recent_calls.append(call)
+
+    return wrapper
+
+
+def bytes_billed_stats() -> dict[str, dict[str, int]]:
+    """
+    Get the per-tool BigQuery ledger of this process
+
+    Returns:
+        dict[str, dict[str, int]]: Calls, queries, split and refused queries, BigQuery cache hits,
+            bytes and the largest bill of a single call per tool
+    """
+    with _ledger_lock:
+        return {tool_name: dict(entry) for tool_name, entry in _ledger.items()}
+
+
+def recent_billed_calls(limit: int = 20) -> list[dict[str, Any]]:
+    """
+    Get the BigQuery cost of the most recent tool calls, newest first
+
+    Args:
+        limit (int): Maximum number of calls returned
+
+    Returns:
+        list[dict[str, Any]]: Tool name, start time, duration, queries and bytes of each call
+    """
+    with _ledger_lock:
+        return [dict(call) for call in list(_recent_calls)[::-1][:limit]]
+
+
+def scalar_param(name: str, value: Any) -> "bigquery.ScalarQueryParameter":
+    """
+    Build a scalar query parameter, inferring its type from the Python value
+
+    Args:
+        name (str): Parameter name, referenced as @name in the query
+        value (Any): Parameter value
+
+    Returns:
+        bigquery.ScalarQueryParameter: Query parameter
+    """
+    from google.cloud import bigquery
+
+    if isinstance(value, bool):
+        type_ = "BOOL"
+    elif isinstance(value, int):
+        type_ = "INT64"
+    elif isinstance(value, float):
+        type_ = "FLOAT64"
+    elif isinstance(value, datetime):
+        type_ = "TIMESTAMP" if value.tzinfo is not None else "DATETIME"
+    elif isinstance(value, date):
+        type_ = "DATE"
+    else:
+        type_ = "STRING"
+    return bigquery.ScalarQueryParameter(name, type_, value)
+
+
+def split_window(start_param: str = "start_time", end_param: str = "end_time",
+                 min_window: timedelta = timedelta(days=1)) -> Callable[[Sequence], Optional[list[list]]]:
+    """
+    Build a splitter that cuts a query's [start, end) window into two halves
+
+    The query must select rows with `>= @start` and `< @end` on both bounds, so
+    the halves neither overlap nor leave a gap.
+
+    Args:
+        start_param (str): Name of the inclusive start parameter
+        end_param (str): Name of the exclusive end parameter
+        min_window (timedelta): Shortest window, and the step the halves are cut on
+
+    Returns:
+        Callable[[Sequence], Optional[list[list]]]: Splitter for the `split` argument of the run functions,
+            returning None when the window cannot be narrowed further
+    """
+    def split(params: Sequence) -> Optional[list[list]]:
+        values = {param.name: param.value for param in params}
+        start, end = values[start_param], values[end_param]
+        steps = (end - start) // min_window
+        if steps < 2:
+            return None
+        # Cut on a whole number of steps from the start, so day-aligned windows stay day-aligned
+        middle = start + min_window * (steps // 2)
+
+        def with_window(window_start, window_end) -> list:
+            bounds = {start_param: window_start, end_param: window_end}
+            return [scalar_param(param.name, bounds[param.name]) if param.name in bounds else param
+                    for param in params]
+
+        return [with_window(start, middle), with_window(middle, end)]
+
+    return split
+
+
+def estimate_bytes(client: "bigquery.Client", query: str, params: Sequence = ()) -> int:
+    """
+    Estimate the bytes a query would scan with a dry run
+
+    Args:
+        client (bigquery.Client): BigQuery client
+        query (str): Standard SQL query
+        params (Sequence): Query parameters
+
+    Returns:
+        int: Estimated bytes processed
+    """
+    from google.cloud import bigquery
+
+    job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False, query_parameters=list(params))
+    return client.query(query, job_config=job_config).total_bytes_processed or 0
+
+
+def _plan(client: "bigquery.Client", query: str, params: Sequence, max_bytes: int,
+          split: Optional[Callable[[Sequence], Optional[list[list]]]]) -> list[tuple[Sequence, int]]:
+    """
+    Dry-run a query and narrow its window until every piece fits the budget
+
+    Returns:
+        list[tuple[Sequence, int]]: Parameters and estimate of each piece, in window order
+    """
+    estimate = estimate_bytes(client, query, params)
+    if estimate <= max_bytes:
+        return [(params, estimate)]
+
+    pieces = split(params) if split is not None else None
+    if not pieces:
+        _record(_current_tool.get(), refused=1, bytes_estimated=estimate)
+        raise QueryBudgetExceeded(
+            f"Query would scan {estimate / 1024 ** 3:.1f} GiB, above the "
+            f"{max_bytes / 1024 ** 3:.1f} GiB budget; narrow the time window"
+        )
+
+    _record(_current_tool.get(), split_queries=len(pieces) - 1)
+    return [planned for piece in pieces for planned in _plan(client, query, piece, max_bytes, split)]
+
+
+def _run_job(client: "bigquery.Client", query: str, params: Sequence, max_bytes: int,
+             estimate: int) -> tuple["bigquery.QueryJob", "bigquery.table.RowIterator"]:
+    """
+    Run a planned query, wait for it and record its cost
+    """
+    from google.cloud import bigquery
+
+    job_config = bigquery.QueryJobConfig(query_parameters=list(params), maximum_bytes_billed=max_bytes)
+    query_job = client.query(query, job_config=job_config)
+    row_iterator = query_job.result()
+
+    _record(
+        _current_tool.get(), queries=1, bytes_estimated=estimate,
+        bytes_processed=query_job.total_bytes_processed or 0,
+        bytes_billed=query_job.total_bytes_billed or 0,
+        bigquery_cache_hits=1 if query_job.cache_hit else 0,
+    )
+    return query_job, row_iterator
+
+
+def _run_jobs(client: "bigquery.Client", query: str, params: Sequence, max_bytes: Optional[int],
+              split: Optional[Callable]) -> list[tuple["bigquery.QueryJob", "bigquery.table.RowIterator"]]:
+    """
+    Plan a query within the budget, then run each of its pieces
+    """
+    max_bytes = MAX_BYTES_PER_QUERY if max_bytes is None else max_bytes
+    # Every piece is planned before any runs, so a refused piece bills nothing
+    plan = _plan(client, query, params, max_bytes, split)
+    return [_run_job(client, query, piece, max_bytes, estimate) for piece, estimate in plan]
+
+
+def fetch_arrow(row_iterator: "bigquery.table.RowIterator"):
+    """
+    Download a query result as an Arrow table
+
+    Results of at least `ARROW_MIN_ROWS` rows are read in parallel streams
+    through the BigQuery Storage Read API; smaller ones use the REST pages,
+    where starting a read session would cost more than it saves.
+
+    Args:
+        row_iterator (bigquery.table.RowIterator): Result of a finished query job
+
+    Returns:
+        pyarrow.Table: Columnar result
+    """
+    use_storage_api = (row_iterator.total_rows or 0) >= ARROW_MIN_ROWS
+    return row_iterator.to_arrow(create_bqstorage_client=use_storage_api)
+
+
+def run_query(client: "bigquery.Client", query: str, params: Sequence = (),
+              max_bytes: Optional[int] = None,
+              split: Optional[Callable] = None) -> tuple[list[dict[str, Any]], int]:
+    """
+    Run a parameterized query within the byte budget and record its cost
+
+    Args:
+        client (bigquery.Client): BigQuery client
+        query (str): Standard SQL query using @name parameters
+        params (Sequence): Query parameters
+        max_bytes (Optional[int]): Byte budget per query, defaults to BQ_MAX_BYTES_PER_QUERY
+        split (Optional[Callable]): Splitter from `split_window`, used to narrow the window of a query
+            above the budget instead of refusing it
+
+    Returns:
+        tuple[list[dict[str, Any]], int]: Result rows as dictionaries and bytes processed
+
+    Raises:
+        QueryBudgetExceeded: If the dry-run estimate is above the budget and the window cannot be narrowed
+    """
+    rows = []
+    bytes_processed = 0
+    for query_job, row_iterator in _run_jobs(client, query, params, max_bytes, split):
+        if (row_iterator.total_rows or 0) >= ARROW_MIN_ROWS:
+            # Converting whole Arrow columns is much faster than building Row objects page by page
+            rows.extend(fetch_arrow(row_iterator).to_pylist())
+        else:
+            rows.extend(dict(row.items()) for row in row_iterator)
+        bytes_processed += query_job.total_bytes_processed or 0
+    return rows, bytes_processed
+
+
+def run_query_arrow(client: "bigquery.Client", query: str, params: Sequence = (),
+                    max_bytes: Optional[int] = None, split: Optional[Callable] = None):
+    """
+    Run a parameterized query within the byte budget and return its result as columns
+
+    Args:
+        client (bigquery.Client): BigQuery client
+        query (str): Standard SQL query using @name parameters
+        params (Sequence): Query parameters
+        max_bytes (Optional[int]): Byte budget per query, defaults to BQ_MAX_BYTES_PER_QUERY
+        split (Optional[Callable]): Splitter from `split_window`, used to narrow the window of a query
+            above the budget instead of refusing it
+
+    Returns:
+        pyarrow.Table: Columnar result
+
+    Raises:
+        QueryBudgetExceeded: If the dry-run estimate is above the budget and the window cannot be narrowed
+    """
+    tables = [fetch_arrow(row_iterator) for _, row_iterator in _run_jobs(client, query, params, max_bytes, split)]
+    # Empty pieces add nothing and may come back without column types
+    tables = [table for table in tables if table.num_rows] or tables[:1]
+    if len(tables) == 1:
+        return tables[0]
+
+    import pyarrow as pa
+    return pa.concat_tables(tables)
+
+
+def run_planned_query(client: "bigquery.Client", query: str, params: Sequence = (),
+                      bucket_seconds: int = DEFAULT_BUCKET_SECONDS,
+                      max_bytes: Optional[int] = None, split: Optional[Callable] = None) -> list[dict[str, Any]]:
+    """
+    Run a parameterized, budget-checked query through the persistent query cache
+
+    Args:
+        client (bigquery.Client): BigQuery client
+        query (str): Standard SQL query using @name parameters
+        params (Sequence): Query parameters, part of the cache key
+        bucket_seconds (int): Length of the time bucket the result stays valid for
+        max_bytes (Optional[int]): Byte budget per query, defaults to BQ_MAX_BYTES_PER_QUERY
+        split (Optional[Callable]): Splitter from `split_window`, used to narrow the window of a query
+            above the budget instead of refusing it
+
+    Returns:
+        list[dict[str, Any]]: Result rows as dictionaries
+    """
+    return run_cached_query(
+        client, query, bucket_seconds, params=params,
+        execute=lambda: run_query(client, query, params, max_bytes, split)
+    )
@@ -0,0 +1,269 @@
+"""
+Incremental, day-partitioned store of BigQuery query usage.
+
+Per-day, per-user aggregates (job count and bytes processed) from
+`INFORMATION_SCHEMA.JOBS_BY_PROJECT` are materialized into a local SQLite
+database. A request for any window only scans BigQuery for days that are not
+materialized yet, plus days materialized before they settled (SETTLING_DAYS
+after the day ended), whose numbers could still change, so repeated and widening-window questions are
+answered locally without scanning.
+"""
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from ..cache.query_cache import cache_connection, cache_lock
+from ..utils.client_pool import get_bigquery_client
+from .query_planning import run_query_arrow, scalar_param, split_window
+
+USAGE_TIMEZONE = "America/Toronto"
+JOBS_REGION = "region-us"
+
+# Days this close to today are re-materialized because late jobs can still land
+SETTLING_DAYS = int(os.environ.get("BQ_USAGE_SETTLING_DAYS", "1"))
+# How long a materialized settling day is trusted before it is refreshed
+SETTLING_REFRESH_SECONDS = int(os.environ.get("BQ_USAGE_SETTLING_REFRESH_SECONDS", "900"))
+
+_DB_FILE_NAME = "bigquery_usage.sqlite3"
+
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS user_daily_usage (
+        project_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        user_email TEXT NOT NULL,
+        job_count INTEGER NOT NULL,
+        total_bytes_processed INTEGER NOT NULL,
+        PRIMARY KEY (project_id, day, user_email)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS materialized_days (
+        project_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        materialized_at REAL NOT NULL,
+        PRIMARY KEY (project_id, day)
+    )
+    """,
+)
+
+
+def _connect() -> sqlite3.Connection:
+    return cache_connection(_DB_FILE_NAME, _SCHEMA)
+
+
+def usage_today() -> date:
+    """
+    Get today's date in the timezone usage is bucketed by
+
+    Returns:
+        date: Current date in the usage timezone
+    """
+    return datetime.now(ZoneInfo(USAGE_TIMEZONE)).date()
+
+
+def settles_at(day: date) -> float:
+    """
+    Get when a day's usage stops changing: the end of the day plus SETTLING_DAYS, in the usage timezone
+
+    Args:
+        day (date): Usage day
+
+    Returns:
+        float: Unix timestamp
+    """
+    settled = datetime.combine(day + timedelta(days=1 + SETTLING_DAYS), datetime.min.time(), ZoneInfo(USAGE_TIMEZONE))
+    return settled.timestamp()
+
+
+def _days_to_refresh(connection: sqlite3.Connection, project_id: str, start_day: date, end_day: date) -> list[date]:
+    """
+    Find days in a window that are missing, or were materialized before they settled and are now
+    settled or stale
+    """
+    materialized = dict(connection.execute(
+        "SELECT day, materialized_at FROM materialized_days WHERE project_id = ? AND day BETWEEN ? AND ?",
+        (project_id, start_day.isoformat(), end_day.isoformat())
+    ).fetchall())
+
+    now = time.time()
+    stale_before = now - SETTLING_REFRESH_SECONDS
+
+    days = []
+    day = start_day
+    while day <= end_day:
+        materialized_at = materialized.get(day.isoformat())
+        settled = settles_at(day)
+        # A day fetched before it settled holds partial totals until fetched again, however long ago that was
+        if materialized_at is None or (
+                materialized_at < settled and (now >= settled or materialized_at < stale_before)):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def _contiguous_ranges(days: list[date]) -> list[tuple[date, date]]:
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] + timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def build_usage_query(project_id: str, start_day: date, end_day: date) -> tuple[str, list]:
+    """
+    Build the per-day, per-user usage query for an inclusive day range
+
+    Args:
+        project_id (str): BigQuery project ID
+        start_day (date): First day of the range
+        end_day (date): Last day of the range
+
+    Returns:
+        tuple[str, list]: Standard SQL query and its parameters
+    """
+    zone = ZoneInfo(USAGE_TIMEZONE)
+
+    query = f"""
+        SELECT
+            DATE(creation_time, '{USAGE_TIMEZONE}') AS day,
+            user_email,
+            COUNT(*) AS job_count,
+            SUM(total_bytes_processed) AS total_bytes_processed
+        FROM
+            `{project_id}.{JOBS_REGION}.INFORMATION_SCHEMA.JOBS_BY_PROJECT`
+        WHERE
+            creation_time >= @start_time
+            AND creation_time < @end_time
+            AND state = 'DONE'
+            AND job_type = 'QUERY'
+        GROUP BY
+            day, user_email
+    """
+    params = [
+        scalar_param("start_time", datetime.combine(start_day, datetime.min.time(), zone)),
+        scalar_param("end_time", datetime.combine(end_day + timedelta(days=1), datetime.min.time(), zone)),
+    ]
+    return query, params
+
+
+def _fetch_range(project_id: str, start_day: date, end_day: date) -> list[tuple[str, str, int, int]]:
+    """
+    Scan JOBS_BY_PROJECT for per-day, per-user usage in an inclusive day range
+    """
+    query, params = build_usage_query(project_id, start_day, end_day)
+
+    # Kept columnar until the final tuples for SQLite, one conversion per column
+    # Rows are grouped by day, so a range above the budget can be fetched as narrower day-aligned ranges
+    table = run_query_arrow(get_bigquery_client(project_id), query, params, split=split_window())
+    days = [day.isoformat() for day in table.column("day").to_pylist()]
+    total_bytes = table.column("total_bytes_processed").fill_null(0).to_pylist()
+    return list(zip(days, table.column("user_email").to_pylist(), table.column("job_count").to_pylist(), total_bytes))
+
+
+def materialize_usage(project_id: str, start_day: date, end_day: date) -> int:
+    """
+    Make sure per-day usage for an inclusive day range is materialized locally
+
+    Args:
+        project_id (str): BigQuery project ID
+        start_day (date): First day of the window
+        end_day (date): Last day of the window
+
+    Returns:
+        int: Number of days that had to be fetched from BigQuery
+    """
+    with cache_lock(f"bigquery-usage-{project_id}"):
+        with _connect() as connection:
+            days = _days_to_refresh(connection, project_id, start_day, end_day)
+
+        for range_start, range_end in _contiguous_ranges(days):
+            rows = _fetch_range(project_id, range_start, range_end)
+            range_days = [(range_start + timedelta(days=i)).isoformat()
+                          for i in range((range_end - range_start).days + 1)]
+
+            with _connect() as connection:
+                connection.execute(
+                    "DELETE FROM user_daily_usage WHERE project_id = ? AND day BETWEEN ? AND ?",
+                    (project_id, range_start.isoformat(), range_end.isoformat())
+                )
+                connection.executemany(
+                    "INSERT INTO user_daily_usage (project_id, day, user_email, job_count, total_bytes_processed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(project_id, *row) for row in rows]
+                )
+                now = time.time()
+                connection.executemany(
+                    "INSERT OR REPLACE INTO materialized_days (project_id, day, materialized_at) VALUES (?, ?, ?)",
+                    [(project_id, day, now) for day in range_days]
+                )
+
+        return len(days)
+
+
+def _window(last_n_days: int) -> tuple[date, date]:
+    end_day = usage_today()
+    return end_day - timedelta(days=last_n_days), end_day
+
+
+def usage_by_user(project_id: str, last_n_days: int) -> list[dict[str, Any]]:
+    """
+    Get job count and bytes processed per user for the last n days
+
+    Args:
+        project_id (str): BigQuery project ID
+        last_n_days (int): Number of days in past to aggregate
+
+    Returns:
+        list[dict[str, Any]]: Per-user totals ordered by bytes processed, largest first
+    """
+    start_day, end_day = _window(last_n_days)
+    materialize_usage(project_id, start_day, end_day)
+
+    with _connect() as connection:
+        rows = connection.execute("""
+            SELECT user_email, SUM(job_count), SUM(total_bytes_processed) AS total_bytes_processed
+            FROM user_daily_usage
+            WHERE project_id = ? AND day BETWEEN ? AND ?
+            GROUP BY user_email
+            ORDER BY total_bytes_processed DESC
+        """, (project_id, start_day.isoformat(), end_day.isoformat())).fetchall()
+
+    return [
+        {"user_email": user_email, "job_count": job_count, "total_bytes_processed": total_bytes_processed}
+        for user_email, job_count, total_bytes_processed in rows
+    ]
+
+
+def usage_by_day_user(project_id: str, last_n_days: int) -> list[dict[str, Any]]:
+    """
+    Get job count and bytes processed per day per user for the last n days
+
+    Args:
+        project_id (str): BigQuery project ID
+        last_n_days (int): Number of days in past to return
+
+    Returns:
+        list[dict[str, Any]]: Per-day, per-user rows ordered by day
+    """
+    start_day, end_day = _window(last_n_days)
+    materialize_usage(project_id, start_day, end_day)
+
+    with _connect() as connection:
+        rows = connection.execute("""
+            SELECT day, user_email, job_count, total_bytes_processed
+            FROM user_daily_usage
+            WHERE project_id = ? AND day BETWEEN ? AND ?
+            ORDER BY day ASC, total_bytes_processed DESC
+        """, (project_id, start_day.isoformat(), end_day.isoformat())).fetchall()
+
+    return [
+        {"date": day, "user_email": user_email, "job_count": job_count, "total_bytes_processed": total_bytes_processed}
+        for day, user_email, job_count, total_bytes_processed in rows
+    ]
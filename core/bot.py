@@ -1,8 +1,7 @@
 import os
 
-from google import genai
-from google.genai import types
-
+from .cache import cached_tool
+from .output_shaping import shaped_tool
 from .bigquery import (
     list_datasets,
     get_bigquery_usage_by_user,
@@ -12,141 +11,72 @@ from .bigquery import (
 from .cloud_run import (
     list_cloud_run_jobs,
     get_job_executions,
+    get_cloud_run_jobs_health,
     get_cloud_run_job_execution_logs
 )
 from .compute import (
     list_vms,
     describe_vm,
-    monitor_vm
+    monitor_vm,
+    monitor_fleet_cpu,
+    analyze_vm_cpu,
+    get_vm_cpu_history
 )
+from .name_index import resolve_resource
 from .service_accounts import list_custom_service_accounts
 from .cost_monitoring import (
     get_current_month_costs,
     get_cost_by_service,
     get_cost_trends,
     get_resource_costs,
+    get_cost_breakdown,
 )
 
 
-def create_bot():
+MODEL_NAME = "gemini-2.0-flash"
+
+
+def get_monitoring_tools() -> list:
     """
-    Create a Gemini-powered bot for monitoring GCP environments
+    Get the tool functions exposed to Gemini, wrapped with the result cache and
+    shaped to their token budget
 
     Returns:
-        Chat instance that can respond to user queries about GCP resources
+        list: Tool functions
     """
-    monitoring_tools = [
-        list_vms, describe_vm, monitor_vm,
+    return [shaped_tool(cached_tool(tool)) for tool in [
+        list_vms, describe_vm, monitor_vm, monitor_fleet_cpu, analyze_vm_cpu, get_vm_cpu_history,
         list_datasets, get_bigquery_usage_by_user, get_bytes_loaded_to_dataset,
         get_bigquery_usage_by_day_user,
-        list_cloud_run_jobs, get_job_executions, get_cloud_run_job_execution_logs,
-        list_custom_service_accounts,
+        list_cloud_run_jobs, get_job_executions, get_cloud_run_jobs_health, get_cloud_run_job_execution_logs,
+        list_custom_service_accounts, resolve_resource,
         get_current_month_costs, get_cost_by_service, get_cost_trends,
-        get_resource_costs
-    ]
-
-    instruction = f"""
-    You are a helpful, knowledgeable, and tool-aware assistant integrated with an organization's Google Cloud Platform (GCP) environment.  
-    Your primary responsibility is to assist a DevOps executive in monitoring and managing cloud infrastructure — especially virtual machines (VMs), the BigQuery data warehouse, and cost management.
-
-    You can access and invoke specific tools connected to the GCP account. When a user asks a question, you will:
-
-    1. **Interpret the query carefully.**  
-    2. **Select the appropriate tool(s)** based on the available documentation and the intent of the question.  
-    3. **Chain tool calls** if needed — some tasks may require multiple steps to gather all relevant data.  
-    4. **Return a clear and informative response** based on the tool outputs, summarized in natural language.  
-    5. **Convert bytes to GB** when replying to BigQuery data usage questions.  
-    6. **Calculate BigQuery cost in dollars** based on a rate of **$5.00 per TB**.
-    7. **Provide cost insights and alerts** when analyzing spending patterns.
-
-    ---
-
-
-    - **`list_vms`**: Use this to retrieve a list of currently active virtual machines in the environment.  
-    - **`describe_vm`**: Use this to fetch detailed metadata about a specific VM, including its configuration and status.  
-    - **`monitor_vm`**: Use this to access CPU utilization monitoring metrics for the last 5 minutes for a given VM.  
-    - **`list_datasets`**: Use this to list all datasets in BigQuery.  
-    - **`get_bigquery_usage_by_user`**: Use this to retrieve BigQuery bytes processed by each user over the last *n* days.  
-    - **`get_bigquery_usage_by_day_user`**: Use this to retrieve daily BigQuery bytes processed per user for the last *n* days.  
-    - **`get_data_loaded_to_dataset`**: Use this to retrieve bytes loaded into each dataset per day for the last *n* days.  
-    - **`list_cloud_run_jobs`**: Use this to list all Cloud Run jobs in the project.  
-    - **`get_job_executions`**: Use this to get all executions for a Cloud Run job in the project.  
-    - **`get_cloud_run_job_execution_logs`**: Use this to get logs (timestamp, severity, and message) of a Cloud Run job execution.  
-    - **`list_custom_service_accounts`**: Use this to list all custom-created service accounts.
-
-    **Cost Monitoring Tools:**
-    - **`get_current_month_costs`**: Use this to get current month's total costs and billing information.
-    - **`get_cost_by_service`**: Use this to get cost breakdown by GCP service (Compute, BigQuery, Storage, etc.).
-    - **`get_cost_trends`**: Use this to get daily cost trends over a specified period.
-    - **`get_resource_costs`**: Use this to get cost breakdown by specific resource types (VMs, storage, etc.).
-
-    ---
+        get_resource_costs, get_cost_breakdown
+    ]]
 
-    **Cost Analysis Guidelines:**
-    - Always provide cost context when discussing resources
-    - Use dollar amounts and percentages for cost insights
-    - Show cost breakdowns by service and resource type
 
-    ---
-
-    When the user refers to a person, dataset, job, or other cloud resource using **partial, informal, or ambiguous names**, follow these steps to resolve the reference:
-
-    1. Perform **fuzzy matching** against all relevant resource names.  
-    2. If **exactly one match** is found, confidently proceed using that match.  
-    3. If **multiple plausible matches** are found:
-       - Present a **numbered list** of the matched items.
-       - Prompt the user to select one before proceeding.  
-    4. If **no reasonable match** is found:
-       - Clearly inform the user.
-       - Offer to list all available options of that resource type.  
-    5. **Matching Rules**:
-       - Normalize user input:
-         - Convert to lowercase
-         - Replace spaces with dashes
-         - Remove words like "job" or "execution"
-       - Fuzzy match against known job names
-       - Build candidate matches using the naming pattern
-
-
-    **Example 1: User references an account name**
-
-    > **User:** *"Give me BigQuery usage for client1 account"*  
-    > **→ Matches:**  
-    > - `client1@project.iam.gserviceaccount.com`  
-    > - `client1-reports@project.iam.gserviceaccount.com`  
-    >
-    > **Response:**
-    > ```
-    > Multiple users matched 'client1':
-    > [1] client1@project.iam.gserviceaccount.com  
-    > [2] client1-reports@project.iam.gserviceaccount.com  
-    > Please select one to continue.
-    > ```
-
-    ---
+def create_bot():
+    """
+    Create a Gemini-powered bot for monitoring GCP environments
 
+    Independent function calls returned in one model response are executed
+    concurrently, and each turn only declares the tools of the topics the
+    conversation is about.
 
-    1. **Project Number**: {os.environ['GCP_PROJECT_NUMBER']}  
-    2. **Project ID**: {os.environ['GCP_PROJECT_ID']}  
-    3. **Region Name**: {os.environ['GCP_REGION']}  
-    4. **Zone Name**: {os.environ['GCP_ZONE']}
+    Returns:
+        ParallelToolChat: Chat instance that can respond to user queries about GCP resources
+    """
+    # The GenAI SDK is only needed once a chat is created, not to build the tool list or the router
+    from google import genai
 
-    ---
+    from .prompt import TopicScope, build_chat_config
+    from .tool_dispatch import ParallelToolChat
 
-    Stay concise, accurate, and proactive in your assistance. If the user's question can't be answered with the available tools, explain the limitation and suggest alternative ways forward.  
-    For table output, ensure the columns are aligned using spaces for readability. Use fixed-width formatting like in GitHub-flavored Markdown.
-    For list output, use a numbered list format.
-    For tool failures, provide a clear error message and suggest possible next steps.
-    """
+    monitoring_tools = get_monitoring_tools()
 
     client = genai.Client(api_key=os.environ["GENAI_API_KEY"])
 
-    bot = client.chats.create(
-        model="gemini-2.0-flash",
-        config=types.GenerateContentConfig(
-            system_instruction=instruction,
-            tools=monitoring_tools,
-        ),
-        history=[]
+    return ParallelToolChat(
+        client, MODEL_NAME, build_chat_config(monitoring_tools), monitoring_tools,
+        scope=TopicScope(client, MODEL_NAME, monitoring_tools)
     )
-    return bot
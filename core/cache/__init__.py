@@ -0,0 +1,11 @@
+from .result_cache import (
+    cached_tool,
+    invalidate,
+    cache_stats,
+    TOOL_TTL_SECONDS
+)
+from .query_cache import (
+    run_cached_query,
+    query_cache_stats,
+    clear_query_cache
+)
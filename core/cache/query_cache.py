@@ -0,0 +1,265 @@
+"""
+Persistent on-disk cache for BigQuery query results.
+
+Results are stored in a SQLite database under a configurable directory
+(`GCP_OPS_BOT_CACHE_DIR`, default `~/.cache/gcp-ops-bot`) and keyed by a hash of
+the query text plus a time bucket, so they survive restarts and expire when the
+bucket rolls over. Each thread keeps one connection per database, whose tables
+are created once per process. Misses take a per-query file lock, so concurrent
+bot processes asking the same question run the query only once. The cache keeps a
+running total of the bytes BigQuery did not have to scan thanks to cache hits.
+"""
+import base64
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+DEFAULT_BUCKET_SECONDS = 3600
+CACHE_DIR_ENV = "GCP_OPS_BOT_CACHE_DIR"
+
+_DB_FILE_NAME = "query_cache.sqlite3"
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS query_results (
+        cache_key TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL,
+        bytes_processed INTEGER NOT NULL,
+        rows TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS query_stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+)
+# Named locks map onto this many thread locks, reentrant since a holder may take another name on the same stripe
+LOCK_STRIPES = 64
+_thread_locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+
+_local = threading.local()
+_initialized_databases: set[Path] = set()
+_schema_lock = threading.Lock()
+
+
+def get_cache_dir() -> Path:
+    """
+    Get the directory holding the persistent caches, creating it if needed
+
+    Returns:
+        Path: Cache directory
+    """
+    cache_dir = Path(os.environ.get(CACHE_DIR_ENV) or Path.home() / ".cache" / "gcp-ops-bot")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def cache_connection(file_name: str, schema: Sequence[str]) -> sqlite3.Connection:
+    """
+    Get the calling thread's connection to a database in the cache directory
+
+    The connection stays open for the thread's lifetime; use it as a context
+    manager for a transaction, never close it.
+
+    Args:
+        file_name (str): Database file name
+        schema (Sequence[str]): CREATE ... IF NOT EXISTS statements, run once per process
+
+    Returns:
+        sqlite3.Connection: Connection owned by the calling thread
+    """
+    path = get_cache_dir() / file_name
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    connection = connections.get(path)
+    if connection is None:
+        connection = sqlite3.connect(path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        with _schema_lock:
+            if path not in _initialized_databases:
+                for statement in schema:
+                    connection.execute(statement)
+                _initialized_databases.add(path)
+        connections[path] = connection
+    return connection
+
+
+def _connect() -> sqlite3.Connection:
+    return cache_connection(_DB_FILE_NAME, _SCHEMA)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__type__": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"__type__": "date", "value": value.isoformat()}
+    if isinstance(value, dt_time):
+        return {"__type__": "time", "value": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__type__": "decimal", "value": str(value)}
+    if isinstance(value, bytes):
+        return {"__type__": "bytes", "value": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _decode_value(obj: dict) -> Any:
+    kind = obj.get("__type__")
+    if kind == "datetime":
+        return datetime.fromisoformat(obj["value"])
+    if kind == "date":
+        return date.fromisoformat(obj["value"])
+    if kind == "time":
+        return dt_time.fromisoformat(obj["value"])
+    if kind == "decimal":
+        return Decimal(obj["value"])
+    if kind == "bytes":
+        return base64.b64decode(obj["value"])
+    return obj
+
+
+def _increment_stats(connection: sqlite3.Connection, **increments: int) -> None:
+    for name, value in increments.items():
+        connection.execute(
+            "INSERT INTO query_stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, value)
+        )
+
+
+def _lookup(cache_key: str) -> Optional[list[dict[str, Any]]]:
+    with _connect() as connection:
+        row = connection.execute(
+            "SELECT rows, bytes_processed FROM query_results WHERE cache_key = ? AND expires_at > ?",
+            (cache_key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        _increment_stats(connection, hits=1, bytes_saved=row[1])
+        return json.loads(row[0], object_hook=_decode_value)
+
+
+def _store(cache_key: str, expires_at: float, bytes_processed: int, rows: list[dict[str, Any]]) -> None:
+    with _connect() as connection:
+        connection.execute("DELETE FROM query_results WHERE expires_at <= ?", (time.time(),))
+        connection.execute(
+            "INSERT OR REPLACE INTO query_results (cache_key, expires_at, bytes_processed, rows) VALUES (?, ?, ?, ?)",
+            (cache_key, expires_at, bytes_processed, json.dumps(rows, default=_encode_value))
+        )
+        _increment_stats(connection, misses=1, bytes_processed=bytes_processed)
+
+
+@contextlib.contextmanager
+def cache_lock(name: str):
+    """
+    Hold an exclusive named lock across threads and bot processes
+
+    Args:
+        name (str): Lock name, must be usable as a file name
+    """
+    with _thread_locks[zlib.crc32(name.encode("utf-8")) % LOCK_STRIPES]:
+        if fcntl is None:
+            yield
+            return
+        lock_dir = get_cache_dir() / "locks"
+        lock_dir.mkdir(exist_ok=True)
+        with open(lock_dir / f"{name}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def bucket_now(bucket_seconds: int = DEFAULT_BUCKET_SECONDS) -> datetime:
+    """
+    Get the current time rounded down to the start of its cache bucket
+
+    Use this instead of `datetime.now()` when building cached queries so the
+    query text stays identical for the lifetime of a bucket.
+
+    Args:
+        bucket_seconds (int): Bucket length in seconds
+
+    Returns:
+        datetime: Start of the current bucket in local time
+    """
+    return datetime.fromtimestamp(int(time.time() // bucket_seconds) * bucket_seconds)
+
+
+def _default_execute(client, query: str) -> tuple[list[dict[str, Any]], int]:
+    query_job = client.query(query)
+    return [dict(row.items()) for row in query_job.result()], query_job.total_bytes_processed or 0
+
+
+def run_cached_query(client, query: str, bucket_seconds: int = DEFAULT_BUCKET_SECONDS, params: Sequence = (),
+                     execute: Optional[Callable[[], tuple[list[dict[str, Any]], int]]] = None) -> list[dict[str, Any]]:
+    """
+    Run a BigQuery query, serving the result from the persistent cache when possible
+
+    Args:
+        client (bigquery.Client): BigQuery client used on a cache miss
+        query (str): Standard SQL query text
+        bucket_seconds (int): Length of the time bucket the result stays valid for
+        params (Sequence): Query parameters bound to the query, part of the cache key
+        execute (Optional[Callable]): Runs the query on a miss and returns rows and bytes processed,
+            defaults to running the query text as is
+
+    Returns:
+        list[dict[str, Any]]: Result rows as dictionaries
+    """
+    params_key = json.dumps([param.to_api_repr() for param in params], sort_keys=True, default=str)
+    query_hash = hashlib.sha256(f"{client.project}\n{query}\n{params_key}".encode("utf-8")).hexdigest()
+    bucket = int(time.time() // bucket_seconds)
+    cache_key = f"{query_hash}:{bucket_seconds}:{bucket}"
+
+    rows = _lookup(cache_key)
+    if rows is not None:
+        return rows
+
+    with cache_lock(query_hash):
+        # Another thread or process may have filled the cache while we waited
+        rows = _lookup(cache_key)
+        if rows is not None:
+            return rows
+
+        rows, bytes_processed = execute() if execute is not None else _default_execute(client, query)
+        _store(cache_key, (bucket + 1) * bucket_seconds, bytes_processed, rows)
+        return rows
+
+
+def query_cache_stats() -> dict[str, int]:
+    """
+    Get persistent query cache counters shared by all bot processes
+
+    Returns:
+        dict[str, int]: Hits, misses, bytes processed on misses and bytes saved by hits
+    """
+    with _connect() as connection:
+        stats = {"hits": 0, "misses": 0, "bytes_processed": 0, "bytes_saved": 0}
+        stats.update(dict(connection.execute("SELECT name, value FROM query_stats").fetchall()))
+        stats["entries"] = connection.execute("SELECT COUNT(*) FROM query_results").fetchone()[0]
+        return stats
+
+
+def clear_query_cache() -> None:
+    """
+    Remove every cached query result, keeping the counters
+    """
+    with _connect() as connection:
+        connection.execute("DELETE FROM query_results")
@@ -0,0 +1,258 @@
+"""
+In-memory TTL + LRU cache for read-only tool functions.
+
+Tools are wrapped with `cached_tool`, which keeps the original signature and
+docstring (so Gemini's function-calling schema is unchanged) and stores results
+per tool in a bounded, thread-safe cache. Caches are process-wide and keyed by
+the function's module and qualified name and its TTL, so every chat session
+shares them while same-named tools, or one tool wrapped with two TTLs, do not.
+"""
+import copy
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 256
+
+# Freshness policy per tool, in seconds
+TOOL_TTL_SECONDS = {
+    "list_vms": 300,
+    "describe_vm": 120,
+    "monitor_vm": 30,
+    "monitor_fleet_cpu": 30,
+    "analyze_vm_cpu": 30,
+    "get_vm_cpu_history": 60,
+    "list_datasets": 900,
+    "get_bigquery_usage_by_user": 1800,
+    "get_bigquery_usage_by_day_user": 1800,
+    "get_bytes_loaded_to_dataset": 1800,
+    "list_cloud_run_jobs": 600,
+    "get_job_executions": 60,
+    "get_cloud_run_jobs_health": 120,
+    "get_cloud_run_job_execution_logs": 300,
+    "list_custom_service_accounts": 1800,
+    "resolve_resource": 30,
+    "get_current_month_costs": 4 * 3600,
+    "get_cost_by_service": 4 * 3600,
+    "get_cost_trends": 4 * 3600,
+    "get_resource_costs": 4 * 3600,
+    "get_cost_breakdown": 4 * 3600,
+}
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed time-to-live
+    """
+
+    def __init__(self, ttl: float, maxsize: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        Look up a key, counting the hit or miss
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            tuple[bool, Any]: Whether the key was found and its value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry when full
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove a single entry if present
+
+        Args:
+            key (Hashable): Cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all entries
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            dict[str, Any]: Hits, misses, evictions, current size and limits
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+            }
+
+
+# (module-qualified function name, TTL) -> cache
+_caches: dict[tuple[str, float], TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _get_cache(name: str, ttl: float, maxsize: int) -> TTLCache:
+    with _caches_lock:
+        if (name, ttl) not in _caches:
+            _caches[(name, ttl)] = TTLCache(ttl, maxsize)
+        return _caches[(name, ttl)]
+
+
+def _freeze(value: Any) -> Hashable:
+    """
+    Convert an argument value into a normalized, hashable form
+    """
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _make_key(signature: inspect.Signature, args: tuple, kwargs: dict) -> Hashable:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return tuple((name, _freeze(value)) for name, value in bound.arguments.items())
+
+
+def _is_error_result(result: Any) -> bool:
+    """
+    Check whether a tool returned an error payload instead of data
+    """
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list):
+        return any(isinstance(item, dict) and "error" in item for item in result)
+    return False
+
+
+def cached_tool(func: Callable, ttl: Optional[float] = None, maxsize: int = DEFAULT_MAX_ENTRIES) -> Callable:
+    """
+    Wrap a read-only tool function with a TTL + LRU result cache
+
+    Args:
+        func (Callable): Tool function to wrap
+        ttl (Optional[float]): Time-to-live in seconds, defaults to the tool's freshness policy
+        maxsize (int): Maximum number of cached argument combinations
+
+    Returns:
+        Callable: Wrapped function with the same name, signature and docstring
+    """
+    if ttl is None:
+        ttl = TOOL_TTL_SECONDS.get(func.__name__, DEFAULT_TTL_SECONDS)
+    cache = _get_cache(f"{func.__module__}.{func.__qualname__}", ttl, maxsize)
+    signature = inspect.signature(func)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = _make_key(signature, args, kwargs)
+            found, value = cache.get(key)
+            if found:
+                return copy.deepcopy(value)
+
+            result = await func(*args, **kwargs)
+            if not _is_error_result(result):
+                cache.set(key, copy.deepcopy(result))
+            return result
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(signature, args, kwargs)
+            found, value = cache.get(key)
+            if found:
+                return copy.deepcopy(value)
+
+            result = func(*args, **kwargs)
+            if not _is_error_result(result):
+                cache.set(key, copy.deepcopy(result))
+            return result
+
+    def invalidate(*args, **kwargs) -> None:
+        if args or kwargs:
+            cache.delete(_make_key(signature, args, kwargs))
+        else:
+            cache.clear()
+
+    wrapper.cache = cache
+    wrapper.invalidate = invalidate
+    return wrapper
+
+
+def invalidate(tool_name: Optional[str] = None) -> None:
+    """
+    Drop cached results for one tool or for every tool
+
+    Args:
+        tool_name (Optional[str]): Tool function name, alone or qualified with its module,
+            or None to clear all caches
+    """
+    with _caches_lock:
+        caches = [cache for (name, _), cache in _caches.items()
+                  if tool_name is None or tool_name in (name, name.rsplit(".", 1)[-1])]
+    for cache in caches:
+        cache.clear()
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """
+    Get hit/miss counters for every tool cache
+
+    Returns:
+        dict[str, dict[str, Any]]: Mapping of module-qualified tool name to its cache counters,
+            suffixed with the TTL when the tool is cached with more than one
+    """
+    with _caches_lock:
+        names = [name for name, _ in _caches]
+        return {
+            name if names.count(name) == 1 else f"{name} (ttl {ttl:g}s)": cache.info()
+            for (name, ttl), cache in _caches.items()
+        }
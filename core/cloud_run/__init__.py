@@ -1,5 +1,6 @@
 from .cloud_run_utils import (
     list_cloud_run_jobs,
     get_job_executions,
+    get_cloud_run_jobs_health,
     get_cloud_run_job_execution_logs
 )
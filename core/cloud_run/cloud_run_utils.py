@@ -1,10 +1,10 @@
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from google.auth import default
-from google.cloud import logging_v2
-from googleapiclient.discovery import build
+from .inventory import collect_executions, jobs_health, list_jobs
+from .log_compaction import compact_execution_logs
+from .log_reader import DEFAULT_MAX_ENTRIES, read_execution_logs
 
 
 def list_cloud_run_jobs(project_number: str) -> list[str]:
@@ -17,96 +17,65 @@ def list_cloud_run_jobs(project_number: str) -> list[str]:
     Returns:
         list[str]: List of cloud run job names 
     """
-    credentials, _ = default()
+    return [job["name"] for job in list_jobs(project_number, os.environ['GCP_REGION'])]
 
-    service = build('run', 'v2', credentials=credentials)
 
-    parent = f"projects/{project_number}/locations/{os.environ['GCP_REGION']}"
-
-    request = service.projects().locations().jobs().list(parent=parent)
-    response = request.execute()
-
-    jobs = [i["name"].split("/")[-1] for i in response.get('jobs', [])]
-    return jobs
-
-
-def get_job_executions(project_number: str, job_name: str) -> list[dict[str, Any]]:
+def get_job_executions(project_number: str, job_name: str, limit: int = 20) -> list[dict[str, Any]]:
     """
-    Get latest 20 executions for a cloud run jobs sorted by start time in descending order
+    Get latest executions for cloud run jobs sorted by creation time in descending order
     
     Args:
         project_number (str): GCP project number
-        job_name (str): Cloud run job name
+        job_name (str): Cloud run job name, or several job names separated by commas
+        limit (int): Number of executions to return per job
     
     Returns:
-        list[dict[str, Any]]: List of objects with cloud run job status, start time and end time 
+        list[dict[str, Any]]: List of objects with job name, execution ID, status, start time, end time and duration
     """
-    credentials, _ = default()
-    service = build('run', 'v2', credentials=credentials)
+    job_names = [name.strip() for name in job_name.split(",") if name.strip()]
+    per_job = collect_executions(project_number, os.environ['GCP_REGION'], job_names, limit=limit)
+    return [execution for executions in per_job.values() for execution in executions]
 
-    parent = f"projects/{project_number}/locations/{os.environ['GCP_REGION']}/jobs/{job_name}"
-    request = service.projects().locations().jobs().executions().list(parent=parent)
 
-    response = request.execute()
-    executions = response.get('executions', [])
+def get_cloud_run_jobs_health(project_number: str, days: int = 7, failed_only: bool = False) -> list[dict[str, Any]]:
+    """
+    Get a health table of all cloud run jobs over the last n days, jobs with most failures first
 
-    result = []
-    for execution in executions:
-        conditions = sorted(execution["conditions"], key=lambda x: datetime.fromisoformat(x["lastTransitionTime"]),
-                            reverse=True)
-        if conditions:
-            result.append(
-                {"start_time": datetime.fromisoformat(execution["startTime"]) if execution.get("startTime") else "N/A",
-                 "end_time": datetime.fromisoformat(execution["endTime"]) if execution.get("endTime") else "N/A",
-                 "type": conditions[0]["type"],
-                 "uid": execution["uid"],
-                 "execution_id": execution["name"].split("/")[-1],
-                 "status": "success" if conditions[0]["state"] == "CONDITION_SUCCEEDED" else "fail"})
+    Args:
+        project_number (str): GCP project number
+        days (int): Number of days to look back
+        failed_only (bool): Only include jobs with at least one failed execution
 
-    return result
+    Returns:
+        list[dict[str, Any]]: Per job: runs, failures, failure rate, last status, last run, last success,
+            median duration in seconds and IDs of the most recent failed executions
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    table = jobs_health(project_number, os.environ['GCP_REGION'], since)
+    return [row for row in table if row["failures"]] if failed_only else table
 
 
-def get_cloud_run_job_execution_logs(project_number: str, job_name: str, execution_id: str):
+def get_cloud_run_job_execution_logs(project_number: str, job_name: str, execution_id: str,
+                                     min_severity: str = "", contains: str = "",
+                                     max_entries: int = DEFAULT_MAX_ENTRIES, compact: bool = True) -> dict[str, Any]:
     """
-    Get logs for a specific Cloud Run job execution.
+    Get logs for a specific Cloud Run job execution, limited to the most relevant entries.
 
     Args:
         project_number (str): GCP project number.
         job_name (str): Cloud Run job name.
         execution_id (str): Execution ID.
+        min_severity (str): Only entries at or above this severity (e.g. WARNING, ERROR), all if empty.
+        contains (str): Only entries whose message contains this text, all if empty.
+        max_entries (int): Maximum number of entries (or templates) to return.
+        compact (bool): Group repeated lines into message templates, set to False for raw lines.
 
     Returns:
-        list[dict]: List of log entries.
+        dict: Time window searched and stats on how many entries were scanned and omitted, plus either
+            message templates (with count, first/last occurrence and exemplars) and every error entry when
+            compact, or log entries (timestamp, severity, message) from the start and end of the execution
+            and errors in between.
     """
-    credentials, _ = default()
-    client = logging_v2.Client(project=project_number, credentials=credentials)
-
-    now = datetime.now()
-    start_time = (now - timedelta(days=30)).isoformat() + "Z"
-    end_time = now.isoformat() + "Z"
-
-    log_filter = f'''
-    timestamp >= "{start_time}"
-    timestamp <= "{end_time}"
-    resource.type="cloud_run_job"
-    resource.labels.project_id="rl-warehouse"
-    resource.labels.location="{os.environ['GCP_REGION']}"
-    resource.labels.job_name="{job_name}"
-    labels."run.googleapis.com/execution_name"="{execution_id}"
-    '''
-
-    entries = client.list_entries(
-        filter_=log_filter,
-        page_size=200
-    )
-
-    logs = []
-    for entry in entries:
-        message = entry.payload if isinstance(entry.payload, str) else str(entry.payload)
-        logs.append({
-            "timestamp": entry.timestamp.isoformat() if entry.timestamp else "unknown",
-            "severity": entry.severity,
-            "message": message
-        })
-
-    return logs
+    read_logs = compact_execution_logs if compact else read_execution_logs
+    return read_logs(project_number, os.environ['GCP_REGION'], job_name, execution_id,
+                     min_severity, contains, max_entries)
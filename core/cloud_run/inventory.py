@@ -0,0 +1,243 @@
+"""
+Cloud Run job and execution collection.
+
+Jobs and executions are listed following `nextPageToken` until every page is
+read, with field masks limiting each resource to the attributes the bot
+reports. Executions come back newest first, so "latest N" requests size their
+pages to N and "since T" requests stop at the first page that reaches past T.
+Executions for many jobs are fetched concurrently, or across all jobs at once
+with the `-` job wildcard, and summarized into a compact per-job health table.
+"""
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Optional
+
+from ..utils.client_pool import get_run_service
+from .log_reader import parse_timestamp
+
+PAGE_SIZE = 100
+MAX_JOB_WORKERS = 8
+MAX_FAILED_EXECUTION_IDS = 5
+
+_EXECUTION_FIELDS = ("name,uid,job,createTime,startTime,completionTime,"
+                     "failedCount,cancelledCount,runningCount,conditions(type,state)")
+_EXECUTION_LIST_FIELDS = f"executions({_EXECUTION_FIELDS}),nextPageToken"
+_JOB_LIST_FIELDS = "jobs(name,latestCreatedExecution),nextPageToken"
+
+# Shared so each worker thread keeps its discovery service and connections from client_pool across calls
+_executor = ThreadPoolExecutor(max_workers=MAX_JOB_WORKERS, thread_name_prefix="cloud-run-inventory")
+
+_COMPLETION_STATUS = {
+    "EXECUTION_SUCCEEDED": "success",
+    "EXECUTION_FAILED": "fail",
+    "EXECUTION_CANCELLED": "cancelled",
+    "EXECUTION_RUNNING": "running",
+    "EXECUTION_PENDING": "running",
+}
+
+
+def _jobs_parent(project_number: str, region: str) -> str:
+    return f"projects/{project_number}/locations/{region}"
+
+
+def execution_status(execution: dict[str, Any]) -> str:
+    """
+    Get the outcome of an execution from its Completed condition
+
+    Args:
+        execution (dict[str, Any]): Cloud Run v2 execution resource
+
+    Returns:
+        str: success, fail, cancelled or running
+    """
+    if not execution.get("completionTime"):
+        return "running"
+    if execution.get("cancelledCount"):
+        return "cancelled"
+    for condition in execution.get("conditions", []):
+        if condition.get("type") == "Completed":
+            return "success" if condition.get("state") == "CONDITION_SUCCEEDED" else "fail"
+    return "fail" if execution.get("failedCount") else "success"
+
+
+def project_execution(execution: dict[str, Any]) -> dict[str, Any]:
+    """
+    Reduce an execution resource to the fields the bot reports
+
+    Args:
+        execution (dict[str, Any]): Cloud Run v2 execution resource
+
+    Returns:
+        dict[str, Any]: Job name, execution ID, uid, status, start and end time and duration in seconds
+    """
+    start = parse_timestamp(execution.get("startTime"))
+    end = parse_timestamp(execution.get("completionTime"))
+    return {
+        "job_name": execution.get("job", "").rsplit("/", 1)[-1],
+        "execution_id": execution.get("name", "").rsplit("/", 1)[-1],
+        "uid": execution.get("uid", ""),
+        "status": execution_status(execution),
+        "create_time": execution.get("createTime", ""),
+        "start_time": start.isoformat() if start else "N/A",
+        "end_time": end.isoformat() if end else "N/A",
+        "duration_seconds": round((end - start).total_seconds(), 1) if start and end else None,
+    }
+
+
+def list_jobs(project_number: str, region: str) -> list[dict[str, Any]]:
+    """
+    List every Cloud Run job in a region, following all pages
+
+    Args:
+        project_number (str): GCP project number
+        region (str): Cloud Run region
+
+    Returns:
+        list[dict[str, Any]]: Job name and its latest created execution
+    """
+    jobs = get_run_service().projects().locations().jobs()
+    request = jobs.list(parent=_jobs_parent(project_number, region), pageSize=PAGE_SIZE, fields=_JOB_LIST_FIELDS)
+
+    result = []
+    while request is not None:
+        response = request.execute()
+        for job in response.get("jobs", []):
+            result.append({
+                "name": job["name"].rsplit("/", 1)[-1],
+                "latest_execution": job.get("latestCreatedExecution", {}),
+            })
+        request = jobs.list_next(request, response)
+    return result
+
+
+def list_executions(project_number: str, region: str, job_name: str = "-", limit: Optional[int] = None,
+                    since: Optional[datetime] = None) -> list[dict[str, Any]]:
+    """
+    List executions of a job, or of every job with "-", newest first
+
+    Args:
+        project_number (str): GCP project number
+        region (str): Cloud Run region
+        job_name (str): Cloud Run job name, "-" for all jobs
+        limit (Optional[int]): Only the latest this many executions
+        since (Optional[datetime]): Only executions created at or after this time
+
+    Returns:
+        list[dict[str, Any]]: Compact execution records, newest first
+    """
+    executions = get_run_service().projects().locations().jobs().executions()
+    request = executions.list(
+        parent=f"{_jobs_parent(project_number, region)}/jobs/{job_name}",
+        pageSize=min(PAGE_SIZE, limit) if limit else PAGE_SIZE,
+        fields=_EXECUTION_LIST_FIELDS,
+    )
+
+    # Executions of one job come newest first, so its pages can stop early; across jobs ("-") the API does not
+    # order them, and every page has to be read and filtered here
+    single_job = job_name != "-"
+    result = []
+    while request is not None:
+        response = request.execute()
+        reached_since = False
+        for execution in response.get("executions", []):
+            created = parse_timestamp(execution.get("createTime"))
+            if since is not None and created is not None and created < since:
+                reached_since = True
+                continue
+            result.append(project_execution(execution))
+        if single_job and (reached_since or (limit and len(result) >= limit)):
+            break
+        request = executions.list_next(request, response)
+
+    result.sort(key=lambda execution: execution["create_time"], reverse=True)
+    return result[:limit] if limit else result
+
+
+def collect_executions(project_number: str, region: str, job_names: list[str], limit: Optional[int] = None,
+                       since: Optional[datetime] = None) -> dict[str, list[dict[str, Any]]]:
+    """
+    List executions of many jobs concurrently
+
+    Args:
+        project_number (str): GCP project number
+        region (str): Cloud Run region
+        job_names (list[str]): Cloud Run job names
+        limit (Optional[int]): Only the latest this many executions per job
+        since (Optional[datetime]): Only executions created at or after this time
+
+    Returns:
+        dict[str, list[dict[str, Any]]]: Mapping of job name to its executions, newest first
+    """
+    if not job_names:
+        return {}
+    per_job = _executor.map(lambda job: list_executions(project_number, region, job, limit, since), job_names)
+    return dict(zip(job_names, per_job))
+
+
+def job_health(job_name: str, executions: list[dict[str, Any]],
+               latest_execution: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    """
+    Summarize a job's executions into one health row
+
+    Args:
+        job_name (str): Cloud Run job name
+        executions (list[dict[str, Any]]): Compact execution records, newest first
+        latest_execution (Optional[dict[str, Any]]): Job's latestCreatedExecution, used when there are no executions
+
+    Returns:
+        dict[str, Any]: Runs, failures, failure rate, last status, last success, median duration
+            and the IDs of the most recent failed executions
+    """
+    finished = [execution for execution in executions if execution["status"] != "running"]
+    failed = [execution for execution in finished if execution["status"] == "fail"]
+    succeeded = [execution for execution in finished if execution["status"] == "success"]
+    durations = [execution["duration_seconds"] for execution in finished if execution["duration_seconds"] is not None]
+
+    if executions:
+        last_status, last_run = executions[0]["status"], executions[0]["create_time"]
+    else:
+        latest_execution = latest_execution or {}
+        last_status = _COMPLETION_STATUS.get(latest_execution.get("completionStatus"), "unknown")
+        last_run = latest_execution.get("createTime", "N/A")
+
+    return {
+        "job_name": job_name,
+        "runs": len(executions),
+        "failures": len(failed),
+        "failure_rate": round(len(failed) / len(finished), 3) if finished else None,
+        "last_status": last_status,
+        "last_run": last_run,
+        "last_success": succeeded[0]["end_time"] if succeeded else None,
+        "median_duration_seconds": round(statistics.median(durations), 1) if durations else None,
+        "failed_execution_ids": [execution["execution_id"] for execution in failed[:MAX_FAILED_EXECUTION_IDS]],
+    }
+
+
+def jobs_health(project_number: str, region: str, since: datetime) -> list[dict[str, Any]]:
+    """
+    Build the health table of every job from its executions since a time
+
+    Jobs and executions are listed concurrently; executions across all jobs
+    come from one paged listing.
+
+    Args:
+        project_number (str): GCP project number
+        region (str): Cloud Run region
+        since (datetime): Start of the period
+
+    Returns:
+        list[dict[str, Any]]: One health row per job, most failures first
+    """
+    jobs_future = _executor.submit(list_jobs, project_number, region)
+    executions_future = _executor.submit(list_executions, project_number, region, "-", None, since)
+    jobs, executions = jobs_future.result(), executions_future.result()
+
+    per_job: dict[str, list[dict[str, Any]]] = {job["name"]: [] for job in jobs}
+    for execution in executions:
+        per_job.setdefault(execution["job_name"], []).append(execution)
+
+    latest = {job["name"]: job["latest_execution"] for job in jobs}
+    table = [job_health(name, runs, latest.get(name)) for name, runs in per_job.items()]
+    table.sort(key=lambda row: (-row["failures"], row["job_name"]))
+    return table
@@ -0,0 +1,254 @@
+"""
+Drain-style compaction of log records into message templates.
+
+Variable tokens (timestamps, UUIDs, hex IDs, IP addresses, numbers) are masked,
+then each message is matched against the known templates of the same length
+and leading token. A message close enough to a template is merged into it,
+turning the positions that differ into wildcards; otherwise it starts a new
+template. Each template keeps its count, first and last occurrence, severity
+counts and a few exemplars. Error records are never folded away: they are kept
+verbatim alongside the templates.
+
+The byte budget is split in half: one half for the verbatim errors, the other
+for the templates, most frequent first, with their exemplars cut short.
+"""
+import json
+import re
+from typing import Any, Optional
+
+from ..utils.client_pool import get_logging_client
+from .log_reader import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_ENTRIES,
+    ERROR_SEVERITIES,
+    MAX_SCANNED_ENTRIES,
+    build_log_filter,
+    format_timestamp,
+    get_execution_window,
+    iter_log_records,
+    iter_unscanned_errors,
+    record_size,
+)
+
+WILDCARD = "<*>"
+SIMILARITY_THRESHOLD = 0.5
+MAX_EXEMPLARS = 2
+MAX_TEMPLATES_PER_GROUP = 100
+MAX_TEMPLATES = 2_000
+MAX_TEMPLATE_CHARS = 500
+MAX_EXEMPLAR_CHARS = 300
+
+_MASKS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<TS>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<UUID>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{8,}\b"), "<HEX>"),
+    (re.compile(r"\b(?:0x)?\d+(?:\.\d+)?\b"), "<NUM>"),
+]
+
+
+def mask_message(message: str) -> str:
+    """
+    Replace variable tokens with placeholders
+
+    Args:
+        message (str): Log message
+
+    Returns:
+        str: Message with timestamps, UUIDs, IPs, hex IDs and numbers masked
+    """
+    for pattern, placeholder in _MASKS:
+        message = pattern.sub(placeholder, message)
+    return message
+
+
+class LogTemplate:
+    """
+    One cluster of similar messages
+    """
+
+    def __init__(self, tokens: list[str], record: dict[str, str]):
+        self.tokens = tokens
+        self.count = 0
+        self.first_seen = record["timestamp"]
+        self.last_seen = record["timestamp"]
+        self.severity_counts: dict[str, int] = {}
+        self.exemplars: list[str] = []
+
+    def similarity(self, tokens: list[str]) -> float:
+        matches = sum(1 for ours, theirs in zip(self.tokens, tokens) if ours == theirs or ours == WILDCARD)
+        return matches / len(tokens) if tokens else 1.0
+
+    def add(self, tokens: list[str], record: dict[str, str]) -> None:
+        self.tokens = [ours if ours == theirs else WILDCARD for ours, theirs in zip(self.tokens, tokens)]
+        self.count += 1
+        self.last_seen = record["timestamp"]
+        self.severity_counts[record["severity"]] = self.severity_counts.get(record["severity"], 0) + 1
+        if len(self.exemplars) < MAX_EXEMPLARS and record["message"] not in self.exemplars:
+            self.exemplars.append(record["message"])
+
+    def to_dict(self) -> dict[str, Any]:
+        template = " ".join(self.tokens)
+        if len(template) > MAX_TEMPLATE_CHARS:
+            template = template[:MAX_TEMPLATE_CHARS] + "..."
+        return {
+            "template": template,
+            "count": self.count,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "severity_counts": self.severity_counts,
+            "exemplars": [exemplar if len(exemplar) <= MAX_EXEMPLAR_CHARS else exemplar[:MAX_EXEMPLAR_CHARS] + "..."
+                          for exemplar in self.exemplars],
+        }
+
+
+class LogCompactor:
+    """
+    Streaming template clustering with verbatim error retention
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_errors = max_entries
+        self.max_error_bytes = max_bytes // 2
+        self.max_template_bytes = max_bytes - self.max_error_bytes
+        self._groups: dict[tuple[int, str], list[LogTemplate]] = {}
+        self._templates: list[LogTemplate] = []
+        self._overflow: Optional[LogTemplate] = None
+        self.errors: list[dict[str, str]] = []
+        self._error_size = 0
+        self.errors_omitted = 0
+        self.scanned = 0
+
+    def _match(self, tokens: list[str], record: dict[str, str]) -> LogTemplate:
+        first = tokens[0] if tokens and not any(char.isdigit() or char == "<" for char in tokens[0]) else WILDCARD
+        group = self._groups.setdefault((len(tokens), first), [])
+
+        best, best_score = None, 0.0
+        for template in group:
+            score = template.similarity(tokens)
+            if score > best_score:
+                best, best_score = template, score
+        if best is not None and best_score >= SIMILARITY_THRESHOLD:
+            return best
+
+        if len(group) >= MAX_TEMPLATES_PER_GROUP or len(self._templates) >= MAX_TEMPLATES:
+            if self._overflow is None:
+                self._overflow = LogTemplate([WILDCARD], record)
+            return self._overflow
+
+        template = LogTemplate(tokens, record)
+        group.append(template)
+        self._templates.append(template)
+        return template
+
+    def add(self, record: dict[str, str]) -> None:
+        """
+        Fold the next record into its template, keeping errors verbatim
+
+        Args:
+            record (dict[str, str]): Compact log record
+        """
+        self.scanned += 1
+        tokens = mask_message(record["message"]).split()
+        template = self._match(tokens, record)
+        template.add(tokens if template is not self._overflow else [WILDCARD], record)
+
+        if record["severity"] in ERROR_SEVERITIES:
+            self.add_error(record)
+
+    def add_error(self, record: dict[str, str]) -> None:
+        """
+        Keep an error verbatim if the error budget allows, e.g. one found past the end of the scan
+
+        Args:
+            record (dict[str, str]): Compact log record
+        """
+        size = record_size(record)
+        if len(self.errors) < self.max_errors and self._error_size + size <= self.max_error_bytes:
+            self.errors.append(record)
+            self._error_size += size
+        else:
+            self.errors_omitted += 1
+
+    def result(self, max_templates: int = DEFAULT_MAX_ENTRIES) -> dict[str, Any]:
+        """
+        Get the templates, most frequent first, and the preserved errors
+
+        Templates are returned until either max_templates or the template half
+        of the byte budget is reached.
+
+        Args:
+            max_templates (int): Maximum number of templates returned
+
+        Returns:
+            dict[str, Any]: Templates, errors and compaction stats
+        """
+        templates = sorted(self._templates, key=lambda template: template.count, reverse=True)
+        if self._overflow is not None:
+            templates.append(self._overflow)
+
+        kept, size = [], 0
+        for template in templates[:max_templates]:
+            template_dict = template.to_dict()
+            template_size = len(json.dumps(template_dict, default=str))
+            if size + template_size > self.max_template_bytes:
+                break
+            kept.append(template_dict)
+            size += template_size
+
+        return {
+            "templates": kept,
+            "errors": self.errors,
+            "stats": {
+                "entries_scanned": self.scanned,
+                "templates_total": len(templates),
+                "templates_omitted": len(templates) - len(kept),
+                "errors_omitted": self.errors_omitted,
+            },
+        }
+
+
+def compact_execution_logs(project_number: str, region: str, job_name: str, execution_id: str,
+                           min_severity: str = "", contains: str = "", max_entries: int = DEFAULT_MAX_ENTRIES,
+                           max_bytes: int = DEFAULT_MAX_BYTES) -> dict[str, Any]:
+    """
+    Read a Cloud Run job execution's logs as message templates plus verbatim errors
+
+    Args:
+        project_number (str): GCP project number
+        region (str): Cloud Run region
+        job_name (str): Cloud Run job name
+        execution_id (str): Execution ID
+        min_severity (str): Only entries at or above this severity
+        contains (str): Only entries whose message contains this text
+        max_entries (int): Maximum number of templates and of errors returned
+        max_bytes (int): Approximate maximum size of the returned templates and errors, half for each
+
+    Returns:
+        dict[str, Any]: Window, templates, errors and compaction stats
+    """
+    client = get_logging_client(project_number)
+    start_time, end_time = get_execution_window(project_number, region, job_name, execution_id)
+    log_filter = build_log_filter(job_name, execution_id, region, start_time, end_time, min_severity, contains)
+
+    compactor = LogCompactor(max_entries, max_bytes)
+    stopped_at = None
+    for record in iter_log_records(client, log_filter):
+        if compactor.scanned >= MAX_SCANNED_ENTRIES:
+            stopped_at = record["timestamp"]
+            break
+        compactor.add(record)
+
+    unscanned_errors = []
+    if stopped_at is not None:
+        # Templates only cover the scanned part, but no error of the window is missed
+        unscanned_errors = list(iter_unscanned_errors(client, job_name, execution_id, region, stopped_at, end_time,
+                                                      min_severity, contains, compactor.max_errors + 1))
+        for record in unscanned_errors:
+            compactor.add_error(record)
+
+    result = compactor.result(max_entries)
+    result["stats"]["scan_complete"] = stopped_at is None
+    if stopped_at is not None:
+        result["stats"].update(scan_stopped_at=stopped_at, unscanned_errors_found=len(unscanned_errors))
+    return {"window": {"start_time": format_timestamp(start_time), "end_time": format_timestamp(end_time)}, **result}
@@ -0,0 +1,379 @@
+"""
+Streaming, budgeted reader for Cloud Run job execution logs.
+
+Entries are pulled page by page from `list_entries` through generators, never
+materialized in full. Severity and text filters are applied server-side, and
+the time window is narrowed to the execution's own start and completion time.
+A single pass keeps a bounded head and tail of the stream plus the errors in
+between, so the result stays within an entry and byte budget while keeping
+the lines most likely to explain a failure. A stream too long to scan is cut
+off, and the errors of the rest of the window are fetched with one more
+server-side severity query.
+"""
+import json
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, Optional
+
+from ..utils.client_pool import get_logging_client, get_run_service
+
+PAGE_SIZE = 500
+DEFAULT_MAX_ENTRIES = 200
+DEFAULT_MAX_BYTES = 64_000
+MAX_MESSAGE_CHARS = 2_000
+# Entries read before giving up on the middle of the stream and fetching the tail directly
+MAX_SCANNED_ENTRIES = 20_000
+# Share of the budget for the head and the tail; the rest goes to errors in between
+HEAD_SHARE = 0.4
+TAIL_SHARE = 0.4
+# Padding around the execution's own run time
+WINDOW_PADDING = timedelta(minutes=5)
+DEFAULT_LOOKBACK = timedelta(days=30)
+
+SEVERITIES = ("DEFAULT", "DEBUG", "INFO", "NOTICE", "WARNING", "ERROR", "CRITICAL", "ALERT", "EMERGENCY")
+ERROR_SEVERITIES = frozenset(("ERROR", "CRITICAL", "ALERT", "EMERGENCY"))
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an RFC 3339 timestamp as returned by Cloud Run and Cloud Logging
+
+    Args:
+        value (Optional[str]): Timestamp, possibly with nanoseconds
+
+    Returns:
+        Optional[datetime]: Timezone-aware datetime, None if empty
+    """
+    if not value:
+        return None
+    # Cloud Run returns RFC 3339 with nanoseconds, which fromisoformat cannot parse
+    value = value.replace("Z", "+00:00")
+    if "." in value:
+        head, rest = value.split(".", 1)
+        digits = rest[:len(rest) - len(rest.lstrip("0123456789"))]
+        value = f"{head}.{digits[:6]}{rest[len(digits):]}"
+    return datetime.fromisoformat(value)
+
+
+def format_timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def get_execution_window(project_number: str, region: str, job_name: str,
+                         execution_id: str) -> tuple[datetime, datetime]:
+    """
+    Get the time window an execution can have logged in
+
+    Args:
+        project_number (str): GCP project number
+        region (str): Cloud Run region
+        job_name (str): Cloud Run job name
+        execution_id (str): Execution ID
+
+    Returns:
+        tuple[datetime, datetime]: Padded start and end of the execution, end is now while it still runs
+    """
+    now = datetime.now(timezone.utc)
+    name = f"projects/{project_number}/locations/{region}/jobs/{job_name}/executions/{execution_id}"
+    try:
+        execution = get_run_service().projects().locations().jobs().executions().get(name=name).execute()
+    except Exception:
+        return now - DEFAULT_LOOKBACK, now
+
+    start = parse_timestamp(execution.get("startTime")) or parse_timestamp(execution.get("createTime"))
+    end = parse_timestamp(execution.get("completionTime"))
+    if start is None:
+        return now - DEFAULT_LOOKBACK, now
+    return start - WINDOW_PADDING, min(now, end + WINDOW_PADDING) if end else now
+
+
+def build_log_filter(job_name: str, execution_id: str, region: str, start_time: datetime, end_time: datetime,
+                     min_severity: str = "", contains: str = "") -> str:
+    """
+    Build a Logging filter for one execution, with optional severity and text restrictions
+
+    Args:
+        job_name (str): Cloud Run job name
+        execution_id (str): Execution ID
+        region (str): Cloud Run region
+        start_time (datetime): Earliest entry timestamp
+        end_time (datetime): Latest entry timestamp
+        min_severity (str): Only entries at or above this severity, e.g. WARNING
+        contains (str): Only entries whose message contains this text
+
+    Returns:
+        str: Logging query language filter
+
+    Raises:
+        ValueError: If the severity is unknown
+    """
+    clauses = [
+        f'timestamp >= "{format_timestamp(start_time)}"',
+        f'timestamp <= "{format_timestamp(end_time)}"',
+        'resource.type="cloud_run_job"',
+        f'resource.labels.location="{region}"',
+        f'resource.labels.job_name="{job_name}"',
+        f'labels."run.googleapis.com/execution_name"="{execution_id}"',
+    ]
+    if min_severity:
+        severity = min_severity.upper()
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown severity {min_severity!r}, expected one of {', '.join(SEVERITIES)}")
+        clauses.append(f"severity >= {severity}")
+    if contains:
+        text = json.dumps(contains)
+        clauses.append(f"(textPayload:{text} OR jsonPayload.message:{text})")
+    return "\n".join(clauses)
+
+
+def entry_to_record(entry) -> dict[str, str]:
+    """
+    Reduce a log entry to timestamp, severity and a bounded message
+
+    Args:
+        entry: google.cloud.logging entry
+
+    Returns:
+        dict[str, str]: Compact log record
+    """
+    payload = entry.payload
+    if isinstance(payload, str):
+        message = payload
+    elif isinstance(payload, dict):
+        message = payload.get("message")
+        if not isinstance(message, str):
+            message = json.dumps(payload, default=str, separators=(",", ":"))
+    else:
+        message = "" if payload is None else str(payload)
+    if len(message) > MAX_MESSAGE_CHARS:
+        message = message[:MAX_MESSAGE_CHARS] + f"... [{len(message) - MAX_MESSAGE_CHARS} chars truncated]"
+
+    return {
+        "timestamp": entry.timestamp.isoformat() if entry.timestamp else "unknown",
+        "severity": entry.severity or "DEFAULT",
+        "message": message,
+    }
+
+
+def iter_log_records(client, log_filter: str, descending: bool = False,
+                     max_results: Optional[int] = None) -> Iterator[dict[str, str]]:
+    """
+    Stream compact records page by page
+
+    Args:
+        client (logging_v2.Client): Logging client
+        log_filter (str): Logging filter
+        descending (bool): Newest entries first
+        max_results (Optional[int]): Stop after this many entries
+
+    Yields:
+        dict[str, str]: Compact log record
+    """
+    entries = client.list_entries(
+        filter_=log_filter,
+        order_by="timestamp desc" if descending else "timestamp asc",
+        page_size=PAGE_SIZE if max_results is None else min(PAGE_SIZE, max_results),
+        max_results=max_results,
+    )
+    for entry in entries:
+        yield entry_to_record(entry)
+
+
+def iter_unscanned_errors(client, job_name: str, execution_id: str, region: str, stopped_at: str,
+                          end_time: datetime, min_severity: str = "", contains: str = "",
+                          max_results: Optional[int] = None) -> Iterator[dict[str, str]]:
+    """
+    Stream the errors of the part of an execution's window a scan did not reach
+
+    Args:
+        job_name (str): Cloud Run job name
+        execution_id (str): Execution ID
+        region (str): Cloud Run region
+        stopped_at (str): Timestamp of the first record left unscanned
+        end_time (datetime): End of the window
+        min_severity (str): Severity filter of the scan, kept if stricter than ERROR
+        contains (str): Text filter of the scan
+        max_results (Optional[int]): Stop after this many entries
+
+    Yields:
+        dict[str, str]: Compact log record, oldest first
+    """
+    start_time = parse_timestamp(stopped_at)
+    if start_time is None:
+        return
+    severity = min_severity.upper() if min_severity.upper() in ERROR_SEVERITIES else "ERROR"
+    log_filter = build_log_filter(job_name, execution_id, region, start_time, end_time, severity, contains)
+    yield from iter_log_records(client, log_filter, max_results=max_results)
+
+
+def record_size(record: dict[str, str]) -> int:
+    """
+    Approximate serialized size of a record in bytes
+
+    Args:
+        record (dict[str, str]): Compact log record
+
+    Returns:
+        int: Size estimate
+    """
+    return len(record["message"]) + len(record["timestamp"]) + len(record["severity"]) + 40
+
+
+class LogSampler:
+    """
+    Single-pass head, tail and error sampler with entry and byte budgets
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.head_entries = max(1, int(max_entries * HEAD_SHARE))
+        self.tail_entries = max(1, int(max_entries * TAIL_SHARE))
+        self.error_entries = max(0, max_entries - self.head_entries - self.tail_entries)
+        self.head_bytes = int(max_bytes * HEAD_SHARE)
+        self.tail_bytes = int(max_bytes * TAIL_SHARE)
+        self.error_bytes = max_bytes - self.head_bytes - self.tail_bytes
+
+        self.head: list[dict[str, str]] = []
+        self.tail: deque[dict[str, str]] = deque()
+        self.errors: list[dict[str, str]] = []
+        self._head_size = self._tail_size = self._error_size = 0
+        self.scanned = 0
+        self.omitted = 0
+        self.omitted_errors = 0
+        self.severity_counts: dict[str, int] = {}
+
+    def add(self, record: dict[str, str]) -> None:
+        """
+        Offer the next record of the stream
+
+        Args:
+            record (dict[str, str]): Compact log record
+        """
+        self.scanned += 1
+        self.severity_counts[record["severity"]] = self.severity_counts.get(record["severity"], 0) + 1
+        size = record_size(record)
+        if not self.tail and len(self.head) < self.head_entries and self._head_size + size <= self.head_bytes:
+            self.head.append(record)
+            self._head_size += size
+            return
+
+        self.tail.append(record)
+        self._tail_size += size
+        while self.tail and (len(self.tail) > self.tail_entries or self._tail_size > self.tail_bytes):
+            evicted = self.tail.popleft()
+            self._tail_size -= record_size(evicted)
+            self._keep_middle(evicted)
+
+    def _keep_middle(self, record: dict[str, str]) -> None:
+        size = record_size(record)
+        if (record["severity"] in ERROR_SEVERITIES and len(self.errors) < self.error_entries
+                and self._error_size + size <= self.error_bytes):
+            self.errors.append(record)
+            self._error_size += size
+            return
+        self.omitted += 1
+        if record["severity"] in ERROR_SEVERITIES:
+            self.omitted_errors += 1
+
+    def add_unscanned_error(self, record: dict[str, str]) -> None:
+        """
+        Keep an error from past the point where the scan stopped, if the error budget allows
+
+        Args:
+            record (dict[str, str]): Compact log record, newer than every scanned one
+        """
+        if record in self.tail:
+            return
+        self.severity_counts[record["severity"]] = self.severity_counts.get(record["severity"], 0) + 1
+        self._keep_middle(record)
+
+    def replace_tail(self, records: Iterable[dict[str, str]]) -> None:
+        """
+        Replace the tail with records fetched directly, after a scan stopped early
+
+        Args:
+            records (Iterable[dict[str, str]]): Newest records, oldest first
+        """
+        self.omitted += len(self.tail)
+        self.omitted_errors += sum(record["severity"] in ERROR_SEVERITIES for record in self.tail)
+        self.tail.clear()
+        self._tail_size = 0
+        for record in records:
+            self.tail.append(record)
+            self._tail_size += record_size(record)
+        while self.tail and self._tail_size > self.tail_bytes:
+            self._tail_size -= record_size(self.tail.popleft())
+            self.omitted += 1
+
+    def records(self) -> list[dict[str, str]]:
+        """
+        Get the sampled records in timestamp order
+
+        Returns:
+            list[dict[str, str]]: Head, errors in between and tail
+        """
+        return self.head + self.errors + list(self.tail)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get counters describing what was kept and what was dropped
+
+        Returns:
+            dict[str, Any]: Scan and sampling counters
+        """
+        return {
+            "entries_scanned": self.scanned,
+            "entries_returned": len(self.head) + len(self.errors) + len(self.tail),
+            "entries_omitted": self.omitted,
+            "errors_omitted": self.omitted_errors,
+            "severity_counts": self.severity_counts,
+        }
+
+
+def read_execution_logs(project_number: str, region: str, job_name: str, execution_id: str,
+                        min_severity: str = "", contains: str = "", max_entries: int = DEFAULT_MAX_ENTRIES,
+                        max_bytes: int = DEFAULT_MAX_BYTES) -> dict[str, Any]:
+    """
+    Read a bounded, most relevant slice of a Cloud Run job execution's logs
+
+    Args:
+        project_number (str): GCP project number
+        region (str): Cloud Run region
+        job_name (str): Cloud Run job name
+        execution_id (str): Execution ID
+        min_severity (str): Only entries at or above this severity
+        contains (str): Only entries whose message contains this text
+        max_entries (int): Maximum number of entries returned
+        max_bytes (int): Approximate maximum size of the returned messages
+
+    Returns:
+        dict[str, Any]: Window, sampled entries and sampling stats
+    """
+    client = get_logging_client(project_number)
+    start_time, end_time = get_execution_window(project_number, region, job_name, execution_id)
+    log_filter = build_log_filter(job_name, execution_id, region, start_time, end_time, min_severity, contains)
+
+    sampler = LogSampler(max_entries, max_bytes)
+    stopped_at = None
+    for record in iter_log_records(client, log_filter):
+        if sampler.scanned >= MAX_SCANNED_ENTRIES:
+            stopped_at = record["timestamp"]
+            break
+        sampler.add(record)
+
+    stats = {}
+    if stopped_at is not None:
+        # Too long to stream through: fetch the real end of the execution newest first
+        newest = iter_log_records(client, log_filter, descending=True, max_results=sampler.tail_entries)
+        sampler.replace_tail(reversed(list(newest)))
+        # and the errors logged between the end of the scan and that tail
+        unscanned_errors = list(iter_unscanned_errors(client, job_name, execution_id, region, stopped_at, end_time,
+                                                      min_severity, contains, sampler.error_entries + 1))
+        for record in unscanned_errors:
+            sampler.add_unscanned_error(record)
+        stats = {"scan_stopped_at": stopped_at, "unscanned_errors_found": len(unscanned_errors)}
+
+    return {
+        "window": {"start_time": format_timestamp(start_time), "end_time": format_timestamp(end_time)},
+        "entries": sampler.records(),
+        "stats": {**sampler.stats(), "scan_complete": stopped_at is None, **stats},
+    }
@@ -1,5 +1,8 @@
 from .compute_utils import (
     list_vms,
     describe_vm,
-    monitor_vm
+    monitor_vm,
+    monitor_fleet_cpu,
+    analyze_vm_cpu,
+    get_vm_cpu_history
 )
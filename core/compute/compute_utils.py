@@ -1,27 +1,76 @@
+import math
 import re
-from datetime import datetime, timedelta
+from typing import Any, Optional
 
-from google.auth import default
-from google.cloud import monitoring_v3
-from googleapiclient import discovery
+from ..utils.client_pool import get_compute_service
+from .fleet_monitor import fetch_fleet_cpu, summarize_fleet
+from .inventory import list_instances
+from .metric_store import stored_fleet
 
+# Upper bound on points returned per VM by get_vm_cpu_history
+MAX_HISTORY_POINTS = 360
 
-def list_vms(project_number: str, zone_name: str) -> list[dict]:
+
+def parse_self_link(self_link: str) -> tuple[str, str, str]:
     """
-    List VMs across all zones.
-    
+    Split a VM self link into its project, zone and instance name
+
     Args:
-        project_number (str): GCP project number
-        zone_name (str): Zone to check for VMs
-    
+        self_link (str): Self link of a VM
+
     Returns:
-        list[dict]: A list of VMs in the requested zone and project. Each VM is represented as a dictionary.
+        tuple[str, str, str]: Project, zone and instance name
+
+    Raises:
+        ValueError: If self link is invalid
     """
-    credentials, _ = default()
-    service = discovery.build('compute', 'v1', credentials=credentials)
+    match = re.match(
+        r"https://www.googleapis.com/compute/v1/projects/([^/]+)/zones/([^/]+)/instances/([^/]+)",
+        self_link
+    )
+    if not match:
+        raise ValueError("Invalid VM selfLink format")
+
+    project, zone, instance_name = match.groups()
+    return project, zone, instance_name
 
-    result = service.instances().list(project=project_number, zone=zone_name).execute()
-    return result.get('items', [])
+
+def fleet_cpu(project_id: str, window_minutes: int, alignment_minutes: int = 1, zone_name: str = "",
+              instance_names: Optional[list[str]] = None) -> tuple[dict[str, dict[str, Any]], float]:
+    """
+    Get a fleet CPU snapshot from the local metric store when it covers the window, else from Cloud Monitoring
+
+    Args:
+        project_id (str): GCP project ID
+        window_minutes (int): Length of the window ending now
+        alignment_minutes (int): Alignment period when fetching from Cloud Monitoring
+        zone_name (str): Only include instances in this zone
+        instance_names (Optional[list[str]]): Only include these instances
+
+    Returns:
+        tuple[dict[str, dict[str, Any]], float]: Snapshot and minutes between its points
+    """
+    stored = stored_fleet(project_id, window_minutes, zone_name, instance_names)
+    if stored is not None:
+        return stored
+    fleet = fetch_fleet_cpu(project_id, window_minutes=window_minutes, alignment_minutes=alignment_minutes,
+                            zone_name=zone_name, instance_names=instance_names)
+    return fleet, alignment_minutes
+
+
+def list_vms(project_number: str, zone_name: str = "") -> list[dict]:
+    """
+    List VMs across all zones, or only in the given zones.
+
+    Args:
+        project_number (str): GCP project number
+        zone_name (str): Zone to check for VMs, several zones separated by commas, or empty for all zones
+
+    Returns:
+        list[dict]: A list of VMs with name, zone, status, machine_type and self_link.
+    """
+    zones = [zone.strip() for zone in zone_name.split(",") if zone.strip()]
+    return list_instances(project_number, zones)
 
 
 def describe_vm(self_link: str) -> dict:
@@ -37,17 +86,9 @@ def describe_vm(self_link: str) -> dict:
     Raises:
         ValueError: If self link is invalid
     """
-    match = re.match(
-        r"https://www.googleapis.com/compute/v1/projects/([^/]+)/zones/([^/]+)/instances/([^/]+)",
-        self_link
-    )
-    if not match:
-        raise ValueError("Invalid VM selfLink format")
-
-    project, zone, instance_name = match.groups()
+    project, zone, instance_name = parse_self_link(self_link)
 
-    credentials, _ = default()
-    service = discovery.build('compute', 'v1', credentials=credentials)
+    service = get_compute_service()
 
     request = service.instances().get(project=project, zone=zone, instance=instance_name)
     response = request.execute()
@@ -64,46 +105,84 @@ def monitor_vm(self_link: str) -> dict[str, dict[str, list]]:
     Returns:
         dict[str, dict[str, list]]: Mapping of instance name to an object with end_time and value arrays
     """
-    match = re.match(
-        r"https://www.googleapis.com/compute/v1/projects/([^/]+)/zones/([^/]+)/instances/([^/]+)",
-        self_link
-    )
-    if not match:
-        raise ValueError("Invalid VM selfLink format")
+    project_id, _, instance_name = parse_self_link(self_link)
 
-    project_id, zone, instance_name = match.groups()
+    # Served from the fleet snapshot so several VMs asked about in one turn cost one API call
+    fleet, _ = fleet_cpu(project_id, window_minutes=5)
+    if instance_name not in fleet:
+        return {}
+    series = fleet[instance_name]
+    return {instance_name: {"end_time": series["end_time"], "value": series["value"]}}
 
-    credentials, _ = default()
-    client = monitoring_v3.MetricServiceClient(credentials=credentials)
-    project_name = f"projects/{project_id}"
 
-    now = datetime.now()
-    interval = monitoring_v3.TimeInterval(
-        end_time={"seconds": int(now.timestamp())},
-        start_time={"seconds": int((now - timedelta(minutes=5)).timestamp())},
-    )
+def monitor_fleet_cpu(project_id: str, window_minutes: int = 5, zone_name: str = "", top_n: int = 20,
+                      anomalies_only: bool = False) -> dict[str, Any]:
+    """
+    Get CPU utilization summaries for all VMs in a project with a single monitoring request, hottest first
 
-    instance_filter = (
-        f'metric.type="compute.googleapis.com/instance/cpu/utilization" '
-        f'AND metric.labels.instance_name="{instance_name}"'
-    )
+    Args:
+        project_id (str): GCP project ID
+        window_minutes (int): How many minutes back to look
+        zone_name (str): Only include VMs in this zone, all zones if empty
+        top_n (int): Maximum number of VMs to return
+        anomalies_only (bool): Only return VMs whose latest utilization is anomalous for that VM
 
-    request = {
-        "name": project_name,
-        "filter": instance_filter,
-        "interval": interval,
-        "view": monitoring_v3.ListTimeSeriesRequest.TimeSeriesView.FULL
+    Returns:
+        dict[str, Any]: Window, number of VMs reporting and per-VM statistics of utilization (0-1):
+            mean, std, min, max, p50, p95, p99, last, max_rolling_mean, trend_per_hour, robust_z and anomaly flag
+    """
+    alignment_minutes = max(1, window_minutes // 60)
+    fleet, step_minutes = fleet_cpu(project_id, window_minutes, alignment_minutes, zone_name=zone_name)
+    return {
+        "window_minutes": window_minutes,
+        "alignment_minutes": step_minutes,
+        "instances_reporting": len(fleet),
+        "instances": summarize_fleet(fleet, top_n, step_minutes, anomalies_only),
     }
 
-    page_result = client.list_time_series(
-        request=request
-    )
 
-    metric_data = {}
-    for result in page_result:
-        instance_name = result.metric.labels["instance_name"]
-        metric_data[instance_name] = {"end_time": [], "value": []}
-        for point in result.points:
-            metric_data[instance_name]["end_time"].append(point.interval.end_time)
-            metric_data[instance_name]["value"].append(point.value.double_value)
-    return metric_data
+def analyze_vm_cpu(self_link: str, window_minutes: int = 60) -> dict[str, Any]:
+    """
+    Get CPU utilization statistics, trend and anomaly flag for one VM over a window
+
+    Args:
+        self_link (str): VM self link
+        window_minutes (int): How many minutes back to look
+
+    Returns:
+        dict[str, Any]: Statistics of utilization (0-1): mean, std, min, max, p50, p95, p99, last,
+            max_rolling_mean, trend_per_hour, robust_z and anomaly flag
+    """
+    project_id, _, instance_name = parse_self_link(self_link)
+
+    alignment_minutes = max(1, window_minutes // 60)
+    fleet, step_minutes = fleet_cpu(project_id, window_minutes, alignment_minutes, instance_names=[instance_name])
+    summaries = summarize_fleet(fleet, top_n=1, step_minutes=step_minutes)
+    if not summaries:
+        return {"instance_name": instance_name, "points": 0}
+    return {"window_minutes": window_minutes, **summaries[0]}
+
+
+def get_vm_cpu_history(self_link: str, window_minutes: int = 360) -> dict[str, Any]:
+    """
+    Get downsampled CPU utilization history for one VM, covering hours or days
+
+    Args:
+        self_link (str): VM self link
+        window_minutes (int): How many minutes back to look
+
+    Returns:
+        dict[str, Any]: Instance name, minutes between points and end_time and value (0-1) arrays, oldest first
+    """
+    project_id, _, instance_name = parse_self_link(self_link)
+
+    alignment_minutes = max(1, math.ceil(window_minutes / MAX_HISTORY_POINTS))
+    fleet, step_minutes = fleet_cpu(project_id, window_minutes, alignment_minutes, instance_names=[instance_name])
+    series = fleet.get(instance_name, {"end_time": [], "value": []})
+    return {
+        "instance_name": instance_name,
+        "window_minutes": window_minutes,
+        "step_minutes": step_minutes,
+        "end_time": series["end_time"],
+        "value": series["value"],
+    }
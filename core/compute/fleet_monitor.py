@@ -0,0 +1,138 @@
+"""
+Fleet-wide CPU monitoring with a single Cloud Monitoring request.
+
+Instead of one `list_time_series` call per VM, the CPU utilization of every
+instance in a project (optionally narrowed to a zone or a set of instance
+names) is fetched in one request. Points are aligned server-side
+(ALIGN_MEAN by default) so the response holds one point per alignment period
+per instance. Fleet snapshots are cached briefly, so many `monitor_vm` calls in
+the same turn are served from one fetch.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from ..cache import cached_tool
+from ..utils.client_pool import get_monitoring_async_client, get_monitoring_client
+from .metric_analytics import summarize_series_batch
+
+CPU_METRIC_TYPE = "compute.googleapis.com/instance/cpu/utilization"
+SNAPSHOT_TTL_SECONDS = 30
+
+
+def build_fleet_cpu_request(project_id: str, window_minutes: int = 5, alignment_minutes: int = 1,
+                            aligner: str = "ALIGN_MEAN", zone_name: str = "",
+                            instance_names: Optional[list[str]] = None) -> dict:
+    """
+    Build one list_time_series request covering the CPU utilization of a fleet
+
+    Args:
+        project_id (str): GCP project ID
+        window_minutes (int): Length of the window ending now
+        alignment_minutes (int): Alignment period for the server-side aligner
+        aligner (str): Per-series aligner name, e.g. ALIGN_MEAN, ALIGN_MAX, ALIGN_PERCENTILE_99
+        zone_name (str): Only include instances in this zone, all zones if empty
+        instance_names (Optional[list[str]]): Only include these instances
+
+    Returns:
+        dict: list_time_series request
+    """
+    from google.cloud import monitoring_v3
+
+    now = datetime.now()
+    interval = monitoring_v3.TimeInterval(
+        end_time={"seconds": int(now.timestamp())},
+        start_time={"seconds": int((now - timedelta(minutes=window_minutes)).timestamp())},
+    )
+
+    metric_filter = f'metric.type="{CPU_METRIC_TYPE}"'
+    if zone_name:
+        metric_filter += f' AND resource.labels.zone="{zone_name}"'
+    if instance_names:
+        names = ", ".join(f'"{name}"' for name in instance_names)
+        metric_filter += f" AND metric.labels.instance_name = one_of({names})"
+
+    aggregation = monitoring_v3.Aggregation(
+        alignment_period={"seconds": alignment_minutes * 60},
+        per_series_aligner=monitoring_v3.Aggregation.Aligner[aligner],
+    )
+
+    return {
+        "name": f"projects/{project_id}",
+        "filter": metric_filter,
+        "interval": interval,
+        "aggregation": aggregation,
+        "view": monitoring_v3.ListTimeSeriesRequest.TimeSeriesView.FULL
+    }
+
+
+def parse_fleet_time_series(time_series) -> dict[str, dict[str, Any]]:
+    """
+    Convert fleet CPU time series into per-instance point lists, oldest point first
+
+    Args:
+        time_series: Iterable of monitoring_v3.TimeSeries
+
+    Returns:
+        dict[str, dict[str, Any]]: Mapping of instance name to zone, end_time and value lists
+    """
+    fleet = {}
+    for result in time_series:
+        instance_name = result.metric.labels["instance_name"]
+        # The API returns points newest first
+        points = list(reversed(result.points))
+        fleet[instance_name] = {
+            "zone": result.resource.labels.get("zone", ""),
+            "end_time": [point.interval.end_time for point in points],
+            "value": [point.value.double_value for point in points],
+        }
+    return fleet
+
+
+def _fetch_fleet_cpu(project_id: str, window_minutes: int = 5, alignment_minutes: int = 1,
+                     aligner: str = "ALIGN_MEAN", zone_name: str = "",
+                     instance_names: Optional[list[str]] = None) -> dict[str, dict[str, Any]]:
+    client = get_monitoring_client()
+    page_result = client.list_time_series(request=build_fleet_cpu_request(
+        project_id, window_minutes, alignment_minutes, aligner, zone_name, instance_names
+    ))
+    return parse_fleet_time_series(page_result)
+
+
+async def _fetch_fleet_cpu_async(project_id: str, window_minutes: int = 5, alignment_minutes: int = 1,
+                                 aligner: str = "ALIGN_MEAN", zone_name: str = "",
+                                 instance_names: Optional[list[str]] = None) -> dict[str, dict[str, Any]]:
+    client = get_monitoring_async_client()
+    pager = await client.list_time_series(request=build_fleet_cpu_request(
+        project_id, window_minutes, alignment_minutes, aligner, zone_name, instance_names
+    ))
+    return parse_fleet_time_series([result async for result in pager])
+
+
+fetch_fleet_cpu = cached_tool(_fetch_fleet_cpu, ttl=SNAPSHOT_TTL_SECONDS)
+fetch_fleet_cpu_async = cached_tool(_fetch_fleet_cpu_async, ttl=SNAPSHOT_TTL_SECONDS)
+
+
+def summarize_fleet(fleet: dict[str, dict[str, Any]], top_n: int = 20, step_minutes: float = 1.0,
+                    anomalies_only: bool = False) -> list[dict[str, Any]]:
+    """
+    Summarize every instance of a fleet snapshot, hottest first
+
+    Args:
+        fleet (dict[str, dict[str, Any]]): Snapshot from fetch_fleet_cpu
+        top_n (int): Number of instances to return
+        step_minutes (float): Minutes between consecutive points of the snapshot
+        anomalies_only (bool): Only return instances whose latest point is anomalous
+
+    Returns:
+        list[dict[str, Any]]: Per-instance summaries sorted by mean utilization, highest first
+    """
+    stats = summarize_series_batch(
+        {name: series["value"] for name, series in fleet.items()}, step_minutes=step_minutes
+    )
+    summaries = [
+        {"instance_name": name, "zone": fleet[name]["zone"], **summary}
+        for name, summary in stats.items()
+        if summary.get("anomaly") or not anomalies_only
+    ]
+    summaries.sort(key=lambda summary: summary.get("mean") or -1.0, reverse=True)
+    return summaries[:top_n]
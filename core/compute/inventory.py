@@ -0,0 +1,112 @@
+"""
+VM inventory collection for Compute Engine.
+
+Instances are listed with `instances().aggregatedList` across every zone, or
+with `instances().list` concurrently for an explicit set of zones, following
+`nextPageToken` until all pages are read. Field masks limit the payload to the
+few attributes the bot needs, and every instance is projected to a compact
+record instead of the full multi-kilobyte resource.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from ..utils.client_pool import get_compute_service
+
+PAGE_SIZE = 500
+MAX_ZONE_WORKERS = 8
+
+_INSTANCE_FIELDS = "name,zone,status,machineType,selfLink"
+_LIST_FIELDS = f"items({_INSTANCE_FIELDS}),nextPageToken"
+_AGGREGATED_FIELDS = f"items/*/instances({_INSTANCE_FIELDS}),nextPageToken"
+
+# Shared so each worker thread keeps its discovery service and connections from client_pool across calls
+_executor = ThreadPoolExecutor(max_workers=MAX_ZONE_WORKERS, thread_name_prefix="compute-inventory")
+
+
+def project_instance(instance: dict[str, Any]) -> dict[str, str]:
+    """
+    Reduce an instance resource to the fields the bot reports
+
+    Args:
+        instance (dict[str, Any]): Compute Engine instance resource
+
+    Returns:
+        dict[str, str]: Name, zone, status, machine type and self link
+    """
+    return {
+        "name": instance.get("name", ""),
+        "zone": instance.get("zone", "").rsplit("/", 1)[-1],
+        "status": instance.get("status", ""),
+        "machine_type": instance.get("machineType", "").rsplit("/", 1)[-1],
+        "self_link": instance.get("selfLink", ""),
+    }
+
+
+def list_zone_instances(project: str, zone: str) -> list[dict[str, str]]:
+    """
+    List every instance in one zone, following all pages
+
+    Args:
+        project (str): GCP project ID or number
+        zone (str): Zone name
+
+    Returns:
+        list[dict[str, str]]: Compact instance records
+    """
+    instances = get_compute_service().instances()
+    request = instances.list(project=project, zone=zone, maxResults=PAGE_SIZE, fields=_LIST_FIELDS)
+
+    result = []
+    while request is not None:
+        response = request.execute()
+        result.extend(project_instance(instance) for instance in response.get("items", []))
+        request = instances.list_next(request, response)
+    return result
+
+
+def list_all_instances(project: str) -> list[dict[str, str]]:
+    """
+    List every instance in every zone with aggregatedList, following all pages
+
+    Args:
+        project (str): GCP project ID or number
+
+    Returns:
+        list[dict[str, str]]: Compact instance records
+    """
+    instances = get_compute_service().instances()
+    request = instances.aggregatedList(
+        project=project, maxResults=PAGE_SIZE, fields=_AGGREGATED_FIELDS, returnPartialSuccess=True
+    )
+
+    result = []
+    while request is not None:
+        response = request.execute()
+        for scoped_list in response.get("items", {}).values():
+            result.extend(project_instance(instance) for instance in scoped_list.get("instances", []))
+        request = instances.aggregatedList_next(request, response)
+    return result
+
+
+def list_instances(project: str, zones: Optional[list[str]] = None) -> list[dict[str, str]]:
+    """
+    List instances in the given zones, or in every zone when none are given
+
+    Explicit zones are fetched concurrently.
+
+    Args:
+        project (str): GCP project ID or number
+        zones (Optional[list[str]]): Zones to list, all zones if empty
+
+    Returns:
+        list[dict[str, str]]: Compact instance records sorted by zone and name
+    """
+    if not zones:
+        instances = list_all_instances(project)
+    elif len(zones) == 1:
+        instances = list_zone_instances(project, zones[0])
+    else:
+        per_zone = _executor.map(lambda zone: list_zone_instances(project, zone), zones)
+        instances = [instance for zone_instances in per_zone for instance in zone_instances]
+
+    return sorted(instances, key=lambda instance: (instance["zone"], instance["name"]))
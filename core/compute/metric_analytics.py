@@ -0,0 +1,200 @@
+"""
+Vectorized analytics for Cloud Monitoring time series.
+
+Series for a whole fleet are packed into one NaN-padded NumPy matrix
+(instances x points, right-aligned so the latest points share a column) and
+every statistic is computed across all instances at once: summary statistics,
+percentiles, rolling means, linear trend and anomaly flags for the latest
+point (z-score and median absolute deviation). Only the compact per-instance
+summary is handed to the model.
+"""
+import warnings
+from typing import Any
+
+import numpy as np
+
+DEFAULT_ROLLING_WINDOW = 5
+DEFAULT_ANOMALY_THRESHOLD = 3.5
+# Scales the MAD so the robust z-score is comparable to a standard z-score
+_MAD_SCALE = 0.6745
+
+
+def series_to_matrix(series: dict[str, list[float]]) -> tuple[list[str], np.ndarray]:
+    """
+    Pack per-instance value lists into a right-aligned, NaN-padded matrix
+
+    Args:
+        series (dict[str, list[float]]): Mapping of instance name to values, oldest first
+
+    Returns:
+        tuple[list[str], np.ndarray]: Instance names and a float64 matrix of shape (instances, points)
+    """
+    names = list(series)
+    width = max((len(values) for values in series.values()), default=0)
+    matrix = np.full((len(names), width), np.nan)
+    for row, name in enumerate(names):
+        values = series[name]
+        if values:
+            matrix[row, width - len(values):] = values
+    return names, matrix
+
+
+def nan_percentiles(matrix: np.ndarray, percentiles: list[float]) -> list[np.ndarray]:
+    """
+    Linear-interpolated percentiles of each row, ignoring missing points
+
+    Sorting once and indexing by each row's point count is much faster than
+    np.nanpercentile on large matrices.
+
+    Args:
+        matrix (np.ndarray): Matrix of shape (instances, points)
+        percentiles (list[float]): Percentiles between 0 and 100
+
+    Returns:
+        list[np.ndarray]: One array per percentile, NaN for rows without points
+    """
+    ordered = np.sort(matrix, axis=1)  # NaN sorts last
+    counts = (~np.isnan(matrix)).sum(axis=1)
+    last_index = np.maximum(counts - 1, 0)
+    results = []
+    for percentile in percentiles:
+        position = last_index * (percentile / 100.0)
+        lower = np.floor(position).astype(int)[:, None]
+        upper = np.ceil(position).astype(int)[:, None]
+        fraction = position - lower[:, 0]
+        if ordered.shape[1] == 0:
+            results.append(np.full(matrix.shape[0], np.nan))
+            continue
+        low_values = np.take_along_axis(ordered, lower, axis=1)[:, 0]
+        high_values = np.take_along_axis(ordered, upper, axis=1)[:, 0]
+        value = low_values + (high_values - low_values) * fraction
+        results.append(np.where(counts > 0, value, np.nan))
+    return results
+
+
+def rolling_mean(matrix: np.ndarray, window: int = DEFAULT_ROLLING_WINDOW) -> np.ndarray:
+    """
+    Rolling mean along each row, ignoring missing points
+
+    Args:
+        matrix (np.ndarray): Matrix of shape (instances, points)
+        window (int): Number of points per window
+
+    Returns:
+        np.ndarray: Matrix of shape (instances, points - window + 1), NaN where a window has no data
+    """
+    if matrix.shape[1] < window:
+        return np.full((matrix.shape[0], 0), np.nan)
+    present = ~np.isnan(matrix)
+    sums = np.cumsum(np.where(present, matrix, 0.0), axis=1)
+    counts = np.cumsum(present, axis=1)
+    sums = np.concatenate([np.zeros((matrix.shape[0], 1)), sums], axis=1)
+    counts = np.concatenate([np.zeros((matrix.shape[0], 1)), counts], axis=1)
+    window_sums = sums[:, window:] - sums[:, :-window]
+    window_counts = counts[:, window:] - counts[:, :-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+
+def linear_trend(matrix: np.ndarray) -> np.ndarray:
+    """
+    Least-squares slope of each row per point, ignoring missing points
+
+    Args:
+        matrix (np.ndarray): Matrix of shape (instances, points)
+
+    Returns:
+        np.ndarray: Slope per row, NaN for rows with fewer than two points
+    """
+    present = ~np.isnan(matrix)
+    counts = present.sum(axis=1)
+    x = np.broadcast_to(np.arange(matrix.shape[1], dtype=float), matrix.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(present, x, 0.0).sum(axis=1) / counts
+        y_mean = np.where(present, matrix, 0.0).sum(axis=1) / counts
+        dx = np.where(present, x - x_mean[:, None], 0.0)
+        dy = np.where(present, matrix - y_mean[:, None], 0.0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    return np.where(counts >= 2, slope, np.nan)
+
+
+def analyze_matrix(matrix: np.ndarray, step_minutes: float = 1.0, rolling_window: int = DEFAULT_ROLLING_WINDOW,
+                   anomaly_threshold: float = DEFAULT_ANOMALY_THRESHOLD) -> dict[str, np.ndarray]:
+    """
+    Compute summary statistics for every row of a fleet matrix at once
+
+    Args:
+        matrix (np.ndarray): Right-aligned matrix of shape (instances, points)
+        step_minutes (float): Minutes between consecutive points
+        rolling_window (int): Points per rolling-mean window
+        anomaly_threshold (float): Robust z-score above which the latest point is flagged
+
+    Returns:
+        dict[str, np.ndarray]: One array per statistic, each with one entry per row
+    """
+    with warnings.catch_warnings():
+        # All-NaN rows (instances without points) legitimately produce NaN statistics
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        points = (~np.isnan(matrix)).sum(axis=1)
+        mean = np.nanmean(matrix, axis=1)
+        std = np.nanstd(matrix, axis=1)
+        p50, p95, p99 = nan_percentiles(matrix, [50, 95, 99])
+        last = matrix[:, -1] if matrix.shape[1] else np.full(matrix.shape[0], np.nan)
+        mad = nan_percentiles(np.abs(matrix - p50[:, None]), [50])[0]
+
+        rolling = rolling_mean(matrix, min(rolling_window, max(1, matrix.shape[1])))
+        max_rolling = np.nanmax(rolling, axis=1) if rolling.shape[1] else np.full(matrix.shape[0], np.nan)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z_score = np.where(std > 0, (last - mean) / std, 0.0)
+            robust_z = np.where(mad > 0, _MAD_SCALE * (last - p50) / mad, 0.0)
+
+        return {
+            "points": points,
+            "mean": mean,
+            "std": std,
+            "min": np.nanmin(matrix, axis=1),
+            "max": np.nanmax(matrix, axis=1),
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "last": last,
+            "max_rolling_mean": max_rolling,
+            "trend_per_hour": linear_trend(matrix) * (60.0 / step_minutes),
+            "z_score": z_score,
+            "robust_z": robust_z,
+            "anomaly": np.abs(robust_z) > anomaly_threshold,
+        }
+
+
+def summarize_series_batch(series: dict[str, list[float]], step_minutes: float = 1.0,
+                           rolling_window: int = DEFAULT_ROLLING_WINDOW,
+                           anomaly_threshold: float = DEFAULT_ANOMALY_THRESHOLD) -> dict[str, dict[str, Any]]:
+    """
+    Summarize many series in one vectorized pass
+
+    Args:
+        series (dict[str, list[float]]): Mapping of instance name to values, oldest first
+        step_minutes (float): Minutes between consecutive points
+        rolling_window (int): Points per rolling-mean window
+        anomaly_threshold (float): Robust z-score above which the latest point is flagged
+
+    Returns:
+        dict[str, dict[str, Any]]: Compact rounded summary per instance
+    """
+    names, matrix = series_to_matrix(series)
+    stats = analyze_matrix(matrix, step_minutes, rolling_window, anomaly_threshold)
+
+    summaries = {}
+    for row, name in enumerate(names):
+        if stats["points"][row] == 0:
+            summaries[name] = {"points": 0}
+            continue
+        summary = {"points": int(stats["points"][row])}
+        for key in ("mean", "std", "min", "max", "p50", "p95", "p99", "last",
+                    "max_rolling_mean", "trend_per_hour", "robust_z"):
+            value = stats[key][row]
+            summary[key] = None if np.isnan(value) else round(float(value), 4)
+        summary["anomaly"] = bool(stats["anomaly"][row])
+        summaries[name] = summary
+    return summaries
@@ -0,0 +1,371 @@
+"""
+In-memory metric store for the VM fleet, fed by an optional background collector.
+
+Each instance/metric pair keeps fixed-size ring buffers backed by `array`
+(8-byte timestamps and 8-byte doubles per point) at three resolutions:
+1 minute, 10 minutes and 1 hour. New 1-minute points are rolled up into the
+coarser tiers as their buckets complete, so memory stays bounded while
+history covers hours (1m), days (10m) and weeks (1h). When the collector is
+running, CPU tools answer from memory instead of calling Cloud Monitoring.
+"""
+import logging
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from .fleet_monitor import CPU_METRIC_TYPE, _fetch_fleet_cpu
+
+logger = logging.getLogger(__name__)
+
+# Tier step in seconds -> number of points kept
+TIER_CAPACITIES = {
+    60: 360,      # 6 hours of 1-minute points
+    600: 432,     # 3 days of 10-minute points
+    3600: 720,    # 30 days of 1-hour points
+}
+# Longest window the tiers can answer; longer ones go to Cloud Monitoring
+MAX_WINDOW_SECONDS = max(step * capacity for step, capacity in TIER_CAPACITIES.items())
+BACKFILL_MINUTES = 60
+COLLECTOR_INTERVAL_SECONDS = float(os.environ.get("METRIC_COLLECTOR_INTERVAL_SECONDS", "60"))
+# Stored history is only trusted while the last successful poll is at most this many intervals old
+FRESH_POLL_INTERVALS = 2
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of (timestamp, value) points, oldest overwritten first
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._timestamps = array("q", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: int, value: float) -> None:
+        """
+        Append a point, overwriting the oldest one when full
+
+        Args:
+            timestamp (int): Point time in epoch seconds
+            value (float): Point value
+        """
+        index = (self._start + self._size) % self.capacity
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def last_timestamp(self) -> Optional[int]:
+        if not self._size:
+            return None
+        return self._timestamps[(self._start + self._size - 1) % self.capacity]
+
+    def first_timestamp(self) -> Optional[int]:
+        return self._timestamps[self._start] if self._size else None
+
+    def since(self, timestamp: int) -> tuple[list[int], list[float]]:
+        """
+        Get points at or after a time, oldest first
+
+        Args:
+            timestamp (int): Earliest point time in epoch seconds
+
+        Returns:
+            tuple[list[int], list[float]]: Timestamps and values
+        """
+        timestamps, values = [], []
+        for offset in range(self._size):
+            index = (self._start + offset) % self.capacity
+            if self._timestamps[index] >= timestamp:
+                timestamps.append(self._timestamps[index])
+                values.append(self._values[index])
+        return timestamps, values
+
+
+class TieredSeries:
+    """
+    One metric of one instance at 1-minute, 10-minute and 1-hour resolution
+    """
+
+    def __init__(self, zone: str = ""):
+        self.zone = zone
+        self.last_seen = time.time()
+        self.tiers = {step: RingBuffer(capacity) for step, capacity in TIER_CAPACITIES.items()}
+        # Open roll-up bucket per coarse tier: [bucket start, sum, count]
+        self._pending = {step: [None, 0.0, 0] for step in TIER_CAPACITIES if step != 60}
+
+    def append(self, timestamp: int, value: float) -> None:
+        """
+        Add a 1-minute point and roll it up into the coarser tiers
+
+        Args:
+            timestamp (int): Point time in epoch seconds
+            value (float): Point value
+        """
+        last = self.tiers[60].last_timestamp()
+        if last is not None and timestamp <= last:
+            return
+        self.tiers[60].append(timestamp, value)
+
+        for step, pending in self._pending.items():
+            bucket = timestamp - timestamp % step
+            if pending[0] is not None and bucket != pending[0]:
+                self.tiers[step].append(pending[0], pending[1] / pending[2])
+                pending[:] = [None, 0.0, 0]
+            if pending[0] is None:
+                pending[0] = bucket
+            pending[1] += value
+            pending[2] += 1
+
+    def query(self, window_seconds: int) -> tuple[list[int], list[float], int]:
+        """
+        Get the points of the finest tier that covers the window
+
+        Args:
+            window_seconds (int): Length of the window ending now
+
+        Returns:
+            tuple[list[int], list[float], int]: Timestamps, values and tier step in seconds
+        """
+        since = int(time.time()) - window_seconds
+        for step in sorted(self.tiers):
+            if step * self.tiers[step].capacity >= window_seconds:
+                break
+        timestamps, values = self.tiers[step].since(since)
+        return timestamps, values, step
+
+
+class MetricStore:
+    """
+    Thread-safe collection of tiered series keyed by project, metric and instance
+    """
+
+    def __init__(self):
+        self._series: dict[tuple[str, str, str], TieredSeries] = {}
+        self._coverage_start: dict[str, float] = {}
+        self._fresh_until: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, project_id: str, metric_type: str, fleet: dict[str, dict[str, Any]],
+               evict_after: Optional[float] = None) -> None:
+        """
+        Store a fleet snapshot of 1-minute aligned points
+
+        Args:
+            project_id (str): GCP project ID
+            metric_type (str): Metric type the snapshot belongs to
+            fleet (dict[str, dict[str, Any]]): Snapshot as returned by fetch_fleet_cpu
+            evict_after (Optional[float]): Drop instances of the project missing from snapshots for longer
+                than this many seconds, e.g. deleted VMs; None keeps them
+        """
+        now = time.time()
+        with self._lock:
+            for instance_name, series in fleet.items():
+                key = (project_id, metric_type, instance_name)
+                stored = self._series.get(key)
+                if stored is None:
+                    stored = self._series[key] = TieredSeries(series["zone"])
+                stored.last_seen = now
+                for end_time, value in zip(series["end_time"], series["value"]):
+                    stored.append(int(end_time.timestamp()), value)
+
+            if evict_after is not None:
+                for key in [key for key, stored in self._series.items()
+                            if key[:2] == (project_id, metric_type) and now - stored.last_seen > evict_after]:
+                    del self._series[key]
+
+    def mark_coverage(self, project_id: str, since: float, interval_seconds: float) -> None:
+        """
+        Record a successful poll
+
+        Args:
+            project_id (str): GCP project ID
+            since (float): Start of the window the poll fetched, in epoch seconds
+            interval_seconds (float): Seconds until the next poll
+        """
+        with self._lock:
+            self._coverage_start.setdefault(project_id, since)
+            self._fresh_until[project_id] = time.time() + FRESH_POLL_INTERVALS * interval_seconds
+
+    def clear_coverage(self, project_id: str) -> None:
+        """
+        Stop answering from a project's history, e.g. once its collector stops
+
+        Args:
+            project_id (str): GCP project ID
+        """
+        with self._lock:
+            self._coverage_start.pop(project_id, None)
+            self._fresh_until.pop(project_id, None)
+
+    def covers(self, project_id: str, window_seconds: int) -> bool:
+        """
+        Check whether collected history reaches back far enough for a window and is up to date
+
+        Windows longer than the coarsest tier holds are never covered.
+
+        Args:
+            project_id (str): GCP project ID
+            window_seconds (int): Length of the window ending now
+
+        Returns:
+            bool: True if the store can answer the window
+        """
+        if window_seconds > MAX_WINDOW_SECONDS:
+            return False
+        now = time.time()
+        with self._lock:
+            start = self._coverage_start.get(project_id)
+            fresh_until = self._fresh_until.get(project_id, 0.0)
+        return start is not None and start <= now - window_seconds and now <= fresh_until
+
+    def fleet(self, project_id: str, metric_type: str, window_seconds: int, zone_name: str = "",
+              instance_names: Optional[list[str]] = None) -> tuple[dict[str, dict[str, Any]], int]:
+        """
+        Read a fleet snapshot from memory in the same shape as fetch_fleet_cpu
+
+        Args:
+            project_id (str): GCP project ID
+            metric_type (str): Metric type
+            window_seconds (int): Length of the window ending now
+            zone_name (str): Only include instances in this zone
+            instance_names (Optional[list[str]]): Only include these instances
+
+        Returns:
+            tuple[dict[str, dict[str, Any]], int]: Snapshot and the step of its points in seconds
+        """
+        fleet, step = {}, 60
+        with self._lock:
+            for (project, metric, instance_name), series in self._series.items():
+                if project != project_id or metric != metric_type:
+                    continue
+                if zone_name and series.zone != zone_name:
+                    continue
+                if instance_names and instance_name not in instance_names:
+                    continue
+                timestamps, values, step = series.query(window_seconds)
+                fleet[instance_name] = {
+                    "zone": series.zone,
+                    "end_time": [datetime.fromtimestamp(timestamp, timezone.utc) for timestamp in timestamps],
+                    "value": values,
+                }
+        return fleet, step
+
+
+class FleetCollector(threading.Thread):
+    """
+    Background thread that polls fleet CPU utilization into a MetricStore
+    """
+
+    def __init__(self, store: MetricStore, project_id: str, interval_seconds: float = COLLECTOR_INTERVAL_SECONDS):
+        super().__init__(name="fleet-metric-collector", daemon=True)
+        self.store = store
+        self.project_id = project_id
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._last_poll: Optional[float] = None
+
+    def poll(self) -> None:
+        """
+        Fetch everything since the previous poll (with a little overlap) into the store
+        """
+        now = time.time()
+        if self._last_poll is None:
+            window_minutes = BACKFILL_MINUTES
+        else:
+            window_minutes = int((now - self._last_poll) // 60) + 2
+        fleet = _fetch_fleet_cpu(self.project_id, window_minutes=window_minutes)
+        if self._stop_event.is_set():
+            # Stopped during the fetch, coverage has been cleared already
+            return
+        # An instance absent from every poll for a whole interval is gone, e.g. deleted
+        self.store.record(self.project_id, CPU_METRIC_TYPE, fleet, evict_after=self.interval_seconds)
+        self.store.mark_coverage(self.project_id, now - window_minutes * 60, self.interval_seconds)
+        self._last_poll = now
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Fleet metric poll failed")
+            self._stop_event.wait(self.interval_seconds)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+_store = MetricStore()
+_collectors: dict[str, FleetCollector] = {}
+_collectors_lock = threading.Lock()
+
+
+def get_metric_store() -> MetricStore:
+    """
+    Get the process-wide metric store
+
+    Returns:
+        MetricStore: Shared store
+    """
+    return _store
+
+
+def start_collector(project_id: str, interval_seconds: float = COLLECTOR_INTERVAL_SECONDS) -> FleetCollector:
+    """
+    Start polling a project's fleet in the background, if not already running
+
+    Args:
+        project_id (str): GCP project ID
+        interval_seconds (float): Seconds between polls
+
+    Returns:
+        FleetCollector: Running collector
+    """
+    with _collectors_lock:
+        collector = _collectors.get(project_id)
+        if collector is None or not collector.is_alive():
+            collector = _collectors[project_id] = FleetCollector(_store, project_id, interval_seconds)
+            collector.start()
+        return collector
+
+
+def stop_collectors() -> None:
+    """
+    Stop every background collector, tools then query Cloud Monitoring again
+    """
+    with _collectors_lock:
+        for project_id, collector in _collectors.items():
+            collector.stop()
+            _store.clear_coverage(project_id)
+        _collectors.clear()
+
+
+def stored_fleet(project_id: str, window_minutes: int, zone_name: str = "",
+                 instance_names: Optional[list[str]] = None) -> Optional[tuple[dict[str, dict[str, Any]], float]]:
+    """
+    Get a CPU fleet snapshot from memory if recently polled history covers the window
+
+    Args:
+        project_id (str): GCP project ID
+        window_minutes (int): Length of the window ending now
+        zone_name (str): Only include instances in this zone
+        instance_names (Optional[list[str]]): Only include these instances
+
+    Returns:
+        Optional[tuple[dict[str, dict[str, Any]], float]]: Snapshot and minutes between points, or None
+    """
+    window_seconds = window_minutes * 60
+    if not _store.covers(project_id, window_seconds):
+        return None
+    fleet, step = _store.fleet(project_id, CPU_METRIC_TYPE, window_seconds, zone_name, instance_names)
+    return fleet, step / 60
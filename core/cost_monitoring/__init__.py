@@ -2,6 +2,6 @@ from .cost_utils import (
     get_current_month_costs,
     get_cost_by_service,
     get_cost_trends,
-    check_budget_alerts,
     get_resource_costs,
+    get_cost_breakdown,
 )
\ No newline at end of file
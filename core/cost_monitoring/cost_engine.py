@@ -0,0 +1,199 @@
+"""
+Single-pass cost engine over the Cloud Billing export.
+
+Instead of one scan of `gcp_billing_export_v1_*` per cost tool, one query
+aggregates the export into a compact day x service x SKU x currency cube for
+the whole window (at least `MIN_CUBE_DAYS`, so month-to-date and 30-day
+questions share it). The cube is cached on disk by the query cache and in
+memory per cache bucket, and every cost question is answered from it with
+pandas group-bys. pandas is imported with the first cube, not with the tools.
+"""
+import threading
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import TYPE_CHECKING, Optional
+
+from ..bigquery.query_planning import run_planned_query, scalar_param, split_window
+from ..utils.client_pool import get_bigquery_client
+
+# Billing export data only lands a few times a day
+BILLING_CACHE_BUCKET_SECONDS = 3 * 3600
+# Covers month-to-date plus the default 30-day lookbacks
+MIN_CUBE_DAYS = 35
+# Billing rows are exported up to this long after their usage ended
+EXPORT_DELAY_DAYS = 7
+
+CUBE_COLUMNS = ["usage_date", "service", "sku", "currency", "cost"]
+# Names accepted for cube dimensions in rollups
+DIMENSIONS = {"day": "usage_date", "date": "usage_date", "service": "service", "sku": "sku", "currency": "currency"}
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from google.cloud import bigquery
+
+_cubes: dict[tuple[str, int], tuple[int, "pd.DataFrame"]] = {}
+_cubes_lock = threading.Lock()
+
+
+def cube_window_days(days: int) -> int:
+    """
+    Get the cube window able to answer a lookback, so nearby lookbacks share one cube
+
+    Args:
+        days (int): Requested lookback in days
+
+    Returns:
+        int: Window of the cube in days
+    """
+    return max(MIN_CUBE_DAYS, days + 1)
+
+
+def build_cube_query(project_id: str, start_date: date,
+                     end_date: date) -> tuple[str, list["bigquery.ScalarQueryParameter"]]:
+    """
+    Build the day x service x SKU aggregate query
+
+    Only the columns of the cube are read, and both the partition column and
+    usage_start_time are compared raw against parameters so partitions outside
+    the window are pruned. Rows are exported after their usage, so partitions
+    are read up to EXPORT_DELAY_DAYS past the end of the window; this lets an
+    over-budget window be split into narrower ones that each scan less.
+
+    Args:
+        project_id (str): GCP project ID holding the billing export
+        start_date (date): First usage day included
+        end_date (date): First usage day excluded
+
+    Returns:
+        tuple[str, list[bigquery.ScalarQueryParameter]]: Standard SQL query and its parameters
+    """
+    query = f"""
+    SELECT
+        DATE(usage_start_time) AS usage_date,
+        service.description AS service,
+        sku.description AS sku,
+        currency,
+        SUM(cost) AS cost
+    FROM `{project_id}.billing_export.gcp_billing_export_v1_*`
+    WHERE _PARTITIONTIME >= @start_time
+        AND _PARTITIONTIME < TIMESTAMP_ADD(@end_time, INTERVAL {EXPORT_DELAY_DAYS} DAY)
+        AND usage_start_time >= @start_time
+        AND usage_start_time < @end_time
+    GROUP BY usage_date, service, sku, currency
+    """
+    start_time = datetime.combine(start_date, dt_time.min, timezone.utc)
+    end_time = datetime.combine(end_date, dt_time.min, timezone.utc)
+    return query, [scalar_param("start_time", start_time), scalar_param("end_time", end_time)]
+
+
+def get_cost_cube(project_id: str, days: int = 30) -> "pd.DataFrame":
+    """
+    Get the cost cube covering at least the last n days
+
+    Args:
+        project_id (str): GCP project ID
+        days (int): Lookback the cube must cover
+
+    Returns:
+        pd.DataFrame: One row per usage date, service, SKU and currency with the summed cost
+    """
+    window_days = cube_window_days(days)
+    bucket = int(time.time() // BILLING_CACHE_BUCKET_SECONDS)
+    key = (project_id, window_days)
+
+    with _cubes_lock:
+        # Any fresh cube with a window at least as long can answer
+        for (cached_project, cached_days), (cached_bucket, cube) in _cubes.items():
+            if cached_project == project_id and cached_days >= window_days and cached_bucket == bucket:
+                return cube
+
+    # usage_date is the UTC day of usage_start_time
+    today = datetime.now(timezone.utc).date()
+    query, params = build_cube_query(project_id, today - timedelta(days=window_days), today + timedelta(days=1))
+    # Rows are grouped by day, so a window above the budget can be fetched as narrower day-aligned windows
+    rows = run_planned_query(get_bigquery_client(project_id), query, params, BILLING_CACHE_BUCKET_SECONDS,
+                             split=split_window())
+
+    import pandas as pd
+    cube = pd.DataFrame.from_records(rows, columns=CUBE_COLUMNS)
+    cube["usage_date"] = pd.to_datetime(cube["usage_date"])
+    cube["cost"] = pd.to_numeric(cube["cost"], errors="coerce").fillna(0.0)
+    cube["service"] = cube["service"].fillna("Unknown")
+    cube["sku"] = cube["sku"].fillna("Unknown")
+
+    with _cubes_lock:
+        _cubes[key] = (bucket, cube)
+    return cube
+
+
+def since(cube: "pd.DataFrame", start: datetime) -> "pd.DataFrame":
+    """
+    Get the cube rows used on or after a day
+
+    Args:
+        cube (pd.DataFrame): Cost cube
+        start (datetime): First day included, taken as UTC when naive
+
+    Returns:
+        pd.DataFrame: Filtered cube
+    """
+    import pandas as pd
+    start = pd.Timestamp(start)
+    if start.tzinfo is not None:
+        # usage_date holds naive UTC days
+        start = start.tz_convert("UTC").tz_localize(None)
+    return cube[cube["usage_date"] >= start.normalize()]
+
+
+def matching(cube: "pd.DataFrame", text: str) -> "pd.DataFrame":
+    """
+    Get the cube rows whose service or SKU contains a text, case-insensitively
+
+    Args:
+        cube (pd.DataFrame): Cost cube
+        text (str): Text to look for
+
+    Returns:
+        pd.DataFrame: Filtered cube
+    """
+    mask = (cube["service"].str.contains(text, case=False, regex=False)
+            | cube["sku"].str.contains(text, case=False, regex=False))
+    return cube[mask]
+
+
+def rollup(cube: "pd.DataFrame", by: list[str], limit: Optional[int] = None,
+           sort_by_cost: bool = True) -> "pd.DataFrame":
+    """
+    Sum cost over any combination of cube dimensions
+
+    Args:
+        cube (pd.DataFrame): Cost cube
+        by (list[str]): Dimensions to group by, e.g. ["service"] or ["usage_date", "service"]
+        limit (Optional[int]): Keep only the most expensive groups
+        sort_by_cost (bool): Most expensive first, otherwise ordered by the dimensions
+
+    Returns:
+        pd.DataFrame: One row per group with a cost column
+    """
+    grouped = cube.groupby(by, as_index=False, sort=not sort_by_cost)["cost"].sum()
+    if sort_by_cost:
+        grouped = grouped.sort_values("cost", ascending=False)
+    return grouped.head(limit) if limit else grouped
+
+
+def month_to_date_total(cube: "pd.DataFrame") -> tuple[float, str]:
+    """
+    Get the total cost of the current month in its main currency
+
+    Args:
+        cube (pd.DataFrame): Cost cube covering the current month
+
+    Returns:
+        tuple[float, str]: Total cost and currency
+    """
+    month_start = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    totals = rollup(since(cube, month_start), ["currency"])
+    if totals.empty:
+        return 0.0, "USD"
+    top = totals.iloc[0]
+    return float(top["cost"]), top["currency"]
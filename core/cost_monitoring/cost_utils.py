@@ -4,17 +4,15 @@ Simple cost monitoring utilities for GCP projects.
 This module provides basic cost tracking functionality using Google Cloud APIs.
 """
 
-import os
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
-from dataclasses import dataclass
-
-from google.auth import default
-from google.cloud import billing_v1
-
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
 
+from ..bigquery.query_planning import billed_tool
+from ..utils.client_pool import get_billing_client
+from .cost_engine import DIMENSIONS, get_cost_cube, matching, month_to_date_total, rollup, since
 
 
+@billed_tool
 def get_current_month_costs(project_id: str) -> Dict[str, Any]:
     """
     Get current month's total costs for a project
@@ -26,57 +24,37 @@ def get_current_month_costs(project_id: str) -> Dict[str, Any]:
         Dict[str, Any]: Current month cost information
     """
     try:
-        credentials, _ = default()
-        billing_client = billing_v1.CloudBillingClient(credentials=credentials)
+        billing_client = get_billing_client()
         
         # Get billing account info
         project_name_full = f"projects/{project_id}"
         project = billing_client.get_project_billing_info(name=project_name_full)
-        
-        # Try to get real cost data from BigQuery billing export
-        try:
-            from google.cloud import bigquery
-            bq_client = bigquery.Client(credentials=credentials, project=project_id)
-            
-            now = datetime.now()
-            month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            query = f"""
-            SELECT SUM(cost) as total_cost, currency
-            FROM `{project_id}.billing_export.gcp_billing_export_v1_*`
-            WHERE _PARTITIONTIME >= TIMESTAMP('{month_start.strftime('%Y-%m-%d')}')
-            GROUP BY currency
-            """
-            
-            query_job = bq_client.query(query)
-            results = query_job.result()
-            
-            total_cost = 0.0
-            currency = "USD"
-            for row in results:
-                total_cost = float(row.total_cost) if row.total_cost else 0.0
-                currency = row.currency if row.currency else "USD"
-                break
-            
-            return {
-                "total_cost": total_cost,
-                "currency": currency,
-                "billing_account": project.billing_account_name
-            }
-            
-        except Exception:
-            # If BigQuery fails, return basic billing info
-            return {
-                "total_cost": 0.0,
-                "currency": "USD",
-                "billing_account": project.billing_account_name,
-                "note": "Enable billing export for cost data"
-            }
-        
     except Exception as e:
         return {"error": f"Could not access billing: {str(e)}"}
 
+    from google.api_core.exceptions import NotFound
+
+    # Try to get real cost data from BigQuery billing export
+    try:
+        total_cost, currency = month_to_date_total(get_cost_cube(project_id))
+    except NotFound:
+        # Only a missing export table means there is no cost data; other failures are not a cost of zero
+        return {
+            "total_cost": None,
+            "billing_account": project.billing_account_name,
+            "note": "Enable billing export for cost data"
+        }
+    except Exception as e:
+        return {"billing_account": project.billing_account_name, "error": f"Could not read billing export: {str(e)}"}
+
+    return {
+        "total_cost": total_cost,
+        "currency": currency,
+        "billing_account": project.billing_account_name
+    }
 
+
+@billed_tool
 def get_cost_by_service(project_id: str, days: int = 30) -> List[Dict[str, Any]]:
     """
     Get costs broken down by GCP service
@@ -89,41 +67,19 @@ def get_cost_by_service(project_id: str, days: int = 30) -> List[Dict[str, Any]]
         List[Dict[str, Any]]: Cost breakdown by service
     """
     try:
-        credentials, _ = default()
-        from google.cloud import bigquery
-        
-        bq_client = bigquery.Client(credentials=credentials, project=project_id)
+        start_date = datetime.now(timezone.utc) - timedelta(days=days)
+        services = rollup(since(get_cost_cube(project_id, days), start_date), ["service"])
         
-        # Simple query for service costs
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        query = f"""
-        SELECT 
-            service.description as service_name,
-            SUM(cost) as total_cost
-        FROM `{project_id}.billing_export.gcp_billing_export_v1_*`
-        WHERE _PARTITIONTIME >= TIMESTAMP('{start_date.strftime('%Y-%m-%d')}')
-        GROUP BY service_name
-        ORDER BY total_cost DESC
-        """
-        
-        query_job = bq_client.query(query)
-        results = query_job.result()
-        
-        service_costs = []
-        for row in results:
-            service_costs.append({
-                "service": row.service_name,
-                "cost": round(float(row.total_cost), 2) if row.total_cost else 0.0
-            })
-        
-        return service_costs
+        return [
+            {"service": row.service, "cost": round(float(row.cost), 2)}
+            for row in services.itertuples(index=False)
+        ]
         
     except Exception as e:
         return [{"service": "Error", "cost": 0.0, "error": str(e)}]
 
 
+@billed_tool
 def get_cost_trends(project_id: str, days: int = 30) -> List[Dict[str, Any]]:
     """
     Get daily cost trends for the specified period
@@ -136,84 +92,78 @@ def get_cost_trends(project_id: str, days: int = 30) -> List[Dict[str, Any]]:
         List[Dict[str, Any]]: Daily cost data
     """
     try:
-        credentials, _ = default()
-        from google.cloud import bigquery
-        
-        bq_client = bigquery.Client(credentials=credentials, project=project_id)
-        
-        # Simple query for daily costs
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        query = f"""
-        SELECT 
-            DATE(usage_start_time) as usage_date,
-            SUM(cost) as daily_cost
-        FROM `{project_id}.billing_export.gcp_billing_export_v1_*`
-        WHERE _PARTITIONTIME >= TIMESTAMP('{start_date.strftime('%Y-%m-%d')}')
-        GROUP BY usage_date
-        ORDER BY usage_date
-        """
-        
-        query_job = bq_client.query(query)
-        results = query_job.result()
-        
-        trends = []
-        for row in results:
-            trends.append({
-                "date": row.usage_date.strftime("%Y-%m-%d"),
-                "cost": round(float(row.daily_cost), 2) if row.daily_cost else 0.0
-            })
+        start_date = datetime.now(timezone.utc) - timedelta(days=days)
+        daily = rollup(since(get_cost_cube(project_id, days), start_date), ["usage_date"], sort_by_cost=False)
         
-        return trends
+        return [
+            {"date": row.usage_date.strftime("%Y-%m-%d"), "cost": round(float(row.cost), 2)}
+            for row in daily.itertuples(index=False)
+        ]
         
     except Exception as e:
-        return [{"date": datetime.now().strftime("%Y-%m-%d"), "cost": 0.0, "error": str(e)}]
-
-
+        return [{"date": datetime.now(timezone.utc).strftime("%Y-%m-%d"), "cost": 0.0, "error": str(e)}]
 
 
+@billed_tool
 def get_resource_costs(project_id: str, resource_type: str = "all") -> List[Dict[str, Any]]:
     """
     Get cost breakdown by specific resource types
     
     Args:
         project_id (str): GCP project ID
-        resource_type (str): Type of resource to analyze
+        resource_type (str): Service or SKU name to filter on (e.g. "Compute Engine", "Storage"), or "all"
     
     Returns:
         List[Dict[str, Any]]: Resource cost breakdown
     """
     try:
-        credentials, _ = default()
-        from google.cloud import bigquery
-        
-        bq_client = bigquery.Client(credentials=credentials, project=project_id)
-        
-        # Simple query for resource costs
-        query = f"""
-        SELECT 
-            sku.description as resource_type,
-            SUM(cost) as total_cost
-        FROM `{project_id}.billing_export.gcp_billing_export_v1_*`
-        WHERE _PARTITIONTIME >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 30 DAY)
-        GROUP BY resource_type
-        ORDER BY total_cost DESC
-        LIMIT 10
-        """
-        
-        query_job = bq_client.query(query)
-        results = query_job.result()
+        cube = since(get_cost_cube(project_id), datetime.now(timezone.utc) - timedelta(days=30))
+        if resource_type and resource_type.lower() != "all":
+            cube = matching(cube, resource_type)
+        skus = rollup(cube, ["sku"], limit=10)
         
-        resource_costs = []
-        for row in results:
-            resource_costs.append({
-                "resource_type": row.resource_type,
-                "cost": round(float(row.total_cost), 2) if row.total_cost else 0.0
-            })
-        
-        return resource_costs
+        return [
+            {"resource_type": row.sku, "cost": round(float(row.cost), 2)}
+            for row in skus.itertuples(index=False)
+        ]
         
     except Exception as e:
         return [{"resource_type": "Error", "cost": 0.0, "error": str(e)}]
 
+
+
+@billed_tool
+def get_cost_breakdown(project_id: str, group_by: str = "service", days: int = 30, filter_text: str = "",
+                       top_n: int = 20) -> List[Dict[str, Any]]:
+    """
+    Get costs rolled up by any combination of day, service, SKU and currency
+    
+    Args:
+        project_id (str): GCP project ID
+        group_by (str): Comma-separated dimensions out of day, service, sku and currency
+        days (int): Number of days to look back
+        filter_text (str): Only include services or SKUs containing this text, all if empty
+        top_n (int): Maximum number of groups to return, most expensive first
+    
+    Returns:
+        List[Dict[str, Any]]: One object per group with its dimensions and cost
+    """
+    try:
+        names = [name.strip().lower() for name in group_by.split(",") if name.strip()]
+        unknown = [name for name in names if name not in DIMENSIONS]
+        if unknown or not names:
+            raise ValueError(f"Unknown group_by {group_by!r}, expected a combination of day, service, sku, currency")
+        columns = list(dict.fromkeys(DIMENSIONS[name] for name in names))
+
+        cube = since(get_cost_cube(project_id, days), datetime.now(timezone.utc) - timedelta(days=days))
+        if filter_text:
+            cube = matching(cube, filter_text)
+        groups = rollup(cube, columns, limit=top_n)
+        if "usage_date" in columns:
+            groups["usage_date"] = groups["usage_date"].dt.strftime("%Y-%m-%d")
+        groups["cost"] = groups["cost"].round(2)
+        
+        return groups.rename(columns={"usage_date": "date"}).to_dict(orient="records")
+        
+    except Exception as e:
+        return [{"cost": 0.0, "error": str(e)}]
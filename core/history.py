@@ -0,0 +1,199 @@
+"""
+Context window management for long chat sessions.
+
+Every turn re-sends the whole chat history, so without limits each tool result
+from an hour-long session is paid for again on every later turn.
+`HistoryManager` keeps an estimated token count per history message. Once the
+history grows past `HISTORY_MAX_TOKENS` it is compacted:
+
+- the last `HISTORY_KEEP_TURNS` user turns are kept verbatim;
+- in older turns, bulky function responses are replaced by a short summary of
+  their shape and a reference to the tool call that produced them (tool results
+  are cached, so the model can fetch them again cheaply);
+- if that is not enough, the oldest turns are dropped until the history is back
+  to half the threshold, so compaction happens rarely.
+
+The chat wrappers call `compact` after each turn and recreate the chat session
+with the compacted history when it returns one.
+"""
+import os
+from typing import Any, Optional
+
+from google.genai import types
+
+from .output_shaping import estimate_tokens
+
+HISTORY_MAX_TOKENS = int(os.environ.get("HISTORY_MAX_TOKENS", "32000"))
+HISTORY_KEEP_TURNS = int(os.environ.get("HISTORY_KEEP_TURNS", "4"))
+# Function responses smaller than this are kept even in old turns
+SUMMARY_MIN_TOKENS = 200
+MAX_SUMMARY_TEXT_CHARS = 80
+
+
+def content_tokens(content: types.Content) -> int:
+    """
+    Estimate the tokens a history message takes
+
+    Args:
+        content (types.Content): History message
+
+    Returns:
+        int: Estimated token count
+    """
+    tokens = 0
+    for part in content.parts or []:
+        if part.text:
+            tokens += estimate_tokens(part.text)
+        elif part.function_call:
+            tokens += estimate_tokens({"name": part.function_call.name, "args": part.function_call.args})
+        elif part.function_response:
+            tokens += estimate_tokens(part.function_response.response)
+        else:
+            tokens += 1
+    return tokens
+
+
+def is_user_prompt(content: types.Content) -> bool:
+    """
+    Tell whether a history message starts a turn, i.e. is a user prompt rather than function responses
+    """
+    return content.role == "user" and any(part.text for part in content.parts or [])
+
+
+def summarize_value(value: Any, depth: int = 0) -> Any:
+    """
+    Describe the shape of a tool result in a few tokens
+
+    Args:
+        value (Any): Tool result or part of it
+        depth (int): Nesting level, deeper levels are described more briefly
+
+    Returns:
+        Any: Dict keys kept with their values summarized, lists reduced to their length
+    """
+    if isinstance(value, dict):
+        if "columns" in value and "rows" in value:
+            rows = len(value["rows"]) + value.get("more_rows", 0)
+            return f"table of {rows} rows with columns {', '.join(map(str, value['columns']))}"
+        if depth >= 1:
+            return f"{len(value)} fields"
+        return {key: summarize_value(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, list):
+        return f"{len(value)} items"
+    if isinstance(value, str) and len(value) > MAX_SUMMARY_TEXT_CHARS:
+        return value[:MAX_SUMMARY_TEXT_CHARS] + "..."
+    return value
+
+
+def compact_part(part: types.Part) -> types.Part:
+    """
+    Replace a bulky function response part with a summary and a reference to its call
+
+    Args:
+        part (types.Part): History part
+
+    Returns:
+        types.Part: The same part, or a compacted function response
+    """
+    function_response = part.function_response
+    if function_response is None:
+        return part
+    tokens = estimate_tokens(function_response.response)
+    if tokens < SUMMARY_MIN_TOKENS:
+        return part
+    return types.Part(function_response=types.FunctionResponse(
+        id=function_response.id,
+        name=function_response.name,
+        response={
+            "summary": summarize_value((function_response.response or {}).get("result")),
+            "compacted_tokens": tokens,
+            "note": f"Full result removed from history; call {function_response.name} again "
+                    f"with the same arguments if its details are needed",
+        },
+    ))
+
+
+class HistoryManager:
+    """
+    Token accounting and compaction of one chat session's history
+    """
+
+    def __init__(self, max_tokens: int = HISTORY_MAX_TOKENS, keep_turns: int = HISTORY_KEEP_TURNS):
+        """
+        Args:
+            max_tokens (int): History size that triggers compaction
+            keep_turns (int): Most recent user turns kept verbatim
+        """
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.token_counts: list[int] = []
+        self.compactions = 0
+        self.tokens_removed = 0
+
+    def count(self, history: list[types.Content]) -> int:
+        """
+        Update the per-message token counts and get the history total
+
+        Only messages added since the last call are measured, unless the
+        history was replaced in between.
+
+        Args:
+            history (list[types.Content]): Chat history
+
+        Returns:
+            int: Estimated tokens of the whole history
+        """
+        if len(history) < len(self.token_counts):
+            self.token_counts = []
+        self.token_counts.extend(content_tokens(content) for content in history[len(self.token_counts):])
+        return sum(self.token_counts)
+
+    def compact(self, history: list[types.Content]) -> Optional[list[types.Content]]:
+        """
+        Compact the history if it is over the token threshold
+
+        Args:
+            history (list[types.Content]): Chat history
+
+        Returns:
+            Optional[list[types.Content]]: Compacted history, or None if it is within the threshold
+        """
+        total = self.count(history)
+        if total <= self.max_tokens:
+            return None
+
+        turn_starts = [index for index, content in enumerate(history) if is_user_prompt(content)]
+        recent_start = turn_starts[-self.keep_turns] if len(turn_starts) >= self.keep_turns else 0
+
+        compacted = [
+            types.Content(role=content.role, parts=[compact_part(part) for part in content.parts or []])
+            for content in history[:recent_start]
+        ] + list(history[recent_start:])
+        counts = [content_tokens(content) for content in compacted[:recent_start]] + self.token_counts[recent_start:]
+
+        # Still too large: drop whole old turns so the history starts with a user prompt
+        target = self.max_tokens // 2
+        old_starts = [index for index in turn_starts if 0 < index <= recent_start]
+        drop = 0
+        while sum(counts[drop:]) > target and old_starts:
+            drop = old_starts.pop(0)
+        compacted, counts = compacted[drop:], counts[drop:]
+
+        self.token_counts = counts
+        self.compactions += 1
+        self.tokens_removed += total - sum(counts)
+        return compacted
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the history size and compaction counters
+
+        Returns:
+            dict[str, int]: Messages, estimated tokens, compactions and tokens removed so far
+        """
+        return {
+            "messages": len(self.token_counts),
+            "tokens": sum(self.token_counts),
+            "compactions": self.compactions,
+            "tokens_removed": self.tokens_removed,
+        }
@@ -0,0 +1,315 @@
+"""
+In-process fuzzy name index over the project's resources.
+
+Resolving a partial name ("the etl job", "client1's account") used to mean
+listing every job, dataset or service account and letting the model match
+names. `NameIndex` keeps the names of VMs, Cloud Run jobs, BigQuery datasets,
+custom service accounts and BigQuery users in a trigram inverted index, so
+`resolve_resource(kind, query)` ranks candidates locally, without any API call.
+
+Names are normalized the way users refer to them: lowercased, spaces and
+underscores turned into dashes, and words like "job" or "execution" removed.
+Each kind is reloaded in the background when it gets stale; a reload only adds
+and removes the names that changed.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from .bigquery.usage_store import usage_by_user
+from .cloud_run.inventory import list_jobs
+from .compute.inventory import list_instances
+from .service_accounts import list_custom_service_accounts
+from .utils.client_pool import get_bigquery_client
+
+logger = logging.getLogger(__name__)
+
+# Seconds before each kind of name is reloaded
+REFRESH_SECONDS = {
+    "vm": 300,
+    "job": 600,
+    "dataset": 900,
+    "service_account": 1800,
+    "user": 3600,
+}
+REFRESH_CHECK_SECONDS = 30
+# BigQuery users are the ones who ran jobs in this many days
+USER_LOOKBACK_DAYS = 30
+MIN_SCORE = 0.3
+MAX_CANDIDATES = 5
+
+KIND_ALIASES = {
+    "vm": "vm", "vms": "vm", "instance": "vm", "instances": "vm",
+    "job": "job", "jobs": "job", "cloud_run_job": "job",
+    "dataset": "dataset", "datasets": "dataset",
+    "service_account": "service_account", "service_accounts": "service_account", "sa": "service_account",
+    "user": "user", "users": "user", "email": "user",
+}
+STOP_WORDS = {"job", "jobs", "execution", "executions", "account", "the"}
+
+
+def normalize_name(text: str) -> str:
+    """
+    Normalize a resource name or a user's reference to one
+
+    Args:
+        text (str): Name or partial name
+
+    Returns:
+        str: Lowercase name with spaces and underscores as dashes and filler words removed
+    """
+    words = [word for word in re.split(r"[\s_\-]+", text.strip().lower()) if word and word not in STOP_WORDS]
+    return "-".join(words)
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Get the trigrams of a normalized name, padded so short names and prefixes match
+
+    Args:
+        text (str): Normalized name
+
+    Returns:
+        set[str]: Trigrams
+    """
+    padded = f"  {text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Trigram inverted index of resource names per kind
+    """
+
+    def __init__(self):
+        self._names: dict[str, dict[str, dict[str, Any]]] = {}
+        self._normalized: dict[str, dict[str, str]] = {}
+        self._grams: dict[str, dict[str, set[str]]] = {}
+        self._postings: dict[str, dict[str, set[str]]] = {}
+        self._loaded_at: dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def update(self, kind: str, entries: dict[str, dict[str, Any]]) -> tuple[int, int]:
+        """
+        Replace the names of a kind, indexing only the names that changed
+
+        Args:
+            kind (str): Resource kind
+            entries (dict[str, dict[str, Any]]): Name to details returned with it (e.g. zone, self link)
+
+        Returns:
+            tuple[int, int]: Names added and removed
+        """
+        with self._lock:
+            names = self._names.setdefault(kind, {})
+            normalized = self._normalized.setdefault(kind, {})
+            grams = self._grams.setdefault(kind, {})
+            postings = self._postings.setdefault(kind, {})
+
+            removed = [name for name in names if name not in entries]
+            for name in removed:
+                for gram in grams.pop(name):
+                    postings[gram].discard(name)
+                    if not postings[gram]:
+                        del postings[gram]
+                del names[name], normalized[name]
+
+            added = 0
+            for name, details in entries.items():
+                if name not in names:
+                    normalized[name] = normalize_name(name)
+                    grams[name] = trigrams(normalized[name])
+                    for gram in grams[name]:
+                        postings.setdefault(gram, set()).add(name)
+                    added += 1
+                names[name] = details
+
+            self._loaded_at[kind] = time.time()
+            return added, len(removed)
+
+    def age(self, kind: str) -> Optional[float]:
+        """
+        Get the seconds since a kind was last loaded, None if it never was
+        """
+        loaded_at = self._loaded_at.get(kind)
+        return None if loaded_at is None else time.time() - loaded_at
+
+    def search(self, kind: str, query: str, limit: int = MAX_CANDIDATES) -> list[dict[str, Any]]:
+        """
+        Rank the names of a kind by similarity to a query
+
+        Names equal to the normalized query score 1, names containing it at
+        least 0.75, others by the Dice coefficient of their trigrams.
+
+        Args:
+            kind (str): Resource kind
+            query (str): Partial or informal name
+            limit (int): Maximum number of candidates
+
+        Returns:
+            list[dict[str, Any]]: Candidates with name, score and details, best first
+        """
+        normalized = normalize_name(query)
+        query_grams = trigrams(normalized)
+        with self._lock:
+            names = self._names.get(kind, {})
+            normalized_names = self._normalized.get(kind, {})
+            grams = self._grams.get(kind, {})
+            postings = self._postings.get(kind, {})
+
+            shared: dict[str, int] = {}
+            for gram in query_grams:
+                for name in postings.get(gram, ()):
+                    shared[name] = shared.get(name, 0) + 1
+
+            scored = []
+            for name, count in shared.items():
+                score = 2 * count / (len(query_grams) + len(grams[name]))
+                candidate = normalized_names[name]
+                if candidate == normalized:
+                    score = 1.0
+                elif normalized and normalized in candidate:
+                    score = max(score, 0.75 + 0.2 * len(normalized) / len(candidate))
+                if score >= MIN_SCORE:
+                    scored.append((score, name))
+
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            return [{"name": name, "score": round(score, 3), **names[name]} for score, name in scored[:limit]]
+
+
+def _load_vms() -> dict[str, dict[str, Any]]:
+    return {
+        instance["name"]: {"zone": instance["zone"], "self_link": instance["self_link"]}
+        for instance in list_instances(os.environ["GCP_PROJECT_NUMBER"])
+    }
+
+
+def _load_jobs() -> dict[str, dict[str, Any]]:
+    return {job["name"]: {} for job in list_jobs(os.environ["GCP_PROJECT_NUMBER"], os.environ["GCP_REGION"])}
+
+
+def _load_datasets() -> dict[str, dict[str, Any]]:
+    client = get_bigquery_client(os.environ["GCP_PROJECT_ID"])
+    return {dataset.reference.dataset_id: {} for dataset in client.list_datasets()}
+
+
+def _load_service_accounts() -> dict[str, dict[str, Any]]:
+    return {email: {} for email in list_custom_service_accounts(os.environ["GCP_PROJECT_NUMBER"])}
+
+
+def _load_users() -> dict[str, dict[str, Any]]:
+    return {row["user_email"]: {} for row in usage_by_user(os.environ["GCP_PROJECT_ID"], USER_LOOKBACK_DAYS)}
+
+
+LOADERS: dict[str, Callable[[], dict[str, dict[str, Any]]]] = {
+    "vm": _load_vms,
+    "job": _load_jobs,
+    "dataset": _load_datasets,
+    "service_account": _load_service_accounts,
+    "user": _load_users,
+}
+
+
+class IndexRefresher(threading.Thread):
+    """
+    Background thread that reloads stale kinds of names into a NameIndex
+    """
+
+    def __init__(self, index: NameIndex, kinds: list[str]):
+        super().__init__(name="name-index-refresher", daemon=True)
+        self.index = index
+        self.kinds = kinds
+        self._stop_event = threading.Event()
+
+    def refresh_stale(self) -> None:
+        """
+        Reload every kind already in use that is older than its refresh interval
+        """
+        for kind in self.kinds:
+            age = self.index.age(kind)
+            if age is not None and age >= REFRESH_SECONDS[kind]:
+                try:
+                    refresh(kind)
+                except Exception:
+                    logger.exception("Refreshing %s names failed", kind)
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.refresh_stale()
+            self._stop_event.wait(REFRESH_CHECK_SECONDS)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+_index = NameIndex()
+_refresher: Optional[IndexRefresher] = None
+_refresher_lock = threading.Lock()
+_load_locks = {kind: threading.Lock() for kind in LOADERS}
+
+
+def get_name_index() -> NameIndex:
+    """
+    Get the process-wide name index
+
+    Returns:
+        NameIndex: Shared index
+    """
+    return _index
+
+
+def refresh(kind: str) -> tuple[int, int]:
+    """
+    Reload one kind of names into the index
+
+    Args:
+        kind (str): Resource kind
+
+    Returns:
+        tuple[int, int]: Names added and removed
+    """
+    with _load_locks[kind]:
+        return _index.update(kind, LOADERS[kind]())
+
+
+def start_refresher() -> IndexRefresher:
+    """
+    Start reloading stale names in the background, if not already running
+
+    Returns:
+        IndexRefresher: Running refresher
+    """
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = IndexRefresher(_index, list(LOADERS))
+            _refresher.start()
+        return _refresher
+
+
+def resolve_resource(kind: str, query: str) -> dict[str, Any]:
+    """
+    Find the resources whose names best match a partial or informal name
+
+    Args:
+        kind (str): One of vm, job, dataset, service_account or user (BigQuery user email)
+        query (str): Name as the user wrote it, e.g. "etl job" or "client1"
+
+    Returns:
+        dict[str, Any]: Kind, query and up to 5 candidates with name, score from 0 to 1 and details
+            such as a VM's zone and self link, best first
+    """
+    # Not normalize_name: its filler words ("job", "account") are the kinds themselves
+    normalized_kind = KIND_ALIASES.get(kind.strip().lower().replace("-", "_").replace(" ", "_"))
+    if normalized_kind is None:
+        return {"error": f"Unknown kind {kind!r}, expected one of {', '.join(LOADERS)}"}
+
+    if _index.age(normalized_kind) is None:
+        # First use of this kind: load it now, later reloads happen in the background
+        refresh(normalized_kind)
+        start_refresher()
+
+    return {"kind": normalized_kind, "query": query, "candidates": _index.search(normalized_kind, query)}
@@ -0,0 +1,282 @@
+"""
+Token-budgeted shaping of tool results before they reach the model.
+
+Every tool registered with the bot is wrapped by `shaped_tool`, which:
+
+- projects known bulky resources (e.g. a full VM resource) to the fields the
+  model needs;
+- turns lists of uniform records into columnar tables (column names once,
+  then one value list per row);
+- when the result is still above the tool's token budget, shortens the largest
+  lists, keeping the first (most relevant) items and noting how many were left
+  out; table rows are kept whole and parallel lists (e.g. end_time and value)
+  are shortened together;
+- counts estimated tokens before and after shaping per tool.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+from typing import Any, Callable, Optional
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("TOOL_OUTPUT_TOKEN_BUDGET", "2000"))
+# Rough size of a token in characters of JSON
+CHARS_PER_TOKEN = 4
+# Lists of at least this many uniform records are sent as tables
+TABLE_MIN_ROWS = 3
+
+# Tools whose results are worth a larger budget
+TOOL_TOKEN_BUDGETS = {
+    "get_cloud_run_job_execution_logs": 8000,
+    "get_vm_cpu_history": 5000,
+}
+
+# Fields kept from bulky resources, nested specs apply to dicts and to each item of lists
+TOOL_PROJECTIONS = {
+    "describe_vm": {
+        "name": None, "status": None, "zone": None, "machineType": None, "cpuPlatform": None,
+        "creationTimestamp": None, "lastStartTimestamp": None, "labels": None, "tags": {"items": None},
+        "networkInterfaces": {"network": None, "subnetwork": None, "networkIP": None,
+                              "accessConfigs": {"natIP": None}},
+        "disks": {"deviceName": None, "boot": None, "diskSizeGb": None, "type": None, "source": None},
+        "serviceAccounts": {"email": None},
+        "scheduling": {"preemptible": None, "provisioningModel": None, "automaticRestart": None},
+        "deletionProtection": None,
+    },
+}
+
+_stats: dict[str, dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(value: Any) -> int:
+    """
+    Estimate how many tokens a value takes once serialized for the model
+
+    Args:
+        value (Any): Tool result
+
+    Returns:
+        int: Estimated token count
+    """
+    return len(json.dumps(value, default=str, separators=(",", ":"))) // CHARS_PER_TOKEN + 1
+
+
+def _short_name(value: Any) -> Any:
+    # Resource URLs such as zones/us-central1-a/machineTypes/e2-small carry one useful segment
+    if isinstance(value, str) and value.startswith("https://www.googleapis.com/"):
+        return value.rsplit("/", 1)[-1]
+    return value
+
+
+def project(value: Any, spec: Optional[dict]) -> Any:
+    """
+    Keep only the fields named in a projection spec
+
+    Args:
+        value (Any): Result or part of a result
+        spec (Optional[dict]): Field name to nested spec, None keeps a field whole
+
+    Returns:
+        Any: Projected value
+    """
+    if spec is None:
+        return _short_name(value)
+    if isinstance(value, list):
+        return [project(item, spec) for item in value]
+    if isinstance(value, dict):
+        return {key: project(value[key], spec[key]) for key in spec if key in value}
+    return value
+
+
+def tabulate(value: Any) -> Any:
+    """
+    Turn lists of records with the same keys into columnar tables, recursively
+
+    Args:
+        value (Any): Result or part of a result
+
+    Returns:
+        Any: Value with record lists replaced by {"columns": [...], "rows": [[...], ...]}
+    """
+    if isinstance(value, dict):
+        return {key: tabulate(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if (len(value) >= TABLE_MIN_ROWS and all(isinstance(item, dict) for item in value)
+                and all(item.keys() == value[0].keys() for item in value)
+                and not any(isinstance(cell, (dict, list)) for cell in value[0].values())):
+            columns = list(value[0])
+            return {"columns": columns, "rows": [[item[column] for column in columns] for item in value]}
+        return [tabulate(item) for item in value]
+    return value
+
+
+def _is_table(value: Any) -> bool:
+    return isinstance(value, dict) and "columns" in value and "rows" in value
+
+
+def _largest_list(value: Any, path: tuple = ()) -> tuple[Optional[tuple], int]:
+    """
+    Find the path of the list with the biggest serialized size, table rows are not looked into
+    """
+    best_path, best_size = None, 0
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        if len(value) > 1:
+            best_path, best_size = path, estimate_tokens(value)
+        items = enumerate(value)
+    else:
+        return None, 0
+    for key, item in items:
+        if key == "columns":
+            continue
+        if key == "rows" and _is_table(value):
+            # Rows are shortened as a whole, never cell by cell
+            item_path, item_size = (path + (key,), estimate_tokens(item)) if len(item) > 1 else (None, 0)
+        else:
+            item_path, item_size = _largest_list(item, path + (key,))
+        if item_path is not None and item_size > best_size:
+            best_path, best_size = item_path, item_size
+    return best_path, best_size
+
+
+def _get(value: Any, path: tuple) -> Any:
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _parallel_keys(parent: Any, key: Any) -> list:
+    """
+    Get the keys of the sibling lists of scalars as long as parent[key], such as end_time and value
+
+    Returns:
+        list: Keys of the lists to shorten together, including key; just key if it has no parallel siblings
+    """
+    items = parent[key]
+    if not isinstance(parent, dict) or _is_table(parent) or any(isinstance(item, (dict, list)) for item in items):
+        return [key]
+    return [
+        sibling for sibling, other in parent.items()
+        if isinstance(other, list) and len(other) == len(items)
+        and not any(isinstance(item, (dict, list)) for item in other)
+    ]
+
+
+def fit_budget(value: Any, budget: int) -> Any:
+    """
+    Shorten the largest lists until the value fits a token budget
+
+    The first items of each list are kept, so tools should return results
+    most relevant first. Tables record the rows left out in "more_rows",
+    parallel lists are shortened together and record theirs in "more_items",
+    other lists end with a "... N more" marker.
+
+    Args:
+        value (Any): Shaped result, modified in place
+        budget (int): Token budget
+
+    Returns:
+        Any: Value within budget, or as small as list shortening can make it
+    """
+    omitted: dict[tuple, int] = {}
+    parallel: set[tuple] = set()
+    while estimate_tokens(value) > budget:
+        path, _ = _largest_list(value)
+        if path is None:
+            break
+        parent = _get(value, path[:-1]) if path else None
+        keys = _parallel_keys(parent, path[-1]) if path else [None]
+        for key in keys:
+            items_path = path[:-1] + (key,) if path else path
+            items = _get(value, items_path)
+            keep = len(items) // 2
+            omitted[items_path] = omitted.get(items_path, 0) + len(items) - keep
+            del items[keep:]
+            if len(keys) > 1:
+                parallel.add(items_path)
+
+    for path, count in omitted.items():
+        items = _get(value, path)
+        parent = _get(value, path[:-1]) if path else None
+        if path and path[-1] == "rows" and _is_table(parent):
+            parent["more_rows"] = count
+        elif path in parallel:
+            parent["more_items"] = count
+        else:
+            items.append(f"... {count} more")
+    return value
+
+
+def shape_result(tool_name: str, result: Any, budget: Optional[int] = None) -> Any:
+    """
+    Project, tabulate and fit a tool result to its token budget
+
+    Args:
+        tool_name (str): Tool name, selects the projection and default budget
+        result (Any): Raw tool result
+        budget (Optional[int]): Token budget, defaults to the tool's budget
+
+    Returns:
+        Any: Shaped result
+    """
+    if budget is None:
+        budget = TOOL_TOKEN_BUDGETS.get(tool_name, DEFAULT_TOKEN_BUDGET)
+    spec = TOOL_PROJECTIONS.get(tool_name)
+    shaped = project(result, spec) if spec is not None else result
+    shaped = tabulate(shaped)
+    if isinstance(shaped, (dict, list)):
+        shaped = fit_budget(shaped, budget)
+    return shaped
+
+
+def shaped_tool(func: Callable, budget: Optional[int] = None) -> Callable:
+    """
+    Wrap a tool so its results are shaped and its token savings counted
+
+    Args:
+        func (Callable): Tool function
+        budget (Optional[int]): Token budget, defaults to the tool's budget
+
+    Returns:
+        Callable: Wrapped function with the same name, signature and docstring
+    """
+    name = func.__name__
+
+    def shape_and_count(result: Any) -> Any:
+        raw_tokens = estimate_tokens(result)
+        shaped = shape_result(name, result, budget)
+        shaped_tokens = estimate_tokens(shaped)
+        with _stats_lock:
+            stats = _stats.setdefault(name, {"calls": 0, "raw_tokens": 0, "shaped_tokens": 0})
+            stats["calls"] += 1
+            stats["raw_tokens"] += raw_tokens
+            stats["shaped_tokens"] += shaped_tokens
+        return shaped
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return shape_and_count(await func(*args, **kwargs))
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return shape_and_count(func(*args, **kwargs))
+
+    return wrapper
+
+
+def shaping_stats() -> dict[str, dict[str, int]]:
+    """
+    Get estimated tokens before and after shaping per tool
+
+    Returns:
+        dict[str, dict[str, int]]: Calls, raw tokens, shaped tokens and tokens saved per tool
+    """
+    with _stats_lock:
+        return {
+            name: {**stats, "tokens_saved": stats["raw_tokens"] - stats["shaped_tokens"]}
+            for name, stats in _stats.items()
+        }
@@ -0,0 +1,96 @@
+"""
+Background pre-warming of client libraries and credentials.
+
+The tools import their Google client libraries on first call, so the bot
+starts quickly. `start_prewarm` moves that first-call cost off the critical
+path: a daemon thread imports the heavy libraries, resolves Application
+Default Credentials and parses the discovery documents while the user is
+still typing the first question.
+"""
+import importlib
+import logging
+import threading
+import time
+from typing import Optional
+
+from .utils.client_pool import get_compute_service, get_credentials, get_iam_service, get_run_service
+
+logger = logging.getLogger(__name__)
+
+# Roughly in order of how soon a session needs them
+HEAVY_MODULES = [
+    "google.genai",
+    "google.auth",
+    "googleapiclient.discovery",
+    "google.cloud.monitoring_v3",
+    "google.cloud.bigquery",
+    "google.cloud.logging_v2",
+    "google.cloud.billing_v1",
+    "pandas",
+]
+
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+_timings: dict[str, float] = {}
+
+
+def prewarm(modules: Optional[list[str]] = None, credentials: bool = True) -> dict[str, float]:
+    """
+    Import heavy libraries and set up credentials and discovery services
+
+    Failures are logged and skipped; the tools will hit them again on first use.
+
+    Args:
+        modules (Optional[list[str]]): Modules to import, defaults to HEAVY_MODULES
+        credentials (bool): Also resolve credentials and load the discovery documents
+
+    Returns:
+        dict[str, float]: Seconds spent per step
+    """
+    steps = [(name, lambda name=name: importlib.import_module(name)) for name in modules or HEAVY_MODULES]
+    if credentials:
+        steps += [
+            ("credentials", get_credentials),
+            ("compute_service", get_compute_service),
+            ("run_service", get_run_service),
+            ("iam_service", get_iam_service),
+        ]
+
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logger.info("Pre-warming %s failed: %s", name, e)
+            continue
+        _timings[name] = time.perf_counter() - started
+    return dict(_timings)
+
+
+def start_prewarm(credentials: bool = True) -> threading.Thread:
+    """
+    Pre-warm in a daemon thread, if not already started
+
+    Args:
+        credentials (bool): Also resolve credentials and load the discovery documents
+
+    Returns:
+        threading.Thread: Pre-warm thread
+    """
+    global _thread
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=prewarm, kwargs={"credentials": credentials},
+                                       name="prewarm", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def prewarm_timings() -> dict[str, float]:
+    """
+    Get the seconds each completed pre-warm step took
+
+    Returns:
+        dict[str, float]: Step name to seconds
+    """
+    return dict(_timings)
@@ -0,0 +1,376 @@
+"""
+Compact system instruction and tool declarations for the chat.
+
+Everything the model gets on every request is built here once per process and
+reused by every session:
+
+- tool declarations are generated from each tool's signature and docstring,
+  keeping only the summary line and the argument descriptions, and passed as
+  declarations so the SDK does not re-derive them from the functions on every
+  request;
+- the instruction is a short set of rules plus one line of guidance per topic
+  (compute, BigQuery, Cloud Run, cost), instead of restating every tool;
+- tools and guidance can be limited to the topics of the conversation, which
+  `TopicScope` detects from the user's prompts;
+- the static instruction and declarations of a topic set are stored with
+  Gemini context caching when they reach the model's minimum cacheable size,
+  and sent inline otherwise.
+"""
+import inspect
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from google.genai import types
+
+from .output_shaping import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_CACHE_ENABLED = os.environ.get("GEMINI_CONTEXT_CACHE", "1") == "1"
+CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+# Caches are recreated this long before they expire, so no request uses an expired one
+CONTEXT_CACHE_MARGIN_SECONDS = 120
+# Smallest instruction plus declarations the model accepts in a context cache; smaller ones are sent inline
+CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+# After a failed cache creation (e.g. prompt below the model's minimum), wait before trying again
+CONTEXT_CACHE_RETRY_SECONDS = 3600
+
+TOPIC_TOOLS = {
+    "compute": ["list_vms", "describe_vm", "monitor_vm", "monitor_fleet_cpu", "analyze_vm_cpu", "get_vm_cpu_history"],
+    "bigquery": ["list_datasets", "get_bigquery_usage_by_user", "get_bytes_loaded_to_dataset",
+                 "get_bigquery_usage_by_day_user"],
+    "cloud_run": ["list_cloud_run_jobs", "get_job_executions", "get_cloud_run_jobs_health",
+                  "get_cloud_run_job_execution_logs"],
+    "cost": ["get_current_month_costs", "get_cost_by_service", "get_cost_trends", "get_resource_costs",
+             "get_cost_breakdown"],
+}
+ALL_TOPICS = frozenset(TOPIC_TOOLS)
+
+TOPIC_KEYWORDS = {
+    "compute": r"\b(?:vms?|virtual machines?|instances?|compute|cpu|machines?|servers?|hosts?|zones?)\b",
+    "bigquery": r"\b(?:bigquery|bq|datasets?|quer(?:y|ies)|bytes|tables?|warehouse|scanned|processed)\b",
+    "cloud_run": r"\b(?:cloud run|jobs?|executions?|logs?|failed|failures?|runs?)\b",
+    "cost": r"\b(?:costs?|spend(?:ing)?|bill(?:ing)?|price|pricing|expensive|money|budget|skus?|dollars?)\b|\$",
+}
+
+TOPIC_GUIDANCE = {
+    "compute": "VM tools other than `list_vms` take a VM self link, which `list_vms` and `resolve_resource` return. "
+               "Use `monitor_fleet_cpu` to compare many VMs and prefer `analyze_vm_cpu` over `monitor_vm` for analysis.",
+    "bigquery": "Convert bytes to GB and estimate BigQuery cost at $5.00 per TB.",
+    "cloud_run": "Use `get_cloud_run_jobs_health` for questions about many jobs at once. Execution logs come grouped "
+                 "into templates with every error verbatim; use `compact=False`, `min_severity` or `contains` "
+                 "to dig further.",
+    "cost": "Give dollar amounts and percentages, break costs down by service and resource type, "
+            "and point out unusual spend.",
+}
+
+_PYTHON_TYPES = {str: "STRING", int: "INTEGER", float: "NUMBER", bool: "BOOLEAN"}
+_ARG_LINE = re.compile(r"^\s*(\w+) \([^)]*\): (.+)$")
+
+_declarations: dict[str, types.FunctionDeclaration] = {}
+_instructions: dict[frozenset, str] = {}
+_context_caches: dict[tuple[str, frozenset], tuple[Optional[str], float]] = {}
+_lock = threading.Lock()
+
+
+def function_declaration(func: Callable) -> types.FunctionDeclaration:
+    """
+    Build a compact declaration of a tool from its signature and docstring
+
+    Only the docstring's first line and its argument descriptions are kept.
+    Declarations are built once per tool name.
+
+    Args:
+        func (Callable): Tool function
+
+    Returns:
+        types.FunctionDeclaration: Function declaration
+    """
+    name = func.__name__
+    with _lock:
+        if name in _declarations:
+            return _declarations[name]
+
+    doc = inspect.getdoc(func) or ""
+    summary = next((line.strip() for line in doc.splitlines() if line.strip()), name)
+    arg_docs = {}
+    for line in doc.splitlines():
+        match = _ARG_LINE.match(line)
+        if match:
+            arg_docs[match.group(1)] = match.group(2).strip()
+
+    properties, required = {}, []
+    for parameter in inspect.signature(func).parameters.values():
+        properties[parameter.name] = types.Schema(
+            type=_PYTHON_TYPES.get(parameter.annotation, "STRING"),
+            description=arg_docs.get(parameter.name),
+        )
+        if parameter.default is inspect.Parameter.empty:
+            required.append(parameter.name)
+
+    declaration = types.FunctionDeclaration(
+        name=name,
+        description=summary,
+        parameters=types.Schema(type="OBJECT", properties=properties, required=required) if properties else None,
+    )
+    with _lock:
+        return _declarations.setdefault(name, declaration)
+
+
+def tools_for_topics(tools: list[Callable], topics: Iterable[str] = ALL_TOPICS) -> list[Callable]:
+    """
+    Keep the tools of some topics, plus the tools that belong to no topic
+
+    Args:
+        tools (list[Callable]): Tool functions
+        topics (Iterable[str]): Topic names
+
+    Returns:
+        list[Callable]: Tools of those topics, in their original order
+    """
+    topics = set(topics)
+    topic_of = {name: topic for topic, names in TOPIC_TOOLS.items() for name in names}
+    return [tool for tool in tools if topic_of.get(tool.__name__, "") in topics or tool.__name__ not in topic_of]
+
+
+def build_instruction(topics: Iterable[str] = ALL_TOPICS) -> str:
+    """
+    Build the system instruction with the guidance of some topics
+
+    Args:
+        topics (Iterable[str]): Topic names
+
+    Returns:
+        str: System instruction text
+    """
+    topics = frozenset(topics)
+    with _lock:
+        if topics in _instructions:
+            return _instructions[topics]
+
+    guidance = "\n".join(f"- {TOPIC_GUIDANCE[topic]}" for topic in TOPIC_TOOLS if topic in topics)
+    instruction = f"""You are an assistant for a DevOps executive, answering questions about an organization's Google Cloud environment by calling the available tools.
+
+Project number: {os.environ['GCP_PROJECT_NUMBER']}
+Project ID: {os.environ['GCP_PROJECT_ID']}
+Region: {os.environ['GCP_REGION']}
+Zone: {os.environ['GCP_ZONE']}
+
+Rules:
+- Pick the tools that fit the question, call independent tools together and chain calls when one needs another's output.
+- Answer concisely from the tool results. If the tools cannot answer, say so and suggest a way forward; on tool errors, explain the error and suggest next steps.
+- Results may come as tables with `columns` and `rows`; `more_rows`, `more_items` or a trailing "... N more" item means items were left out, so narrow the request rather than assuming they do not exist.
+- For a partial or informal name of a VM, job, dataset, service account or user, call `resolve_resource`. Use a single clear match directly; with several, show a numbered list and ask the user to pick; with none, say so and offer to list that kind of resource.
+- Format tables as GitHub-flavored Markdown with columns aligned using spaces, and lists as numbered lists.
+{guidance}
+"""
+    with _lock:
+        return _instructions.setdefault(topics, instruction)
+
+
+def detect_topics(text: str) -> frozenset:
+    """
+    Find the topics a prompt is about
+
+    Args:
+        text (str): User prompt
+
+    Returns:
+        frozenset: Topic names, empty if none is recognized
+    """
+    text = text.lower()
+    return frozenset(topic for topic, pattern in TOPIC_KEYWORDS.items() if re.search(pattern, text))
+
+
+def _cached_context_name(key: tuple[str, frozenset], instruction: str,
+                         tool: types.Tool) -> tuple[bool, Optional[str]]:
+    """
+    Look up the context cache of an instruction and tool set
+
+    Returns:
+        tuple[bool, Optional[str]]: Whether the lookup is settled, and the cache name if there is one
+    """
+    now = time.time()
+    with _lock:
+        name, valid_until = _context_caches.get(key, (None, 0.0))
+        if now < valid_until:
+            return True, name
+        if key in _context_caches:
+            return False, None
+
+    size = estimate_tokens(instruction) + estimate_tokens(tool.model_dump(mode="json", exclude_none=True))
+    if size >= CONTEXT_CACHE_MIN_TOKENS:
+        return False, None
+    # Too small to cache, which does not change while the process runs; checked here instead of failing a request
+    logger.info("Prompt of about %d tokens is below the context cache minimum, sending it inline", size)
+    with _lock:
+        _context_caches[key] = (None, float("inf"))
+    return True, None
+
+
+def _cache_config(topics: frozenset, instruction: str, tool: types.Tool) -> types.CreateCachedContentConfig:
+    return types.CreateCachedContentConfig(
+        system_instruction=instruction,
+        tools=[tool],
+        ttl=f"{CONTEXT_CACHE_TTL_SECONDS}s",
+        display_name=f"gcp-ops-bot-{'-'.join(sorted(topics))}",
+    )
+
+
+def _store_context_cache(key: tuple[str, frozenset], cache, error: Optional[Exception]) -> Optional[str]:
+    now = time.time()
+    if error is None:
+        name, valid_until = cache.name, now + CONTEXT_CACHE_TTL_SECONDS - CONTEXT_CACHE_MARGIN_SECONDS
+    else:
+        logger.info("Context caching unavailable for %s: %s", key[0], error)
+        name, valid_until = None, now + CONTEXT_CACHE_RETRY_SECONDS
+    with _lock:
+        _context_caches[key] = (name, valid_until)
+    return name
+
+
+def _context_cache_name(client, model: str, topics: frozenset, instruction: str,
+                        tool: types.Tool) -> Optional[str]:
+    """
+    Get a live context cache of an instruction and tool set, creating it if needed and large enough
+    """
+    key = (model, topics)
+    settled, name = _cached_context_name(key, instruction, tool)
+    if settled:
+        return name
+    try:
+        cache = client.caches.create(model=model, config=_cache_config(topics, instruction, tool))
+    except Exception as e:
+        return _store_context_cache(key, None, e)
+    return _store_context_cache(key, cache, None)
+
+
+async def _context_cache_name_async(client, model: str, topics: frozenset, instruction: str,
+                                    tool: types.Tool) -> Optional[str]:
+    """
+    Same as _context_cache_name, creating the cache with the async client
+    """
+    key = (model, topics)
+    settled, name = _cached_context_name(key, instruction, tool)
+    if settled:
+        return name
+    try:
+        cache = await client.aio.caches.create(model=model, config=_cache_config(topics, instruction, tool))
+    except Exception as e:
+        return _store_context_cache(key, None, e)
+    return _store_context_cache(key, cache, None)
+
+
+def _chat_config(instruction: str, tool: types.Tool, cache_name: Optional[str]) -> types.GenerateContentConfig:
+    afc = types.AutomaticFunctionCallingConfig(disable=True)
+    if cache_name is not None:
+        return types.GenerateContentConfig(cached_content=cache_name, automatic_function_calling=afc)
+    return types.GenerateContentConfig(system_instruction=instruction, tools=[tool], automatic_function_calling=afc)
+
+
+def _topic_prompt(tools: list[Callable], topics: frozenset) -> tuple[str, types.Tool]:
+    tool = types.Tool(function_declarations=[function_declaration(func) for func in tools_for_topics(tools, topics)])
+    return build_instruction(topics), tool
+
+
+def build_chat_config(tools: list[Callable], client=None, model: Optional[str] = None,
+                      topics: Iterable[str] = ALL_TOPICS) -> types.GenerateContentConfig:
+    """
+    Build the chat configuration for some topics, tool calls are dispatched by the bot itself
+
+    Args:
+        tools (list[Callable]): Tool functions exposed to Gemini
+        client (genai.Client): GenAI client, enables context caching when given with a model
+        model (Optional[str]): Model name
+        topics (Iterable[str]): Topics whose tools and guidance are included
+
+    Returns:
+        types.GenerateContentConfig: Chat configuration
+    """
+    topics = frozenset(topics)
+    instruction, tool = _topic_prompt(tools, topics)
+    cache_name = None
+    if CONTEXT_CACHE_ENABLED and client is not None and model is not None:
+        cache_name = _context_cache_name(client, model, topics, instruction, tool)
+    return _chat_config(instruction, tool, cache_name)
+
+
+async def build_chat_config_async(tools: list[Callable], client, model: str,
+                                  topics: Iterable[str] = ALL_TOPICS) -> types.GenerateContentConfig:
+    """
+    Build the chat configuration for some topics, creating context caches with the async client
+
+    Args:
+        tools (list[Callable]): Tool functions exposed to Gemini
+        client (genai.Client): GenAI client
+        model (str): Model name
+        topics (Iterable[str]): Topics whose tools and guidance are included
+
+    Returns:
+        types.GenerateContentConfig: Chat configuration
+    """
+    topics = frozenset(topics)
+    instruction, tool = _topic_prompt(tools, topics)
+    cache_name = None
+    if CONTEXT_CACHE_ENABLED:
+        cache_name = await _context_cache_name_async(client, model, topics, instruction, tool)
+    return _chat_config(instruction, tool, cache_name)
+
+
+class TopicScope:
+    """
+    Topics of one chat session, used to send only the relevant tools and guidance
+
+    The scope starts with the topics of the first prompt (all topics if none
+    is recognized) and only grows, so tools called earlier in the session stay
+    declared.
+    """
+
+    def __init__(self, client, model: str, tools: list[Callable]):
+        """
+        Args:
+            client (genai.Client): GenAI client
+            model (str): Model name
+            tools (list[Callable]): Tool functions exposed to Gemini
+        """
+        self.client = client
+        self.model = model
+        self.tools = tools
+        self.topics: frozenset = frozenset()
+
+    def _widen(self, message: Any) -> None:
+        found = detect_topics(message) if isinstance(message, str) else frozenset()
+        if not self.topics:
+            self.topics = found or ALL_TOPICS
+        else:
+            self.topics |= found
+
+    def config_for(self, message: Any) -> types.GenerateContentConfig:
+        """
+        Widen the scope with a prompt's topics and get the configuration for its turn
+
+        Args:
+            message: User prompt or content parts
+
+        Returns:
+            types.GenerateContentConfig: Chat configuration for the turn
+        """
+        self._widen(message)
+        return build_chat_config(self.tools, self.client, self.model, self.topics)
+
+    async def config_for_async(self, message: Any) -> types.GenerateContentConfig:
+        """
+        Same as config_for, for the async chat
+
+        Args:
+            message: User prompt or content parts
+
+        Returns:
+            types.GenerateContentConfig: Chat configuration for the turn
+        """
+        self._widen(message)
+        return await build_chat_config_async(self.tools, self.client, self.model, self.topics)
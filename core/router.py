@@ -0,0 +1,270 @@
+"""
+Deterministic routing of simple prompts straight to a tool.
+
+Fixed-form questions such as "list VMs in us-central1-a", "list datasets" or
+"cost by service last 7 days" need no reasoning, yet through the chat they
+cost two model round trips around one tool call. `IntentRouter` matches the
+whole prompt against a small set of patterns, calls the matching tool directly
+(through the same cached, shaped tools the model uses) and formats the result
+as a table locally. Anything that does not match a pattern exactly, and any
+tool error, falls back to the model.
+"""
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+# Zone names such as us-central1-a
+_ZONE = r"[a-z]+-[a-z]+\d+-[a-z]"
+# "last 7 days", "past 2 weeks", "this week", ...; no "yesterday", the tools only look back from now
+_PERIOD_TEMPLATE = (r"(?:\s+(?:for|over|in|during))?(?:\s+(?:the\s+)?(?:last|past)\s+(?P<count>\d+)\s+"
+                    r"(?P<unit>day|week|month)s?|\s+(?:the\s+)?(?:last|past)\s+(?P<single>day|week|month)"
+                    r"|\s+this\s+(?P<this>day|week{this_month})|\s+today)?")
+_PERIOD = _PERIOD_TEMPLATE.format(this_month="")
+# "this month" too, for tools that filter whole UTC days and can start on the 1st
+_CALENDAR_PERIOD = _PERIOD_TEMPLATE.format(this_month="|month")
+_LIST = r"(?:list|show|get|display|what are|which are)(?:\s+me)?(?:\s+(?:all|the|all the|my|our))?"
+_FILLER = re.compile(r"^(?:please\s+|can you\s+|could you\s+|would you\s+)+|\s+please$")
+_UNIT_DAYS = {"day": 1, "week": 7, "month": 30}
+
+_ROUTER_STATS_KEYS = ("routed", "fallbacks", "errors")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Lowercase a prompt and strip punctuation, extra spaces and politeness
+
+    Args:
+        prompt (str): User prompt
+
+    Returns:
+        str: Normalized prompt
+    """
+    prompt = re.sub(r"[?!.]+$", "", prompt.strip().lower())
+    prompt = re.sub(r"\s+", " ", prompt)
+    return _FILLER.sub("", prompt).strip()
+
+
+def period_days(match: re.Match, default: int, calendar: bool = False) -> int:
+    """
+    Get the lookback in days from a matched period, e.g. "last 2 weeks" is 14
+
+    Calendar periods count the whole UTC days before today, since the tool
+    window always includes today: "this month" is the days since the 1st and
+    "today" is 0.
+
+    Args:
+        match (re.Match): Match of a pattern containing the period group
+        default (int): Days used when no period was given
+        calendar (bool): Whether the tool filters whole UTC days, for a pattern using _CALENDAR_PERIOD
+
+    Returns:
+        int: Lookback in days
+    """
+    if match.group("count"):
+        return int(match.group("count")) * _UNIT_DAYS[match.group("unit")]
+    if match.group("single"):
+        return _UNIT_DAYS[match.group("single")]
+    if match.group("this") == "month":
+        return datetime.now(timezone.utc).day - 1
+    if match.group("this") == "day" or match.group(0).endswith("today"):
+        return 0 if calendar else 1
+    if match.group("this"):
+        return _UNIT_DAYS[match.group("this")]
+    return default
+
+
+def _project_number() -> str:
+    return os.environ["GCP_PROJECT_NUMBER"]
+
+
+def _project_id() -> str:
+    return os.environ["GCP_PROJECT_ID"]
+
+
+# (pattern, tool name, builder of the tool arguments from the match)
+ROUTES: list[tuple[re.Pattern, str, Callable[[re.Match], dict[str, Any]]]] = [
+    (re.compile(rf"{_LIST} (?:vms|virtual machines|instances|compute instances)"
+                rf"(?: (?:in|for) (?:zones? )?(?P<zones>{_ZONE}(?:(?:, ?| and | )+{_ZONE})*))?"),
+     "list_vms",
+     lambda match: {"project_number": _project_number(),
+                    "zone_name": ",".join(re.findall(_ZONE, match.group("zones") or ""))}),
+    (re.compile(rf"{_LIST} (?:bigquery )?datasets"),
+     "list_datasets", lambda match: {"project_id": _project_id()}),
+    (re.compile(rf"{_LIST} (?:cloud run )?jobs"),
+     "list_cloud_run_jobs", lambda match: {"project_number": _project_number()}),
+    (re.compile(rf"{_LIST} (?:custom )?service accounts"),
+     "list_custom_service_accounts", lambda match: {"project_number": _project_number()}),
+    (re.compile(rf"(?:{_LIST} )?(?:cloud run )?(?:job health|jobs health|health of (?:all )?(?:cloud run )?jobs)"
+                rf"{_PERIOD}"),
+     "get_cloud_run_jobs_health",
+     lambda match: {"project_number": _project_number(), "days": period_days(match, 7)}),
+    (re.compile(rf"(?:{_LIST} |which )?(?:cloud run )?jobs (?:that )?(?:failed|have failed|with failures)"
+                rf"{_PERIOD}"),
+     "get_cloud_run_jobs_health",
+     lambda match: {"project_number": _project_number(), "days": period_days(match, 7), "failed_only": True}),
+    (re.compile(rf"(?:{_LIST} )?(?:the )?(?:gcp )?(?:costs?|spend(?:ing)?) (?:by|per) service{_CALENDAR_PERIOD}"),
+     "get_cost_by_service",
+     lambda match: {"project_id": _project_id(), "days": period_days(match, 30, calendar=True)}),
+    (re.compile(rf"(?:{_LIST} )?(?:the )?(?:daily )?(?:costs?|spend(?:ing)?) (?:trends?|per day|by day)"
+                rf"{_CALENDAR_PERIOD}"),
+     "get_cost_trends",
+     lambda match: {"project_id": _project_id(), "days": period_days(match, 30, calendar=True)}),
+    (re.compile(rf"(?:{_LIST} |what is |what's )?(?:the )?(?:current month(?:'s)?|this month(?:'s)?|month to date"
+                rf"|monthly) (?:gcp )?(?:costs?|spend(?:ing)?|bill)(?: so far)?"),
+     "get_current_month_costs", lambda match: {"project_id": _project_id()}),
+    (re.compile(rf"(?:{_LIST} )?(?:the )?bigquery (?:usage|bytes processed) (?:by|per) user{_PERIOD}"),
+     "get_bigquery_usage_by_user",
+     lambda match: {"project_id": _project_id(), "last_n_days": period_days(match, 7)}),
+]
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_cell(item) for item in value)
+    if value is None:
+        return "-"
+    return str(value)
+
+
+def format_table(columns: list[str], rows: list[list[Any]]) -> str:
+    """
+    Format rows as a Markdown table with columns aligned by spaces
+
+    Args:
+        columns (list[str]): Column names
+        rows (list[list[Any]]): One value list per row
+
+    Returns:
+        str: Table text
+    """
+    cells = [[_cell(value) for value in row] for row in rows]
+    widths = [max([len(str(column))] + [len(row[index]) for row in cells]) for index, column in enumerate(columns)]
+
+    def line(values: list[str]) -> str:
+        return "| " + " | ".join(value.ljust(width) for value, width in zip(values, widths)) + " |"
+
+    return "\n".join([line([str(column) for column in columns]), line(["-" * width for width in widths])]
+                     + [line(row) for row in cells])
+
+
+def format_result(result: Any) -> str:
+    """
+    Format a tool result for the terminal
+
+    Args:
+        result (Any): Tool result, possibly shaped into columnar tables
+
+    Returns:
+        str: Table, numbered list or key/value lines
+    """
+    if isinstance(result, dict) and "columns" in result and "rows" in result:
+        text = format_table(result["columns"], result["rows"])
+        if result.get("more_rows"):
+            text += f"\n... {result['more_rows']} more rows"
+        return text
+    if isinstance(result, list):
+        if not result:
+            return "No results."
+        records = [item for item in result if isinstance(item, dict)]
+        if len(records) == len(result):
+            columns = list(dict.fromkeys(key for record in records for key in record))
+            return format_table(columns, [[record.get(column) for column in columns] for record in records])
+        return "\n".join(f"{index}. {_cell(item)}" for index, item in enumerate(result, start=1))
+    if isinstance(result, dict):
+        width = max((len(str(key)) for key in result), default=0)
+        return "\n".join(f"{str(key).ljust(width)} : {_cell(value)}" for key, value in result.items())
+    return _cell(result)
+
+
+def _is_error(result: Any) -> bool:
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list):
+        return any(isinstance(item, dict) and "error" in item for item in result)
+    return False
+
+
+class IntentRouter:
+    """
+    Answers fixed-form prompts by calling a tool directly
+    """
+
+    def __init__(self, tools: list[Callable]):
+        """
+        Args:
+            tools (list[Callable]): Tool functions, normally the ones given to the model
+        """
+        self.tools = {tool.__name__: tool for tool in tools}
+        self._stats = {key: 0 for key in _ROUTER_STATS_KEYS}
+        self._seconds: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def match(self, prompt: str) -> Optional[tuple[str, dict[str, Any]]]:
+        """
+        Find the tool and arguments for a prompt
+
+        Args:
+            prompt (str): User prompt
+
+        Returns:
+            Optional[tuple[str, dict[str, Any]]]: Tool name and arguments, or None if no route matches
+        """
+        text = normalize_prompt(prompt)
+        for pattern, tool_name, build_args in ROUTES:
+            if tool_name not in self.tools:
+                continue
+            match = pattern.fullmatch(text)
+            if match:
+                return tool_name, build_args(match)
+        return None
+
+    def route(self, prompt: str) -> Optional[str]:
+        """
+        Answer a prompt locally if it matches a route
+
+        Args:
+            prompt (str): User prompt
+
+        Returns:
+            Optional[str]: Formatted answer, or None to send the prompt to the model
+        """
+        routed = self.match(prompt)
+        if routed is None:
+            self._count("fallbacks")
+            return None
+
+        tool_name, args = routed
+        started = time.perf_counter()
+        try:
+            result = self.tools[tool_name](**args)
+        except Exception:
+            result = {"error": "tool failed"}
+        if _is_error(result):
+            # Let the model explain the failure and suggest next steps
+            self._count("errors")
+            return None
+
+        answer = format_result(result)
+        self._count("routed")
+        with self._lock:
+            self._seconds[tool_name] = max(self._seconds.get(tool_name, 0.0), time.perf_counter() - started)
+        return answer
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get routing counters and the slowest routed call per tool
+
+        Returns:
+            dict[str, Any]: Routed, fallback and error counts and max seconds per tool
+        """
+        with self._lock:
+            return {**self._stats, "max_seconds": dict(self._seconds)}
@@ -0,0 +1,307 @@
+"""
+Multi-session HTTP/WebSocket server for the GCP Monitoring Bot.
+
+One process hosts many chat sessions. Every session has its own Gemini chat
+history, while the GenAI client, the GCP client pool and the tool result
+caches are shared by all of them. The number of turns running at once is
+bounded; requests that cannot get a slot in time are rejected with 503 so a
+burst of questions cannot overload the process. Turn events (answer text
+chunks and tool progress) are streamed as they happen, as NDJSON over HTTP or
+as JSON messages over a WebSocket.
+
+Endpoints:
+    POST   /sessions                    Create a session
+    DELETE /sessions/{session_id}       Close a session
+    POST   /sessions/{session_id}/messages  Send {"message": ...}, streams NDJSON events
+    GET    /sessions/{session_id}/ws    WebSocket, each text frame is one user message
+    GET    /healthz                     Session, concurrency and cache counters
+"""
+import asyncio
+import contextlib
+import json
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Optional
+
+from aiohttp import WSMsgType, web
+from google import genai
+
+from .aio import AsyncParallelToolChat, create_async_bot
+from .bigquery import bytes_billed_stats, recent_billed_calls
+from .cache import cache_stats
+from .output_shaping import shaping_stats
+
+MAX_CONCURRENT_TURNS = int(os.environ.get("SERVER_MAX_CONCURRENT_TURNS", "16"))
+MAX_QUEUED_TURNS = int(os.environ.get("SERVER_MAX_QUEUED_TURNS", "32"))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("SERVER_QUEUE_TIMEOUT_SECONDS", "10"))
+MAX_SESSIONS = int(os.environ.get("SERVER_MAX_SESSIONS", "200"))
+SESSION_IDLE_SECONDS = float(os.environ.get("SERVER_SESSION_IDLE_SECONDS", "3600"))
+
+
+class ServerBusy(Exception):
+    """
+    Raised when no turn slot becomes available in time
+    """
+
+
+class Session:
+    """
+    A single user's chat session
+    """
+
+    def __init__(self, session_id: str, chat: AsyncParallelToolChat):
+        self.session_id = session_id
+        self.chat = chat
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionManager:
+    """
+    Owns all chat sessions and the limits on how many turns run at once
+    """
+
+    def __init__(self, client: genai.Client):
+        self.client = client
+        self.sessions: dict[str, Session] = {}
+        self.turn_slots = asyncio.Semaphore(MAX_CONCURRENT_TURNS)
+        self.running_turns = 0
+        self.queued_turns = 0
+
+    def create(self) -> Session:
+        """
+        Create a new session, evicting the least recently used one when full
+
+        Returns:
+            Session: New session
+        """
+        if len(self.sessions) >= MAX_SESSIONS:
+            idle = [session for session in self.sessions.values() if not session.lock.locked()]
+            if not idle:
+                raise ServerBusy("Too many active sessions")
+            del self.sessions[min(idle, key=lambda session: session.last_used).session_id]
+
+        session_id = uuid.uuid4().hex
+        session = Session(session_id, create_async_bot(self.client))
+        self.sessions[session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self.sessions.get(session_id)
+
+    def close(self, session_id: str) -> bool:
+        return self.sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        """
+        Close sessions that have been idle for longer than the idle timeout
+
+        Returns:
+            int: Number of sessions closed
+        """
+        cutoff = time.monotonic() - SESSION_IDLE_SECONDS
+        expired = [session_id for session_id, session in self.sessions.items()
+                   if session.last_used < cutoff and not session.lock.locked()]
+        for session_id in expired:
+            del self.sessions[session_id]
+        return len(expired)
+
+    @contextlib.asynccontextmanager
+    async def turn_slot(self):
+        """
+        Wait for a free turn slot, applying backpressure when the server is saturated
+
+        Raises:
+            ServerBusy: If too many turns are queued or no slot frees up in time
+        """
+        if self.queued_turns >= MAX_QUEUED_TURNS:
+            raise ServerBusy("Too many queued requests")
+
+        self.queued_turns += 1
+        try:
+            await asyncio.wait_for(self.turn_slots.acquire(), QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise ServerBusy("Timed out waiting for a free slot")
+        finally:
+            self.queued_turns -= 1
+
+        self.running_turns += 1
+        try:
+            yield
+        finally:
+            self.running_turns -= 1
+            self.turn_slots.release()
+
+    async def run_turn(self, session: Session, message: str) -> AsyncIterator[dict[str, Any]]:
+        """
+        Run one turn for a session and stream its events
+
+        Args:
+            session (Session): Session to use
+            message (str): User message
+
+        Yields:
+            dict[str, Any]: Turn events, ending with a "done" event
+        """
+        if session.lock.locked():
+            raise ServerBusy("A message is already being processed for this session")
+
+        async with session.lock, self.turn_slot():
+            session.last_used = time.monotonic()
+            started = time.perf_counter()
+            async for event in session.chat.send_message_stream(message):
+                yield event
+            session.last_used = time.monotonic()
+            yield {"type": "done", "seconds": round(time.perf_counter() - started, 3)}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "running_turns": self.running_turns,
+            "queued_turns": self.queued_turns,
+            "max_concurrent_turns": MAX_CONCURRENT_TURNS,
+            "tool_caches": cache_stats(),
+            "bigquery_bytes": bytes_billed_stats(),
+            "bigquery_recent_calls": recent_billed_calls(),
+            "tool_output_tokens": shaping_stats(),
+            "history_tokens": sum(session.chat.history.stats()["tokens"] for session in self.sessions.values()),
+        }
+
+
+def _manager(request: web.Request) -> SessionManager:
+    return request.app["sessions"]
+
+
+def _session_or_404(request: web.Request) -> Session:
+    session = _manager(request).get(request.match_info["session_id"])
+    if session is None:
+        raise web.HTTPNotFound(text=json.dumps({"error": "Unknown session"}), content_type="application/json")
+    return session
+
+
+def _busy_response(error: ServerBusy) -> web.Response:
+    return web.json_response({"error": str(error)}, status=503, headers={"Retry-After": "5"})
+
+
+async def create_session(request: web.Request) -> web.Response:
+    try:
+        session = _manager(request).create()
+    except ServerBusy as e:
+        return _busy_response(e)
+    return web.json_response({"session_id": session.session_id}, status=201)
+
+
+async def delete_session(request: web.Request) -> web.Response:
+    if not _manager(request).close(request.match_info["session_id"]):
+        return web.json_response({"error": "Unknown session"}, status=404)
+    return web.Response(status=204)
+
+
+async def post_message(request: web.Request) -> web.StreamResponse:
+    session = _session_or_404(request)
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return web.json_response({"error": "Request body must be JSON"}, status=400)
+    message = body.get("message") if isinstance(body, dict) else None
+    if not message:
+        return web.json_response({"error": "Field 'message' is required"}, status=400)
+
+    events = _manager(request).run_turn(session, message)
+    try:
+        first_event = await events.__anext__()
+    except ServerBusy as e:
+        return _busy_response(e)
+    except Exception as e:
+        # Nothing was streamed yet, so the failure can still be the response status
+        return web.json_response({"error": str(e)}, status=500)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    try:
+        await response.write(json.dumps(first_event).encode() + b"\n")
+        async for event in events:
+            await response.write(json.dumps(event).encode() + b"\n")
+    except ConnectionResetError:
+        # The client went away: closing the turn below rolls it back, and there is nobody left to tell
+        return response
+    except Exception as e:
+        with contextlib.suppress(ConnectionResetError):
+            await response.write(json.dumps({"type": "error", "error": str(e)}).encode() + b"\n")
+    finally:
+        # Also runs when aiohttp cancels the handler of a dropped connection, which then propagates quietly
+        await events.aclose()
+    with contextlib.suppress(ConnectionResetError):
+        await response.write_eof()
+    return response
+
+
+async def session_websocket(request: web.Request) -> web.WebSocketResponse:
+    session = _session_or_404(request)
+    websocket = web.WebSocketResponse(heartbeat=30)
+    await websocket.prepare(request)
+
+    async for ws_message in websocket:
+        if ws_message.type != WSMsgType.TEXT:
+            continue
+        try:
+            async for event in _manager(request).run_turn(session, ws_message.data):
+                await websocket.send_json(event)
+        except ServerBusy as e:
+            await websocket.send_json({"type": "busy", "error": str(e)})
+        except Exception as e:
+            await websocket.send_json({"type": "error", "error": str(e)})
+    return websocket
+
+
+async def healthz(request: web.Request) -> web.Response:
+    return web.json_response(_manager(request).stats())
+
+
+async def _evict_idle_sessions(app: web.Application):
+    async def evict_forever():
+        while True:
+            await asyncio.sleep(60)
+            app["sessions"].evict_idle()
+
+    task = asyncio.create_task(evict_forever())
+    yield
+    task.cancel()
+
+
+def create_app(client: Optional[genai.Client] = None) -> web.Application:
+    """
+    Create the aiohttp application hosting the chat sessions
+
+    Args:
+        client (Optional[genai.Client]): GenAI client shared by every session, created if omitted
+
+    Returns:
+        web.Application: Configured application
+    """
+    if client is None:
+        client = genai.Client(api_key=os.environ["GENAI_API_KEY"])
+
+    app = web.Application()
+    app["sessions"] = SessionManager(client)
+    app.cleanup_ctx.append(_evict_idle_sessions)
+    app.add_routes([
+        web.post("/sessions", create_session),
+        web.delete("/sessions/{session_id}", delete_session),
+        web.post("/sessions/{session_id}/messages", post_message),
+        web.get("/sessions/{session_id}/ws", session_websocket),
+        web.get("/healthz", healthz),
+    ])
+    return app
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8080) -> None:
+    """
+    Serve the bot over HTTP until interrupted
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to listen on
+    """
+    web.run_app(create_app(), host=host, port=port)
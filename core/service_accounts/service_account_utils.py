@@ -1,5 +1,4 @@
-from google.auth import default
-from googleapiclient.discovery import build
+from ..utils.client_pool import get_iam_service
 
 
 def list_custom_service_accounts(project_number: str):
@@ -20,8 +19,7 @@ def list_custom_service_accounts(project_number: str):
     Returns:
         List[str]: A list of email addresses of custom-created service accounts.
     """
-    credentials, _ = default()
-    service = build("iam", "v1", credentials=credentials)
+    service = get_iam_service()
 
     name = f"projects/{project_number}"
     accounts = service.projects().serviceAccounts().list(name=name).execute()
@@ -0,0 +1,335 @@
+"""
+Concurrent dispatch of Gemini function calls.
+
+Automatic function calling in google-genai runs the calls of a turn one after
+another. `ParallelToolChat` disables it and runs every function call returned in
+a single model response concurrently on a bounded, shared thread pool, with a
+timeout per call, and sends the results back in the original call order.
+"""
+import inspect
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Callable, Iterator, Optional
+
+from google.genai import types
+
+from .history import HistoryManager
+from .prompt import TopicScope
+
+TOOL_CALL_TIMEOUT_SECONDS = float(os.environ.get("TOOL_CALL_TIMEOUT_SECONDS", "60"))
+TOOL_CALL_MAX_WORKERS = int(os.environ.get("TOOL_CALL_MAX_WORKERS", "8"))
+# Same limit automatic function calling uses for model/tool round trips per turn
+MAX_TOOL_ROUNDS = 10
+
+_executor = ThreadPoolExecutor(max_workers=TOOL_CALL_MAX_WORKERS, thread_name_prefix="tool-call")
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Convert a tool result into JSON-compatible values for a function response
+
+    Args:
+        value (Any): Tool result
+
+    Returns:
+        Any: Value made of dicts, lists, strings, numbers, booleans and None
+    """
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def response_text(response: types.GenerateContentResponse) -> str:
+    """
+    Get the text parts of a (possibly partial) response without function call warnings
+
+    Args:
+        response (types.GenerateContentResponse): Model response or stream chunk
+
+    Returns:
+        str: Concatenated text, empty if the response has none
+    """
+    if not response.candidates or not response.candidates[0].content:
+        return ""
+    parts = response.candidates[0].content.parts or []
+    return "".join(part.text for part in parts if part.text and not part.thought)
+
+
+def function_response_parts(function_calls: list[types.FunctionCall],
+                            responses: list[dict[str, Any]]) -> list[types.Part]:
+    """
+    Build function response parts for the model, one per call in call order
+
+    Args:
+        function_calls (list[types.FunctionCall]): Calls returned by the model
+        responses (list[dict[str, Any]]): Matching {"result": ...} or {"error": ...} payloads
+
+    Returns:
+        list[types.Part]: Function response parts
+    """
+    return [
+        types.Part(function_response=types.FunctionResponse(
+            id=function_call.id,
+            name=function_call.name,
+            response=response
+        ))
+        for function_call, response in zip(function_calls, responses)
+    ]
+
+
+def answer_only_config(config: types.GenerateContentConfig) -> types.GenerateContentConfig:
+    """
+    Copy a chat config with function calling turned off, so the model has to answer in text
+
+    Args:
+        config (types.GenerateContentConfig): Chat config declaring the tools inline (not a context cache,
+            which cannot be combined with a tool config)
+
+    Returns:
+        types.GenerateContentConfig: Config for the request that closes the last tool round
+    """
+    return config.model_copy(update={"tool_config": types.ToolConfig(
+        function_calling_config=types.FunctionCallingConfig(mode=types.FunctionCallingConfigMode.NONE)
+    )})
+
+
+def coerce_args(func: Callable, args: dict[str, Any]) -> dict[str, Any]:
+    """
+    Convert whole-number floats to int for int parameters, the model sends all numbers as floats
+    """
+    parameters = inspect.signature(func).parameters
+    coerced = {}
+    for name, value in args.items():
+        parameter = parameters.get(name)
+        if parameter is not None and parameter.annotation is int and isinstance(value, float) and value.is_integer():
+            value = int(value)
+        coerced[name] = value
+    return coerced
+
+
+def call_tool(func: Callable, args: Optional[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Invoke a tool and wrap its outcome the way automatic function calling does
+
+    Args:
+        func (Callable): Tool function
+        args (Optional[dict[str, Any]]): Arguments from the model's function call
+
+    Returns:
+        dict[str, Any]: {"result": ...} on success or {"error": ...} on failure
+    """
+    try:
+        return {"result": to_jsonable(func(**coerce_args(func, args or {})))}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def run_function_calls(function_calls: list[types.FunctionCall], tools: dict[str, Callable],
+                       timeout: float = TOOL_CALL_TIMEOUT_SECONDS) -> list[types.Part]:
+    """
+    Run function calls concurrently and build their response parts in call order
+
+    Args:
+        function_calls (list[types.FunctionCall]): Calls returned by the model
+        tools (dict[str, Callable]): Tool functions by name
+        timeout (float): Seconds each call may take before it is reported as timed out
+
+    Returns:
+        list[types.Part]: One function response part per call, in the same order
+    """
+    futures = []
+    for function_call in function_calls:
+        func = tools.get(function_call.name)
+        if func is None:
+            futures.append(None)
+        else:
+            futures.append(_executor.submit(call_tool, func, function_call.args))
+
+    wait([future for future in futures if future is not None], timeout=timeout)
+
+    responses = []
+    for function_call, future in zip(function_calls, futures):
+        if future is None:
+            responses.append({"error": f"Unknown tool: {function_call.name}"})
+        elif future.done():
+            responses.append(future.result())
+        else:
+            future.cancel()
+            responses.append({"error": f"Tool call timed out after {timeout:g} seconds"})
+    return function_response_parts(function_calls, responses)
+
+
+def _timed_call_tool(func: Callable, args: Optional[dict[str, Any]]) -> tuple[dict[str, Any], float]:
+    started = time.perf_counter()
+    response = call_tool(func, args)
+    return response, time.perf_counter() - started
+
+
+def iter_function_calls(function_calls: list[types.FunctionCall], tools: dict[str, Callable],
+                        timeout: float = TOOL_CALL_TIMEOUT_SECONDS) -> Iterator[tuple[int, dict[str, Any], float]]:
+    """
+    Run function calls concurrently, yielding each outcome as soon as it completes
+
+    Args:
+        function_calls (list[types.FunctionCall]): Calls returned by the model
+        tools (dict[str, Callable]): Tool functions by name
+        timeout (float): Seconds the calls may take before the rest are reported as timed out
+
+    Yields:
+        tuple[int, dict[str, Any], float]: Call index, response payload and seconds taken
+    """
+    futures = {}
+    for index, function_call in enumerate(function_calls):
+        func = tools.get(function_call.name)
+        if func is None:
+            yield index, {"error": f"Unknown tool: {function_call.name}"}, 0.0
+        else:
+            futures[_executor.submit(_timed_call_tool, func, function_call.args)] = index
+
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            pending.discard(future)
+            response, seconds = future.result()
+            yield futures[future], response, seconds
+    except FutureTimeoutError:
+        for future in pending:
+            future.cancel()
+            yield futures[future], {"error": f"Tool call timed out after {timeout:g} seconds"}, timeout
+
+
+class ParallelToolChat:
+    """
+    Chat session wrapper that executes each turn's function calls concurrently
+    """
+
+    def __init__(self, client, model: str, config: types.GenerateContentConfig, tools: list[Callable],
+                 scope: Optional[TopicScope] = None):
+        """
+        Args:
+            client (genai.Client): GenAI client
+            model (str): Model name
+            config (types.GenerateContentConfig): Chat config with automatic function calling disabled
+            tools (list[Callable]): Tool functions the model may call
+            scope (Optional[TopicScope]): Picks a smaller per-turn config from the prompt's topics
+        """
+        self.client = client
+        self.model = model
+        self.config = config
+        self.tools = {tool.__name__: tool for tool in tools}
+        self.scope = scope
+        self.history = HistoryManager()
+        self.chat = client.chats.create(model=model, config=config, history=[])
+
+    def _rollback(self, history: list[types.Content]) -> None:
+        self.chat = self.client.chats.create(model=self.model, config=self.config, history=history)
+
+    def _compact_history(self) -> None:
+        # Done after a turn, so the next turn starts from a history within the threshold
+        compacted = self.history.compact(self.chat.get_history())
+        if compacted is not None:
+            self._rollback(compacted)
+
+    def add_exchange(self, prompt: str, answer: str) -> None:
+        """
+        Record a prompt answered without the model, so follow-up questions can refer to it
+
+        Args:
+            prompt (str): User prompt
+            answer (str): Answer given to the user
+        """
+        self._rollback(list(self.chat.get_history()) + [
+            types.Content(role="user", parts=[types.Part(text=prompt)]),
+            types.Content(role="model", parts=[types.Part(text=answer)]),
+        ])
+
+    def send_message(self, message) -> types.GenerateContentResponse:
+        """
+        Send a user message and resolve all function calls until the model answers
+
+        The results of the last allowed tool round are sent with function
+        calling turned off, so the turn always ends with an answer. If the turn
+        fails the chat history is restored to what it was before the message
+        was sent.
+
+        Args:
+            message: User prompt or content parts
+
+        Returns:
+            types.GenerateContentResponse: Final model response for the turn
+        """
+        history = list(self.chat.get_history())
+        try:
+            config = self.scope.config_for(message) if self.scope is not None else None
+            response = self.chat.send_message(message, config=config)
+            for round_number in range(1, MAX_TOOL_ROUNDS + 1):
+                if not response.function_calls:
+                    break
+                parts = run_function_calls(response.function_calls, self.tools)
+                response = self.chat.send_message(
+                    parts, config=answer_only_config(self.config) if round_number == MAX_TOOL_ROUNDS else config
+                )
+        except BaseException:
+            self._rollback(history)
+            raise
+        self._compact_history()
+        return response
+
+    def send_message_stream(self, message) -> Iterator[dict[str, Any]]:
+        """
+        Send a user message and stream the turn as events
+
+        Events are dicts with a "type" of "text" (a chunk of the answer as it
+        is generated), "tool_start" or "tool_end". As in `send_message`, the
+        results of the last allowed tool round are sent with function calling
+        turned off, and the history is restored if the turn does not finish.
+
+        Args:
+            message: User prompt or content parts
+
+        Yields:
+            dict[str, Any]: Turn events in the order they happen
+        """
+        history = list(self.chat.get_history())
+        completed = False
+        try:
+            config = self.scope.config_for(message) if self.scope is not None else None
+            for round_number in range(MAX_TOOL_ROUNDS + 1):
+                last_round = round_number == MAX_TOOL_ROUNDS
+                function_calls = []
+                stream = self.chat.send_message_stream(
+                    message, config=answer_only_config(self.config) if last_round else config
+                )
+                for chunk in stream:
+                    function_calls.extend(chunk.function_calls or [])
+                    text = response_text(chunk)
+                    if text:
+                        yield {"type": "text", "text": text}
+                if not function_calls or last_round:
+                    break
+
+                for function_call in function_calls:
+                    yield {"type": "tool_start", "name": function_call.name,
+                           "args": to_jsonable(dict(function_call.args or {}))}
+                responses = [None] * len(function_calls)
+                for index, response, seconds in iter_function_calls(function_calls, self.tools):
+                    responses[index] = response
+                    yield {"type": "tool_end", "name": function_calls[index].name,
+                           "seconds": round(seconds, 3), "error": response.get("error")}
+                message = function_response_parts(function_calls, responses)
+            completed = True
+            self._compact_history()
+        finally:
+            if not completed:
+                self._rollback(history)
@@ -0,0 +1,286 @@
+"""
+Process-wide pool of GCP credentials and API clients.
+
+Credentials are resolved once and every API client is created lazily on first use
+and then reused by all tool calls. Discovery-based services (Compute, Cloud Run,
+IAM) are not thread-safe, so those are kept per thread on top of a shared parsed
+discovery document; the gRPC/REST clients (BigQuery, Monitoring, Logging, Billing)
+are thread-safe and shared by the whole process. Asyncio clients are bound to an
+event loop, so they are kept per loop and dropped once their loop is closed.
+
+The client libraries themselves are imported on first use as well, so
+importing the tools costs nothing until a tool actually talks to an API.
+"""
+import asyncio
+import json
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery, billing_v1, logging_v2, monitoring_v3
+
+CLOUD_PLATFORM_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+HTTP_TIMEOUT_SECONDS = 60
+
+_lock = threading.RLock()
+# Held while refreshing the token only, so other pool lookups do not wait on the network
+_refresh_lock = threading.Lock()
+_local = threading.local()
+
+_credentials = None
+_generation = 0
+_discovery_documents: dict[tuple[str, str], dict] = {}
+_clients: dict[tuple[str, Optional[str]], Any] = {}
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+
+def get_credentials():
+    """
+    Get the shared Application Default Credentials, refreshing them if expired
+
+    Returns:
+        google.auth.credentials.Credentials: Process-wide credentials object
+    """
+    global _credentials
+    with _lock:
+        if _credentials is None:
+            import google.auth
+            _credentials, _ = google.auth.default(scopes=[CLOUD_PLATFORM_SCOPE])
+        credentials = _credentials
+
+    if not credentials.valid:
+        with _refresh_lock:
+            if not credentials.valid:
+                from google.auth.transport.requests import Request
+                credentials.refresh(Request())
+    return credentials
+
+
+def _get_discovery_document(api: str, version: str) -> dict:
+    """
+    Load and parse a discovery document once per process
+
+    Args:
+        api (str): API name, e.g. "compute"
+        version (str): API version, e.g. "v1"
+
+    Returns:
+        dict: Parsed discovery document
+    """
+    key = (api, version)
+    with _lock:
+        if key not in _discovery_documents:
+            from googleapiclient import discovery
+            from googleapiclient.discovery_cache import get_static_doc
+
+            document = get_static_doc(api, version)
+            if document is None:
+                # Not bundled with the client library, fall back to a regular build
+                service = discovery.build(api, version, credentials=get_credentials(), cache_discovery=False)
+                document = service._rootDesc
+            else:
+                document = json.loads(document)
+            _discovery_documents[key] = document
+        return _discovery_documents[key]
+
+
+def _get_discovery_service(api: str, version: str):
+    """
+    Get a discovery-based service bound to a keep-alive HTTP connection for the calling thread
+
+    Args:
+        api (str): API name
+        version (str): API version
+
+    Returns:
+        googleapiclient.discovery.Resource: Service resource for the calling thread
+    """
+    services = getattr(_local, "services", None)
+    if services is None or getattr(_local, "generation", None) != _generation:
+        services = _local.services = {}
+        _local.generation = _generation
+
+    key = (api, version)
+    if key not in services:
+        import google_auth_httplib2
+        import httplib2
+        from googleapiclient import discovery
+
+        http = google_auth_httplib2.AuthorizedHttp(
+            get_credentials(),
+            http=httplib2.Http(timeout=HTTP_TIMEOUT_SECONDS)
+        )
+        services[key] = discovery.build_from_document(_get_discovery_document(api, version), http=http)
+    return services[key]
+
+
+def _get_shared_client(kind: str, key: Optional[str], factory):
+    """
+    Get a thread-safe client shared by the whole process, creating it on first use
+
+    Args:
+        kind (str): Client kind, e.g. "bigquery"
+        key (Optional[str]): Extra cache key such as the project
+        factory: Callable taking credentials and returning a new client
+
+    Returns:
+        Any: Shared client instance
+    """
+    cache_key = (kind, key)
+    client = _clients.get(cache_key)
+    if client is not None:
+        return client
+
+    credentials = get_credentials()
+    with _lock:
+        if cache_key not in _clients:
+            _clients[cache_key] = factory(credentials)
+        return _clients[cache_key]
+
+
+def _get_loop_client(kind: str, factory):
+    """
+    Get an asyncio client for the running event loop, creating it on first use
+
+    Clients of event loops that have been closed are dropped on the way.
+
+    Args:
+        kind (str): Client kind, e.g. "monitoring_async"
+        factory: Callable taking credentials and returning a new client
+
+    Returns:
+        Any: Client bound to the running loop
+    """
+    loop = asyncio.get_running_loop()
+    clients = _loop_clients.get(loop)
+    if clients is not None and kind in clients:
+        return clients[kind]
+
+    credentials = get_credentials()
+    with _lock:
+        for closed_loop in [other for other in list(_loop_clients.keys()) if other.is_closed()]:
+            del _loop_clients[closed_loop]
+        clients = _loop_clients.setdefault(loop, {})
+        if kind not in clients:
+            clients[kind] = factory(credentials)
+        return clients[kind]
+
+
+def get_compute_service():
+    """
+    Get the Compute Engine v1 service
+
+    Returns:
+        googleapiclient.discovery.Resource: Compute v1 service
+    """
+    return _get_discovery_service("compute", "v1")
+
+
+def get_run_service():
+    """
+    Get the Cloud Run v2 service
+
+    Returns:
+        googleapiclient.discovery.Resource: Cloud Run v2 service
+    """
+    return _get_discovery_service("run", "v2")
+
+
+def get_iam_service():
+    """
+    Get the IAM v1 service
+
+    Returns:
+        googleapiclient.discovery.Resource: IAM v1 service
+    """
+    return _get_discovery_service("iam", "v1")
+
+
+def get_bigquery_client(project_id: str) -> "bigquery.Client":
+    """
+    Get the BigQuery client for a project
+
+    Args:
+        project_id (str): GCP project ID used for billing the queries
+
+    Returns:
+        bigquery.Client: Shared BigQuery client
+    """
+    def create(credentials):
+        from google.cloud import bigquery
+        return bigquery.Client(project=project_id, credentials=credentials)
+
+    return _get_shared_client("bigquery", project_id, create)
+
+
+def get_monitoring_client() -> "monitoring_v3.MetricServiceClient":
+    """
+    Get the Cloud Monitoring metric service client
+
+    Returns:
+        monitoring_v3.MetricServiceClient: Shared Monitoring client
+    """
+    def create(credentials):
+        from google.cloud import monitoring_v3
+        return monitoring_v3.MetricServiceClient(credentials=credentials)
+
+    return _get_shared_client("monitoring", None, create)
+
+
+def get_monitoring_async_client() -> "monitoring_v3.MetricServiceAsyncClient":
+    """
+    Get the asyncio Cloud Monitoring client for the running event loop
+
+    Returns:
+        monitoring_v3.MetricServiceAsyncClient: Monitoring client bound to the current loop
+    """
+    def create(credentials):
+        from google.cloud import monitoring_v3
+        return monitoring_v3.MetricServiceAsyncClient(credentials=credentials)
+
+    return _get_loop_client("monitoring_async", create)
+
+
+def get_logging_client(project: str) -> "logging_v2.Client":
+    """
+    Get the Cloud Logging client for a project
+
+    Args:
+        project (str): GCP project ID or number
+
+    Returns:
+        logging_v2.Client: Shared Logging client
+    """
+    def create(credentials):
+        from google.cloud import logging_v2
+        return logging_v2.Client(project=project, credentials=credentials)
+
+    return _get_shared_client("logging", project, create)
+
+
+def get_billing_client() -> "billing_v1.CloudBillingClient":
+    """
+    Get the Cloud Billing client
+
+    Returns:
+        billing_v1.CloudBillingClient: Shared Billing client
+    """
+    def create(credentials):
+        from google.cloud import billing_v1
+        return billing_v1.CloudBillingClient(credentials=credentials)
+
+    return _get_shared_client("billing", None, create)
+
+
+def reset_clients() -> None:
+    """
+    Drop all pooled credentials and clients so they are recreated on next use
+    """
+    global _credentials, _generation
+    with _lock:
+        _credentials = None
+        _generation += 1
+        _discovery_documents.clear()
+        _clients.clear()
+        _loop_clients.clear()
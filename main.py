@@ -4,30 +4,254 @@ GCP Monitoring Bot - Main Entry Point
 
 A QnA interface for monitoring GCP environments using Google Gemini API
 """
+import argparse
+import asyncio
+import os
+import signal
 import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from core.bot import create_bot
+from core.router import IntentRouter
 from core.utils.env_utils import load_environment_variables
 
+EXIT_COMMANDS = ("q", "quit", "exit")
 
-def main():
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parse command line arguments
+
+    Args:
+        argv: Argument list, defaults to sys.argv
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="GCP Monitoring Bot")
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="Run the asyncio chat loop; Ctrl+C cancels a slow turn instead of exiting"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Print the answer as it is generated, with progress lines for tool calls"
+    )
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="Serve many chat sessions over HTTP/WebSocket instead of the interactive prompt"
+    )
+    parser.add_argument(
+        "--collect-metrics", action="store_true",
+        help="Poll fleet CPU in the background so CPU questions are answered from local history"
+    )
+    parser.add_argument(
+        "--no-router", dest="use_router", action="store_false",
+        help="Send every prompt to Gemini instead of answering simple ones directly"
+    )
+    parser.add_argument(
+        "--no-prewarm", dest="prewarm", action="store_false",
+        help="Do not load client libraries and credentials in the background at startup"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind in --serve mode")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on in --serve mode")
+    return parser.parse_args(argv)
+
+
+async def ainput(prompt: str) -> str:
+    """
+    Read a line from stdin without blocking the event loop
+
+    Args:
+        prompt (str): Prompt to print
+
+    Returns:
+        str: Line entered by the user
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def read_line():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(future.set_result, line)
+
+    # Daemon thread so a pending prompt never blocks interpreter exit
+    threading.Thread(target=read_line, daemon=True).start()
+    return await future
+
+
+async def stream_turn(chat, user_prompt: str) -> None:
+    """
+    Print a turn's events as they arrive
+
+    Args:
+        chat (AsyncParallelToolChat): Async chat session
+        user_prompt (str): User message
+    """
+    print("Bot  :> ", end="", flush=True)
+    async for event in chat.send_message_stream(user_prompt):
+        print_event(event)
+    print()
+
+
+async def answer_turn(chat, user_prompt: str) -> None:
+    """
+    Print a turn's final answer
+
+    Args:
+        chat (AsyncParallelToolChat): Async chat session
+        user_prompt (str): User message
+    """
+    resp = await chat.send_message(user_prompt)
+    print(f"Bot  :> {resp.text}")
+
+
+def create_chat_in_background(factory) -> Future:
+    """
+    Create the chat session in a worker thread, so the prompt shows while the GenAI SDK loads
+
+    Args:
+        factory: Callable returning the chat session
+
+    Returns:
+        Future: Resolves to the chat session
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-setup")
+    future = executor.submit(factory)
+    executor.shutdown(wait=False)
+    return future
+
+
+def _create_async_bot():
+    from core.aio import create_async_bot
+    return create_async_bot()
+
+
+async def run_async_loop(stream: bool = False, use_router: bool = True) -> None:
+    """
+    Async chat loop, a turn in progress is cancelled with Ctrl+C
+
+    Args:
+        stream (bool): Print answers as they are generated
+        use_router (bool): Answer simple prompts by calling the tool directly
+    """
+    from core.bot import get_monitoring_tools
+
+    chat_future = asyncio.wrap_future(create_chat_in_background(_create_async_bot))
+    router = IntentRouter(get_monitoring_tools()) if use_router else None
+    loop = asyncio.get_running_loop()
+
+    print("GCP Monitoring Bot started (async). Type 'q', 'quit', or 'exit' to stop.")
+    print("-" * 50)
+
+    while True:
+        user_prompt = await ainput("User :> ")
+        if user_prompt.lower() in EXIT_COMMANDS:
+            break
+        if router is not None:
+            answer = await asyncio.to_thread(router.route, user_prompt)
+            if answer is not None:
+                print(f"Bot  :>\n{answer}")
+                (await chat_future).add_exchange(user_prompt, answer)
+                continue
+
+        chat = await chat_future
+        turn = asyncio.create_task((stream_turn if stream else answer_turn)(chat, user_prompt))
+        try:
+            loop.add_signal_handler(signal.SIGINT, turn.cancel)
+        except NotImplementedError:  # pragma: no cover - Windows event loops
+            pass
+        try:
+            await turn
+        except asyncio.CancelledError:
+            print("\nBot  :> Cancelled.")
+        finally:
+            try:
+                loop.remove_signal_handler(signal.SIGINT)
+            except NotImplementedError:  # pragma: no cover - Windows event loops
+                pass
+
+
+def print_event(event: dict) -> None:
+    """
+    Print one streamed turn event
+
+    Args:
+        event (dict): Event from send_message_stream
+    """
+    if event["type"] == "text":
+        print(event["text"], end="", flush=True)
+    elif event["type"] == "tool_start":
+        print(f"  ... {event['name']}", flush=True)
+    elif event["type"] == "tool_end":
+        status = f"failed: {event['error']}" if event.get("error") else "done"
+        print(f"  ... {event['name']} {status} ({event['seconds']:.1f}s)", flush=True)
+
+
+def run_loop(stream: bool = False, use_router: bool = True) -> None:
+    """
+    Blocking chat loop
+
+    Args:
+        stream (bool): Print answers as they are generated
+        use_router (bool): Answer simple prompts by calling the tool directly
+    """
+    from core.bot import create_bot, get_monitoring_tools
+
+    chat_future = create_chat_in_background(create_bot)
+    router = IntentRouter(get_monitoring_tools()) if use_router else None
+
+    print("GCP Monitoring Bot started. Type 'q', 'quit', or 'exit' to stop.")
+    print("-" * 50)
+
+    while True:
+        user_prompt = input("User :> ")
+        if user_prompt.lower() in EXIT_COMMANDS:
+            break
+        if router is not None:
+            answer = router.route(user_prompt)
+            if answer is not None:
+                print(f"Bot  :>\n{answer}")
+                chat_future.result().add_exchange(user_prompt, answer)
+                continue
+        chat = chat_future.result()
+        if stream:
+            print("Bot  :> ", end="", flush=True)
+            for event in chat.send_message_stream(user_prompt):
+                print_event(event)
+            print()
+        else:
+            resp = chat.send_message(user_prompt)
+            print(f"Bot  :> {resp.text}")
+
+
+def main(argv=None):
     """
     Main entry point for the GCP Monitoring Bot
     """
+    args = parse_args(argv)
     try:
         load_environment_variables()
 
-        chat = create_bot()
+        if args.prewarm:
+            from core.prewarm import start_prewarm
+            start_prewarm()
 
-        print("GCP Monitoring Bot started. Type 'q', 'quit', or 'exit' to stop.")
-        print("-" * 50)
+        if args.collect_metrics:
+            from core.compute.metric_store import start_collector
+            start_collector(os.environ["GCP_PROJECT_ID"])
 
-        while True:
-            user_prompt = input("User :> ")
-            if user_prompt.lower() in ("q", "quit", "exit"):
-                break
-            resp = chat.send_message(user_prompt)
-            print(f"Bot  :> {resp.text}")
+        if args.serve:
+            from core.server import run_server
+            run_server(args.host, args.port)
+        elif args.use_async:
+            asyncio.run(run_async_loop(stream=args.stream, use_router=args.use_router))
+        else:
+            run_loop(stream=args.stream, use_router=args.use_router)
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
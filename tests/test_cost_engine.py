@@ -0,0 +1,17 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from core.cost_monitoring.cost_engine import CUBE_COLUMNS, since
+
+
+def test_since_compares_utc_days():
+    cube = pd.DataFrame.from_records(
+        [(pd.Timestamp(2026, 1, day), "Compute Engine", "N2 Core", "USD", 1.0) for day in (1, 2, 3)],
+        columns=CUBE_COLUMNS,
+    )
+    # 01:00 on Jan 2 at UTC+5 is still Jan 1 in UTC
+    start = datetime(2026, 1, 2, 1, tzinfo=timezone(timedelta(hours=5)))
+
+    assert since(cube, start)["usage_date"].dt.day.tolist() == [1, 2, 3]
+    assert since(cube, datetime(2026, 1, 2, 23, tzinfo=timezone.utc))["usage_date"].dt.day.tolist() == [2, 3]
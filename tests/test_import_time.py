@@ -0,0 +1,11 @@
+import pytest
+
+from benchmarks.import_time import DEFERRED_MODULES, import_profile
+
+
+@pytest.mark.parametrize("module", ["main", "core.bot"])
+def test_import_leaves_deferred_libraries_unloaded(module):
+    imported = {name for name, _ in import_profile(module)}
+
+    assert module in imported
+    assert [name for name in DEFERRED_MODULES if name in imported] == []
@@ -0,0 +1,18 @@
+import json
+
+from core.cloud_run.log_compaction import MAX_EXEMPLAR_CHARS, LogCompactor
+
+
+def test_result_keeps_templates_within_half_the_byte_budget():
+    compactor = LogCompactor(max_entries=200, max_bytes=20_000)
+    for index in range(500):
+        words = " ".join(f"{chr(97 + index % 26)}{chr(97 + index // 26 % 26)}word{letter}" for letter in "abcdefgh")
+        compactor.add({"timestamp": "2026-01-01T00:00:00Z", "severity": "INFO", "message": f"{words} {'y' * 5000}"})
+
+    result = compactor.result(200)
+
+    assert len(json.dumps(result["templates"])) <= 10_000
+    assert all(len(exemplar) <= MAX_EXEMPLAR_CHARS + 3
+               for template in result["templates"] for exemplar in template["exemplars"])
+    assert len(result["templates"]) + result["stats"]["templates_omitted"] == result["stats"]["templates_total"]
+    assert result["stats"]["templates_omitted"] > 0
@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+
+from core.compute import metric_store
+from core.compute.metric_store import MAX_WINDOW_SECONDS, MetricStore
+
+
+def snapshot(*instance_names):
+    end_time = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    return {name: {"zone": "us-central1-a", "end_time": [end_time], "value": [0.5]} for name in instance_names}
+
+
+def test_covers_stops_at_the_longest_tier():
+    store = MetricStore()
+    store.mark_coverage("project", 0.0, 60)
+
+    assert store.covers("project", MAX_WINDOW_SECONDS)
+    assert not store.covers("project", MAX_WINDOW_SECONDS + 3600)
+
+
+def test_record_evicts_instances_missing_for_an_interval(monkeypatch):
+    store = MetricStore()
+    now = 1_000_000.0
+    monkeypatch.setattr(metric_store.time, "time", lambda: now)
+    store.record("project", "cpu", snapshot("web-001", "web-002"), evict_after=60)
+
+    now += 30
+    store.record("project", "cpu", snapshot("web-001"), evict_after=60)
+    assert set(store.fleet("project", "cpu", 3600)[0]) == {"web-001", "web-002"}
+
+    now += 60
+    store.record("project", "cpu", snapshot("web-001"), evict_after=60)
+    assert set(store.fleet("project", "cpu", 3600)[0]) == {"web-001"}
@@ -0,0 +1,75 @@
+import pytest
+
+from core import name_index
+from core.name_index import KIND_ALIASES, NameIndex, normalize_name
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ETL_Orders", "etl-orders"),
+    ("  the etl orders job ", "etl-orders"),
+    ("client1 service account", "client1-service"),
+    ("nightly--export__executions", "nightly-export"),
+    ("", ""),
+])
+def test_normalize_name(text, expected):
+    assert normalize_name(text) == expected
+
+
+def test_search_ranks_exact_match_first():
+    index = NameIndex()
+    index.update("job", {name: {} for name in ["etl-orders", "etl-orders-backfill", "etl-order", "sync-users"]})
+
+    candidates = index.search("job", "etl orders job")
+
+    assert candidates[0] == {"name": "etl-orders", "score": 1.0}
+    assert {candidate["name"] for candidate in candidates[1:]} == {"etl-orders-backfill", "etl-order"}
+
+
+def test_search_scores_substrings_at_least_three_quarters():
+    index = NameIndex()
+    index.update("job", {name: {} for name in ["nightly-billing-export", "billing", "sync-users"]})
+
+    scores = {candidate["name"]: candidate["score"] for candidate in index.search("job", "billing")}
+
+    assert scores["billing"] == 1.0
+    assert scores["nightly-billing-export"] >= 0.75
+    assert "sync-users" not in scores
+
+
+def test_search_returns_details_and_respects_limit():
+    index = NameIndex()
+    index.update("vm", {f"web-{number:03d}": {"zone": "us-central1-a"} for number in range(20)})
+
+    candidates = index.search("vm", "web", limit=3)
+
+    assert len(candidates) == 3
+    assert all(candidate["zone"] == "us-central1-a" for candidate in candidates)
+
+
+def test_update_adds_and_removes_only_changes():
+    index = NameIndex()
+    assert index.update("dataset", {"analytics": {}, "staging": {}}) == (2, 0)
+    assert index.update("dataset", {"analytics": {}, "marts": {}}) == (1, 1)
+    assert [candidate["name"] for candidate in index.search("dataset", "staging")] == []
+
+
+@pytest.fixture
+def loaded_index(monkeypatch):
+    index = NameIndex()
+    monkeypatch.setattr(name_index, "_index", index)
+    monkeypatch.setattr(name_index, "start_refresher", lambda: None)
+    for kind in name_index.LOADERS:
+        monkeypatch.setitem(name_index.LOADERS, kind, lambda kind=kind: {f"{kind}-one": {}})
+    return index
+
+
+@pytest.mark.parametrize("alias, kind", sorted(KIND_ALIASES.items()))
+def test_resolve_resource_accepts_every_alias(loaded_index, alias, kind):
+    for spelling in (alias, alias.upper(), alias.replace("_", " "), alias.replace("_", "-")):
+        result = name_index.resolve_resource(spelling, "one")
+        assert result.get("kind") == kind, result
+        assert result["candidates"][0]["name"] == f"{kind}-one"
+
+
+def test_resolve_resource_rejects_unknown_kind(loaded_index):
+    assert "error" in name_index.resolve_resource("bucket", "logs")
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+from core.output_shaping import estimate_tokens, fit_budget, project, shape_result, tabulate
+
+
+def test_project_keeps_spec_fields_and_shortens_resource_urls():
+    vm = {
+        "name": "web-001",
+        "machineType": "https://www.googleapis.com/compute/v1/projects/p/zones/us-central1-a/machineTypes/e2-small",
+        "disks": [{"deviceName": "boot", "boot": True, "licenses": ["a", "b"]}],
+        "metadata": {"items": [{"key": "startup-script", "value": "#!/bin/sh"}]},
+    }
+
+    projected = project(vm, {"name": None, "machineType": None, "disks": {"deviceName": None, "boot": None}})
+
+    assert projected == {"name": "web-001", "machineType": "e2-small", "disks": [{"deviceName": "boot", "boot": True}]}
+
+
+def test_tabulate_turns_uniform_records_into_a_table():
+    records = [{"name": f"job-{index}", "failed": index} for index in range(3)]
+
+    assert tabulate({"jobs": records}) == {
+        "jobs": {"columns": ["name", "failed"], "rows": [["job-0", 0], ["job-1", 1], ["job-2", 2]]}
+    }
+
+
+def test_tabulate_leaves_short_mixed_and_nested_lists():
+    short = [{"name": "a"}, {"name": "b"}]
+    mixed = [{"name": "a"}, {"name": "b"}, {"id": "c"}]
+    nested = [{"name": "a", "labels": {"env": "prod"}}] * 3
+
+    assert tabulate(short) == short
+    assert tabulate(mixed) == mixed
+    assert tabulate(nested) == nested
+
+
+def test_fit_budget_shortens_table_rows_whole():
+    table = {"columns": ["name", "zone", "status"],
+             "rows": [[f"vm-{index:04d}", "us-central1-a", "RUNNING"] for index in range(400)]}
+
+    fitted = fit_budget(table, 300)
+
+    assert estimate_tokens(fitted) <= 300
+    assert all(len(row) == 3 for row in fitted["rows"])
+    assert fitted["rows"][0] == ["vm-0000", "us-central1-a", "RUNNING"]
+    assert len(fitted["rows"]) + fitted["more_rows"] == 400
+
+
+def test_fit_budget_shortens_parallel_lists_together():
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    series = {"web-001": {"end_time": [start + timedelta(minutes=minute) for minute in range(360)],
+                          "value": [0.5] * 360}}
+
+    fitted = fit_budget(series, 400)["web-001"]
+
+    assert estimate_tokens(fitted) <= 400
+    assert len(fitted["end_time"]) == len(fitted["value"])
+    assert all(isinstance(value, float) for value in fitted["value"])
+    assert len(fitted["value"]) + fitted["more_items"] == 360
+
+
+def test_fit_budget_marks_plain_lists_and_leaves_small_values():
+    fitted = fit_budget({"names": [f"dataset_{index}" for index in range(500)]}, 200)
+
+    assert fitted["names"][-1].startswith("... ")
+    assert fit_budget({"names": ["a", "b"]}, 200) == {"names": ["a", "b"]}
+
+
+def test_shape_result_projects_tabulates_and_fits():
+    executions = [{"name": f"etl-{index:05d}", "status": "FAILED", "failed_count": 1} for index in range(1000)]
+
+    shaped = shape_result("get_job_executions", {"executions": executions}, budget=500)
+
+    assert shaped["executions"]["columns"] == ["name", "status", "failed_count"]
+    assert shaped["executions"]["rows"][0] == ["etl-00000", "FAILED", 1]
+    assert estimate_tokens(shaped) <= 500
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.bigquery import query_planning
+from core.bigquery.query_planning import (
+    QueryBudgetExceeded, billed_tool, bytes_billed_stats, recent_billed_calls, run_query, scalar_param, split_window
+)
+
+GIB = 1024 ** 3
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeJob:
+    def __init__(self, scanned, rows):
+        self.total_bytes_processed = scanned
+        self.total_bytes_billed = scanned
+        self.cache_hit = False
+        self.rows = rows
+
+    def result(self):
+        return FakeRows(self.rows)
+
+
+class FakeRows(list):
+    @property
+    def total_rows(self):
+        return len(self)
+
+
+class FakeRow(dict):
+    pass
+
+
+class FakeClient:
+    """Scans 1 GiB per day of window and returns one row per day"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def query(self, query, job_config):
+        values = {param.name: param.value for param in job_config.query_parameters}
+        days = (values["end_time"] - values["start_time"]) // timedelta(days=1)
+        if job_config.dry_run:
+            return FakeJob(days * GIB, [])
+        self.jobs.append((values["start_time"], values["end_time"]))
+        rows = [FakeRow(day=(values["start_time"] + timedelta(days=day)).date()) for day in range(days)]
+        return FakeJob(days * GIB, rows)
+
+
+@pytest.fixture(autouse=True)
+def empty_ledger(monkeypatch):
+    monkeypatch.setattr(query_planning, "_ledger", {})
+    monkeypatch.setattr(query_planning, "_recent_calls", query_planning.deque(maxlen=10))
+
+
+def window(days):
+    return [scalar_param("start_time", START), scalar_param("end_time", START + timedelta(days=days))]
+
+
+def test_query_above_budget_is_split_into_day_aligned_windows():
+    client = FakeClient()
+
+    rows, scanned = run_query(client, "SELECT 1", window(10), max_bytes=4 * GIB, split=split_window())
+
+    assert [row["day"] for row in rows] == [(START + timedelta(days=day)).date() for day in range(10)]
+    assert scanned == 10 * GIB
+    assert all(end - start <= timedelta(days=4) for start, end in client.jobs)
+    assert all((start - START) % timedelta(days=1) == timedelta(0) for start, _ in client.jobs)
+
+
+def test_query_is_refused_when_window_cannot_be_narrowed():
+    client = FakeClient()
+
+    with pytest.raises(QueryBudgetExceeded):
+        run_query(client, "SELECT 1", window(3), max_bytes=GIB // 2, split=split_window())
+    with pytest.raises(QueryBudgetExceeded):
+        run_query(client, "SELECT 1", window(3), max_bytes=2 * GIB)
+
+    # Every piece is planned before any runs, so nothing was billed
+    assert client.jobs == []
+
+
+def test_billed_tool_records_each_call():
+    client = FakeClient()
+
+    @billed_tool
+    def usage(days):
+        return run_query(client, "SELECT 1", window(days), max_bytes=4 * GIB, split=split_window())
+
+    usage(2)
+    usage(6)
+
+    calls = recent_billed_calls()
+    assert [(call["tool"], call["queries"], call["bytes_billed"]) for call in calls] == [
+        ("usage", 2, 6 * GIB), ("usage", 1, 2 * GIB)
+    ]
+    assert calls[0]["split_queries"] == 1
+    stats = bytes_billed_stats()["usage"]
+    assert (stats["calls"], stats["bytes_billed"], stats["max_bytes_billed_per_call"]) == (2, 8 * GIB, 6 * GIB)
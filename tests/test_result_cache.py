@@ -0,0 +1,21 @@
+from core.cache.result_cache import cache_stats, cached_tool
+
+
+def describe_vm(name):
+    return {"name": name}
+
+
+def test_same_named_tools_and_ttls_get_their_own_caches():
+    namespace = {}
+    exec("def describe_vm(name):\n    return {'name': 'other'}", namespace)
+    namespace["describe_vm"].__module__ = "elsewhere"
+
+    default_ttl = cached_tool(describe_vm)
+    short_ttl = cached_tool(describe_vm, ttl=1)
+    other = cached_tool(namespace["describe_vm"])
+
+    assert default_ttl("web-001") == {"name": "web-001"}
+    assert other("web-001") == {"name": "other"}
+    assert short_ttl.cache is not default_ttl.cache
+    assert (default_ttl.cache.ttl, short_ttl.cache.ttl) == (120, 1)
+    assert "elsewhere.describe_vm" in cache_stats()
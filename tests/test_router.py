@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from core.router import ROUTES, IntentRouter
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setenv("GCP_PROJECT_ID", "project")
+    monkeypatch.setenv("GCP_PROJECT_NUMBER", "123")
+    tools = []
+    for tool_name in {tool_name for _, tool_name, _ in ROUTES}:
+        tool = lambda **kwargs: kwargs
+        tool.__name__ = tool_name
+        tools.append(tool)
+    return IntentRouter(tools)
+
+
+@pytest.mark.parametrize("prompt, days", [
+    ("cost by service", 30),
+    ("Cost by service last 2 weeks?", 14),
+    ("cost trends for the past month", 30),
+    ("cost by service today", 0),
+    ("jobs health today", 1),
+    ("which jobs failed this week", 7),
+])
+def test_match_converts_periods_to_days(router, prompt, days):
+    assert router.match(prompt)[1]["days"] == days
+
+
+def test_this_month_starts_on_the_first(router):
+    assert router.match("cost by service this month")[1]["days"] == datetime.now(timezone.utc).day - 1
+
+
+@pytest.mark.parametrize("prompt", [
+    "cost by service yesterday",
+    "which jobs failed yesterday",
+    "jobs health this month",
+    "bigquery usage by user this month",
+])
+def test_periods_the_tool_cannot_express_go_to_the_model(router, prompt):
+    assert router.match(prompt) is None